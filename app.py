@@ -1,26 +1,38 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import os
-import osmnx as ox
-import networkx as nx
 from streamlit_folium import st_folium
 import folium
+from folium.plugins import PolyLineFromEncoded
 from math import radians, cos, sin, asin, sqrt
-from heapq import heappush, heappop
-from itertools import count
 import qrcode
 from PIL import Image
 import plotly.graph_objects as go
 import plotly.express as px
-from geopy.geocoders import Nominatim
 import gpxpy
 import gpxpy.gpx
 from datetime import datetime
 import time
 import json
+import numpy as np
+import hashlib
 import base64
 import io
 from urllib.parse import urlencode, parse_qs
+from graph_engine import shared_graph, build_snapshot
+from concurrent.futures import as_completed
+from spatial_index import EdgeSnap, load_or_build
+from route_cache import RouteCache, pack_nodes, unpack_nodes
+from search_pool import SearchPool, SEARCH_MODES, A_STAR_HEURISTICS, ALGORITHM_LABELS
+from matrix import point_matrix, matrix_frame, matrix_csv, matrix_parquet
+from overlays import density_overlay, DensityRaster
+from search import stream_dijkstra, stream_astar, SearchTreeCache
+from telemetry import measure
+from geometry import route_coords, simplify, zoom_tolerance, encode_polyline
+from isochrone import isochrones
+import landmarks
+import place_index
+from geocoding import GeocodeCache, NominatimBackend, PlaceIndexBackend, FallbackBackend
 
 # ---------- PROFESSIONAL CONFIG & STYLING ----------
 st.set_page_config(
@@ -524,23 +536,69 @@ def generate_qr_base64(url):
 qr_base64_str = generate_qr_base64(APP_URL)
 
 # ---------- DATA LOADING FUNCTION ----------
-@st.cache_data
+GRAPHML_PATH = "ahmednagar.graphml"
+SNAPSHOT_PATH = "ahmednagar.graph"
+SPATIAL_INDEX_PATH = "ahmednagar.sidx"
+LANDMARKS_PATH = "ahmednagar.landmarks"
+CONTRACTION_PATH = "ahmednagar.ch"
+PLACES_PATH = "ahmednagar.places"
+
+@st.cache_resource
 def load_graph():
-    """Load the local graph file directly"""
-    file_path = "ahmednagar.graphml"
-    
-    if not os.path.exists(file_path):
-        st.error(f"❌ Graph file not found: {file_path}")
-        st.stop()
-    
+    """Return the process-wide, read-only graph shared by every session"""
     try:
-        G = ox.load_graphml(file_path)
-        return G
+        if not os.path.exists(SNAPSHOT_PATH) and os.path.exists(GRAPHML_PATH):
+            build_snapshot(GRAPHML_PATH, SNAPSHOT_PATH)
+        if os.path.exists(SNAPSHOT_PATH):
+            return shared_graph(SNAPSHOT_PATH)
     except Exception as e:
         st.error(f"❌ Error loading graph: {e}")
         st.stop()
+    
+    st.error(f"❌ Graph file not found: {SNAPSHOT_PATH} (run get_data.py)")
+    st.stop()
+
+@st.cache_resource
+def load_spatial_index(_graph):
+    """Load the persisted snapping grid, building it next to the graph if missing"""
+    return load_or_build(_graph, SPATIAL_INDEX_PATH)
+
+@st.cache_resource
+def load_landmarks(_graph):
+    """Load the ALT landmark distance tables, precomputing them if missing"""
+    return landmarks.load_or_build(_graph, LANDMARKS_PATH)
+
+@st.cache_resource
+def load_place_index():
+    """Offline street/POI search index written by get_data.py (None if it has not been built)"""
+    return place_index.load(PLACES_PATH)
+
+@st.cache_resource
+def load_geocoder(_places):
+    """One geocoding cache shared by every session, persisted under cache/geocode/<backend>.
+
+    With an offline index, queries it cannot answer fall through to Nominatim.
+    """
+    backend = FallbackBackend(PlaceIndexBackend(_places), NominatimBackend()) if _places is not None else NominatimBackend()
+    return GeocodeCache(backend)
+
+@st.cache_resource
+def load_route_cache(_graph):
+    """One route-result cache shared by every session, persisted under cache/routes"""
+    return RouteCache(_graph)
+
+@st.cache_resource
+def load_search_pool():
+    """Worker processes that run the compared searches concurrently, started once"""
+    return SearchPool(SNAPSHOT_PATH, LANDMARKS_PATH, CONTRACTION_PATH)
+
+@st.cache_resource
+def load_search_trees(_graph):
+    """Forward Dijkstra trees kept per start point, resumed when only the end point changes"""
+    return SearchTreeCache(_graph)
 
 # ---------- ALGORITHM & HELPER FUNCTIONS ----------
+
 def haversine_distance_coords(lat1, lon1, lat2, lon2):
     """Calculate haversine distance between two coordinate pairs"""
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
@@ -551,108 +609,115 @@ def haversine_distance_coords(lat1, lon1, lat2, lon2):
     r = 6371
     return c * r * 1000
 
-def haversine_distance(u, v):
-    """Calculate haversine distance between two nodes in the graph"""
-    u_coords = (G.nodes[u]['y'], G.nodes[u]['x'])
-    v_coords = (G.nodes[v]['y'], G.nodes[v]['x'])
-    return haversine_distance_coords(u_coords[0], u_coords[1], v_coords[0], v_coords[1])
-
-def astar_path_with_explored_nodes(G, source, target, heuristic=None, weight="length"):
-    if source not in G or target not in G:
-        raise nx.NodeNotFound(f"Source or target not in graph.")
-    if heuristic is None:
-        heuristic = lambda u, v: 0
-    push, pop, c = heappush, heappop, count()
-    queue = [(0, next(c), source, 0, None)]
-    enqueued, explored = {}, {}
-    explored_nodes_list = []
-    while queue:
-        _, __, curnode, dist, parent = pop(queue)
-        if curnode == target:
-            path = [curnode]
-            node = parent
-            while node is not None:
-                path.append(node)
-                node = explored[node]
-            path.reverse()
-            return (path, len(explored), explored_nodes_list)
-        if curnode in explored:
-            continue
-        explored[curnode] = parent
-        explored_nodes_list.append(curnode)
-        for neighbor, w in G[curnode].items():
-            if neighbor in explored:
-                continue
-            cost = w.get(weight, 1)
-            if cost is None:
-                continue
-            ncost = dist + cost
-            if neighbor in enqueued:
-                if ncost < enqueued[neighbor]:
-                    enqueued[neighbor] = ncost
-                else:
-                    continue
-            else:
-                enqueued[neighbor] = ncost
-            f_score = ncost + heuristic(neighbor, target)
-            push(queue, (f_score, next(c), neighbor, ncost, curnode))
-    raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
-
-def dijkstra_path_with_explored_nodes(G, source, target, weight="length"):
-    if source not in G or target not in G:
-        raise nx.NodeNotFound(f"Source or target not in graph.")
-    push, pop, c = heappush, heappop, count()
-    queue = [(0, next(c), source, None)]
-    explored = {}
-    explored_nodes_list = []
-    while queue:
-        dist, __, curnode, parent = pop(queue)
-        if curnode == target:
-            path = [curnode]
-            node = parent
-            while node is not None:
-                path.append(node)
-                node = explored[node]
-            path.reverse()
-            return (path, len(explored), explored_nodes_list)
-        if curnode in explored:
+def snap_anchor(endpoint):
+    """Return the (lat, lon) where a search endpoint meets the road network"""
+    if isinstance(endpoint, EdgeSnap):
+        return (endpoint.lat, endpoint.lon)
+    return (float(graph.lat[endpoint]), float(graph.lon[endpoint]))
+
+# Weight profile -> label; profiles missing from an older snapshot are not offered
+ROUTE_PROFILES = {
+    "length": "📏 Shortest distance",
+    "travel_time": "⏱️ Fastest (free-flow time)",
+    "prefer_highways": "🛣️ Prefer highways",
+}
+
+def profile_endpoint(endpoint, weight):
+    """A search endpoint with its partial-edge costs in the weight profile's units"""
+    return endpoint.with_weight(graph, weight) if isinstance(endpoint, EdgeSnap) else endpoint
+
+def route_cost(path, start, end, weight="length"):
+    """Road cost of a node path plus the partial edges from/to snapped endpoints"""
+    if not len(path):
+        # Same-road route that never reaches a node
+        return start.direct_cost(end)
+    cost = graph.path_length(path, weight)
+    if isinstance(start, EdgeSnap):
+        cost += start.departure_cost(path[0])
+    if isinstance(end, EdgeSnap):
+        cost += end.arrival_cost(path[-1])
+    return cost
+
+def snap_points(points, to_road):
+    """Snap (lat, lon) points in one batch: EdgeSnaps on roads, or nearest node indices"""
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    if to_road:
+        return spatial_index.nearest_edges(graph, lats, lons)
+    nodes, _ = spatial_index.nearest_nodes(lats, lons)
+    return nodes.tolist()
+
+MATRIX_PARALLEL_ROWS = 8
+# Weight profile -> (unit shown in the matrix panel, profile units per shown unit)
+MATRIX_UNITS = {"length": ("km", 1000), "travel_time": ("min", 60), "prefer_highways": ("weighted km", 1000)}
+
+def parse_points(text):
+    """Parse one "lat, lon" or "label, lat, lon" per line into (labels, points)"""
+    labels, points = [], []
+    for line_number, line in enumerate(text.strip().splitlines(), start=1):
+        fields = [field.strip() for field in line.split(",")]
+        if not any(fields):
             continue
-        explored[curnode] = parent
-        explored_nodes_list.append(curnode)
-        for neighbor, w in G[curnode].items():
-            if neighbor in explored:
-                continue
-            cost = w.get(weight, 1)
-            if cost is None:
-                continue
-            ncost = dist + cost
-            push(queue, (ncost, next(c), neighbor, curnode))
-    raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
-
-def create_gpx_file(path_nodes, G):
+        if len(fields) not in (2, 3):
+            raise ValueError(f"Line {line_number}: expected 'lat, lon' or 'label, lat, lon'")
+        label = fields[0] if len(fields) == 3 else None
+        try:
+            lat, lon = float(fields[-2]), float(fields[-1])
+        except ValueError:
+            raise ValueError(f"Line {line_number}: '{line.strip()}' is not a coordinate pair")
+        labels.append(label or f"{lat:.5f}, {lon:.5f}")
+        points.append((lat, lon))
+    return labels, points
+
+# Reachability budget unit -> (weight profile, profile units per budget unit)
+ISOCHRONE_UNITS = {"km": ("length", 1000), "min": ("travel_time", 60)}
+# Band colours from the smallest budget outwards
+ISOCHRONE_COLORS = ["#34A853", "#FBBC05", "#FF6D01", "#EA4335", "#A142F4"]
+
+def parse_budgets(text):
+    """Parse comma-separated positive budgets, smallest first"""
+    try:
+        budgets = sorted({float(field) for field in text.replace(";", ",").split(",") if field.strip()})
+    except ValueError:
+        raise ValueError(f"'{text.strip()}' is not a list of numbers")
+    if not budgets or budgets[0] <= 0:
+        raise ValueError("Enter at least one budget above zero")
+    if len(budgets) > len(ISOCHRONE_COLORS):
+        raise ValueError(f"At most {len(ISOCHRONE_COLORS)} budgets at once")
+    return budgets
+
+def render_progress(placeholder, status):
+    """Show one progress line per algorithm"""
+    lines = "".join(f'<div class="progress-text">{text}</div>' for text in status.values())
+    placeholder.markdown(f'<div class="progress-container">{lines}</div>', unsafe_allow_html=True)
+
+def create_gpx_file(route_latlngs):
     gpx = gpxpy.gpx.GPX()
     gpx_track = gpxpy.gpx.GPXTrack()
     gpx.tracks.append(gpx_track)
     gpx_segment = gpxpy.gpx.GPXTrackSegment()
     gpx_track.segments.append(gpx_segment)
-    for node in path_nodes:
+    for lat, lon in route_latlngs:
         gpx_segment.points.append(
-            gpxpy.gpx.GPXTrackPoint(G.nodes[node]['y'], G.nodes[node]['x'])
+            gpxpy.gpx.GPXTrackPoint(lat, lon)
         )
     return gpx.to_xml()
 
 def search_location(query):
+    """Best match for a place name: the offline index, then Nominatim"""
     try:
-        geolocator = Nominatim(user_agent="icadma_route_finder")
-        location = geolocator.geocode(query + ", Ahmednagar, Maharashtra, India", timeout=10)
-        if location:
-            return (location.latitude, location.longitude, location.address)
-        return None
-    except:
+        return geocoder.geocode(query)
+    except Exception:
+        # Geocoder unreachable or rate-limited; failures are not cached, so a retry asks again
         return None
 
-def rebuild_map():
-    m = folium.Map(
+def route_base_map():
+    """Tiles only: the route and overlays are feature groups, so they update without re-rendering the map.
+
+    Built fresh on every rerun: st_folium adds the feature groups to the map
+    it is given, so a shared Map would collect every render's layers.
+    """
+    return folium.Map(
         location=[center_lat, center_lon],
         zoom_start=14,
         tiles="cartodbdark_matter",
@@ -660,13 +725,43 @@ def rebuild_map():
         zoom_control=False,
         attribution_control=False
     )
+
+# Explored-node layer -> (visibility flag, packed explored nodes, colour) in session state
+EXPLORED_LAYERS = {
+    "dijkstra": ("show_dijkstra_nodes", "dijkstra_explored", '#4285F4'),
+    "astar": ("show_astar_nodes", "astar_explored", '#34A853'),
+}
+# Per-session result state (route path and packed explored sets) reported against this budget
+SESSION_BUDGET_BYTES = 512 * 1024
+
+def session_result_bytes():
+    """Bytes held by the current result in session state"""
+    return sum(st.session_state[k].nbytes for k in ["route_path", "dijkstra_explored", "astar_explored"]
+               if st.session_state[k] is not None)
+
+@st.cache_resource(max_entries=64)
+def shared_layer_data(layer_key, _build):
+    """Expensive layer payloads built once per result and shared across reruns and sessions.
+
+    Only immutable data lives here (the encoded route polyline, the heatmap
+    PNG and its bounds), bounded by entry count and rebuilt from session
+    state when evicted. st_folium renames, re-parents and renders the folium
+    objects it is given, so the lightweight FeatureGroups around this data
+    are built for every render and never shared.
+    """
+    return _build()
+
+def route_latlngs():
+    """Full-resolution route along the stored edge geometry"""
+    return route_coords(graph, st.session_state.route_path, st.session_state.start_node, st.session_state.end_node)
+
+def build_endpoint_layers():
+    """Connector lines and markers for the current result"""
+    connectors = folium.FeatureGroup(name="Connectors")
     
-    # Draw the main route
-    route_latlngs = [(G.nodes[n]['y'], G.nodes[n]['x']) for n in st.session_state.route_path]
-    
-    # Add connection lines from clicked points to nearest nodes
-    start_node_coords = (G.nodes[st.session_state.route_path[0]]['y'], G.nodes[st.session_state.route_path[0]]['x'])
-    end_node_coords = (G.nodes[st.session_state.route_path[-1]]['y'], G.nodes[st.session_state.route_path[-1]]['x'])
+    # Add connection lines from clicked points to where they meet the road
+    start_node_coords = snap_anchor(st.session_state.start_node)
+    end_node_coords = snap_anchor(st.session_state.end_node)
     
     # Draw dashed lines to show connection to actual start/end points
     folium.PolyLine(
@@ -675,7 +770,7 @@ def rebuild_map():
         weight=4, 
         opacity=0.6, 
         dash_array="10"
-    ).add_to(m)
+    ).add_to(connectors)
     
     folium.PolyLine(
         [end_node_coords, st.session_state.end_point], 
@@ -683,38 +778,23 @@ def rebuild_map():
         weight=4, 
         opacity=0.6, 
         dash_array="10"
-    ).add_to(m)
+    ).add_to(connectors)
     
-    # Draw main route
-    folium.PolyLine(route_latlngs, color="#34A853", weight=6, opacity=0.9, popup="Optimal Route (A*)").add_to(m)
-    
-    if st.session_state.show_dijkstra_nodes and st.session_state.dijkstra_explored_list:
-        for node in st.session_state.dijkstra_explored_list[::10]:
-            folium.CircleMarker(
-                location=(G.nodes[node]['y'], G.nodes[node]['x']),
-                radius=2, color='#4285F4', fill=True, fillOpacity=0.3
-            ).add_to(m)
-    
-    if st.session_state.show_astar_nodes and st.session_state.astar_explored_list:
-        for node in st.session_state.astar_explored_list[::10]:
-            folium.CircleMarker(
-                location=(G.nodes[node]['y'], G.nodes[node]['x']),
-                radius=2, color='#34A853', fill=True, fillOpacity=0.3
-            ).add_to(m)
+    endpoints = folium.FeatureGroup(name="Start & End")
     
     # Mark the actual clicked points
-    folium.Marker(st.session_state.start_point, popup="🟢 Start (Your Click)", icon=folium.Icon(color="green", icon="play")).add_to(m)
-    folium.Marker(st.session_state.end_point, popup="🔴 End (Your Click)", icon=folium.Icon(color="red", icon="flag")).add_to(m)
+    folium.Marker(st.session_state.start_point, popup="🟢 Start (Your Click)", icon=folium.Icon(color="green", icon="play")).add_to(endpoints)
+    folium.Marker(st.session_state.end_point, popup="🔴 End (Your Click)", icon=folium.Icon(color="red", icon="flag")).add_to(endpoints)
     
-    # Mark the nearest graph nodes (optional - for debugging)
+    # Mark where the search starts and ends on the road network
     folium.CircleMarker(
         start_node_coords,
         radius=5,
         color='#34A853',
         fill=True,
         fillOpacity=0.8,
-        popup="Nearest Start Node"
-    ).add_to(m)
+        popup="Snapped Start"
+    ).add_to(endpoints)
     
     folium.CircleMarker(
         end_node_coords,
@@ -722,29 +802,146 @@ def rebuild_map():
         color='#EA4335',
         fill=True,
         fillOpacity=0.8,
-        popup="Nearest End Node"
-    ).add_to(m)
+        popup="Snapped End"
+    ).add_to(endpoints)
     
-    st.session_state.route_map = m
+    return connectors, endpoints
+
+def encoded_route(zoom):
+    """Main route simplified for the zoom level, as an encoded polyline"""
+    latlngs = route_latlngs()
+    # Drop vertices closer than half a pixel to the line at this zoom
+    return encode_polyline(simplify(latlngs, zoom_tolerance(zoom, float(latlngs[:, 0].mean()))))
+
+def build_route_layer(encoded):
+    """Main route shipped as one encoded polyline"""
+    route = folium.FeatureGroup(name="Route")
+    line = PolyLineFromEncoded(encoded=encoded, color="#34A853", weight=6, opacity=0.9)
+    line.add_child(folium.Popup("Optimal Route (A*)"))
+    line.add_to(route)
+    return route
+
+def build_explored_layer(name, image, bounds):
+    """Every explored node, rasterized into one heatmap image"""
+    overlay = folium.FeatureGroup(name=f"{name} explored")
+    folium.raster_layers.ImageOverlay(image=image, bounds=bounds, opacity=0.85, zindex=1).add_to(overlay)
+    return overlay
+
+def build_isochrone_layer(collection):
+    """Every reachability band as one GeoJSON polygon layer"""
+    return folium.GeoJson(
+        collection,
+        name="Reachable area",
+        style_function=lambda feature: {
+            "color": feature["properties"]["color"],
+            "fillColor": feature["properties"]["color"],
+            "weight": 1,
+            "fillOpacity": 0.2,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["label", "area_km2"], aliases=["Within", "Area (km²)"])
+    )
+
+def visible_route_layers(zoom):
+    """Layers to draw: route and endpoints plus each toggled explored heatmap"""
+    route_key = st.session_state.route_key
+    connectors, endpoints = build_endpoint_layers()
+    visible = [connectors, build_route_layer(shared_layer_data(f"{route_key}:route@{zoom}", lambda: encoded_route(zoom)))]
+    for name, (flag, explored_key, color) in EXPLORED_LAYERS.items():
+        if st.session_state[flag] and st.session_state[explored_key] is not None:
+            image, bounds = shared_layer_data(
+                f"{route_key}:{name}",
+                lambda: density_overlay(graph, unpack_nodes(st.session_state[explored_key]), color)
+            )
+            visible.append(build_explored_layer(name, image, bounds))
+    visible.append(endpoints)
+    return visible
+
+# Shortest time between two drawn playback frames; search frames arriving
+# sooner are merged into the next drawn one
+PLAYBACK_FRAME_SECONDS = 1 / 12
+
+def playback_figure(image, bounds, frontier, color, route=None):
+    """One playback frame: settled-node heatmap, open frontier and, at the end, the route's (lat, lon) rows"""
+    (south, west), (north, east) = bounds
+    frontier = list(frontier)
+    fig = go.Figure(go.Scattermapbox(
+        lat=graph.lat[frontier], lon=graph.lon[frontier], mode="markers",
+        marker=dict(size=4, color="#FBBC05"), name="Frontier"
+    ))
+    if route is not None:
+        fig.add_trace(go.Scattermapbox(lat=route[:, 0], lon=route[:, 1], mode="lines",
+                                       line=dict(width=5, color=color), name="Route"))
+    fig.update_layout(
+        mapbox=dict(
+            style="carto-darkmatter", center=dict(lat=center_lat, lon=center_lon), zoom=12,
+            layers=[dict(sourcetype="image", source=image, below="traces",
+                         coordinates=[[west, north], [east, north], [east, south], [west, south]])]
+        ),
+        height=450,
+        margin=dict(l=0, r=0, t=0, b=0),
+        showlegend=False
+    )
+    return fig
+
+def play_search(placeholder, algorithm):
+    """Stream a search into the placeholder as it runs, drawing at most one frame per frame budget"""
+    weight = st.session_state.route_profile
+    source = profile_endpoint(st.session_state.start_node, weight)
+    target = profile_endpoint(st.session_state.end_node, weight)
+    if algorithm == "A*":
+        heuristic = A_STAR_HEURISTICS[st.session_state.astar_heuristic](graph, landmark_table, source, target, weight)
+        frames, color = stream_astar(graph, source, target, heuristic, weight), '#34A853'
+    else:
+        frames, color = stream_dijkstra(graph, source, target, weight), '#4285F4'
+    raster = DensityRaster(graph)
+    drawn, last_draw = 0, 0.0
+    for frame in frames:
+        raster.add(frame.settled)
+        if frame.done or time.perf_counter() - last_draw >= PLAYBACK_FRAME_SECONDS:
+            route = route_coords(graph, frame.path, source, target) if frame.done else None
+            placeholder.plotly_chart(
+                playback_figure(raster.image(color), raster.bounds, frame.frontier, color, route),
+                use_container_width=True, key=f"playback_{drawn}"
+            )
+            drawn += 1
+            last_draw = time.perf_counter()
+    st.session_state.animation_step = drawn
+    return frame.explored_count
 
 # ---------- LOAD DATA & INIT STATE ----------
-G = load_graph()
+graph = load_graph()
+spatial_index = load_spatial_index(graph)
+landmark_table = load_landmarks(graph)
+places = load_place_index()
+geocoder = load_geocoder(places)
+route_cache = load_route_cache(graph)
+search_pool = load_search_pool()
+search_trees = load_search_trees(graph)
 center_lat = 19.0948
 center_lon = 74.7480
-total_nodes = G.number_of_nodes()
-total_edges = G.number_of_edges()
+total_nodes = graph.n_nodes
+total_edges = graph.num_edges
 
-for k in ["start_point", "end_point", "route_map", "prev_click", "route_history", 
+for k in ["start_point", "end_point", "route_key", "prev_click", "route_history", 
           "show_dijkstra_nodes", "show_astar_nodes", "algorithm_view", 
           "nodes_explored_dijkstra", "nodes_explored_astar", "path_length",
-          "dijkstra_explored_list", "astar_explored_list", "calculation_time_dijkstra", 
+          "dijkstra_explored", "astar_explored", "calculation_time_dijkstra", 
           "calculation_time_astar", "route_path", "animate_route", "animation_step",
-          "start_node", "end_node"]:
+          "start_node", "end_node", "snap_to_road", "search_mode", "astar_heuristic", "ch_stats", "route_profile",
+          "telemetry", "trace_memory", "distance_matrix", "recalculate", "isochrone"]:
     if k not in st.session_state:
         if k == "route_history":
             st.session_state[k] = []
-        elif k in ["show_dijkstra_nodes", "show_astar_nodes", "animate_route"]:
+        elif k in ["show_dijkstra_nodes", "show_astar_nodes", "animate_route", "trace_memory", "recalculate"]:
             st.session_state[k] = False
+        elif k == "snap_to_road":
+            st.session_state[k] = True
+        elif k == "route_profile":
+            st.session_state[k] = "length"
+        elif k == "search_mode":
+            st.session_state[k] = "Standard"
+        elif k == "astar_heuristic":
+            st.session_state[k] = "Haversine"
         elif k == "algorithm_view":
             st.session_state[k] = "both"
         elif k == "animation_step":
@@ -787,6 +984,10 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Reachability shows everything within a distance or time of the start point instead of one route
+app_mode = st.radio("🧭 Mode", ["🛣️ Route", "🌐 Reachability"], horizontal=True, key="app_mode")
+reachability = app_mode == "🌐 Reachability"
+
 # ---------- MAIN 2-COLUMN LAYOUT ----------
 col_left, col_right = st.columns([1.5, 1], gap="small")
 
@@ -794,10 +995,26 @@ col_left, col_right = st.columns([1.5, 1], gap="small")
 with col_left:
     st.markdown('<div class="panel">', unsafe_allow_html=True)
     st.markdown('<div class="section-header">🗺️ Interactive Map</div>', unsafe_allow_html=True)
-    st.caption("Click on the map to select start (🟢) and end (🔴) points")
-    
-    if st.session_state.route_map:
-        st_folium(st.session_state.route_map, width=None, height=600, returned_objects=[])
+    st.caption(f"Click on the map to select start (🟢) and end (🔴) points · Shared graph: {graph.nbytes/1e6:.1f} MB ({graph.mapped_bytes/1e6:.1f} MB memory-mapped)")
+    
+    if st.session_state.route_key and not reachability:
+        # Zoom reported by the previous render; the route is re-simplified when it changes
+        route_zoom = int(round((st.session_state.get("route_view") or {}).get("zoom") or 14))
+        route_data = st_folium(
+            route_base_map(),
+            feature_group_to_add=visible_route_layers(route_zoom),
+            width=None, height=600, key="route_view", returned_objects=["zoom", "last_clicked"]
+        )
+        
+        # A click on the result map moves the end point and routes again from the same start
+        if route_data and route_data.get('last_clicked'):
+            click_coords = (route_data['last_clicked']['lat'], route_data['last_clicked']['lng'])
+            if st.session_state.prev_click != click_coords:
+                st.session_state.prev_click = click_coords
+                st.session_state.end_point = click_coords
+                st.session_state.route_key = None
+                st.session_state.recalculate = True
+                st.rerun()
     else:
         m = folium.Map(
             location=[center_lat, center_lon],
@@ -815,13 +1032,16 @@ with col_left:
                 icon=folium.Icon(color="green", icon="play")
             ).add_to(m)
         
-        if st.session_state.end_point:
+        if st.session_state.end_point and not reachability:
             folium.Marker(
                 st.session_state.end_point,
                 popup="🔴 End",
                 icon=folium.Icon(color="red", icon="flag")
             ).add_to(m)
         
+        if reachability and st.session_state.isochrone:
+            build_isochrone_layer(st.session_state.isochrone["collection"]).add_to(m)
+        
         m.add_child(folium.LatLngPopup())
         map_data = st_folium(m, width=None, height=600, key="base_map")
         
@@ -829,7 +1049,11 @@ with col_left:
             click_coords = (map_data['last_clicked']['lat'], map_data['last_clicked']['lng'])
             if st.session_state.prev_click != click_coords:
                 st.session_state.prev_click = click_coords
-                if st.session_state.start_point and st.session_state.end_point:
+                if reachability:
+                    # Only the start point matters; a new one invalidates the drawn area
+                    st.session_state.start_point = click_coords
+                    st.session_state.isochrone = None
+                elif st.session_state.start_point and st.session_state.end_point:
                     st.session_state.start_point = click_coords
                     st.session_state.end_point = None
                 elif st.session_state.start_point:
@@ -847,14 +1071,28 @@ with col_right:
     st.markdown('<div class="section-header">🔍 Location Search</div>', unsafe_allow_html=True)
     search_query = st.text_input("🏙️ Search for a location", placeholder="e.g., Railway Station, College", key="search_input")
     
+    # Offline index: suggestions as you type, no network round trip
+    suggestions = places.search(search_query) if places is not None and search_query else []
+    if suggestions:
+        choice = st.selectbox(
+            "📍 Matches",
+            range(len(suggestions)),
+            format_func=lambda i: f"{suggestions[i][0]} · {suggestions[i][3]}"
+        )
+    
     if st.button("🔍 Search Location"):
         if search_query:
             with st.spinner("Searching..."):
-                result = search_location(search_query)
+                if suggestions:
+                    name, lat, lon, kind = suggestions[choice]
+                    result = (lat, lon, f"{name} ({kind})")
+                else:
+                    result = search_location(search_query)
                 if result:
                     lat, lon, address = result
-                    if not st.session_state.start_point:
+                    if not st.session_state.start_point or reachability:
                         st.session_state.start_point = (lat, lon)
+                        st.session_state.isochrone = None
                         st.success(f"✅ Start point set to: {address[:50]}...")
                         st.rerun()
                     elif not st.session_state.end_point:
@@ -886,7 +1124,7 @@ with col_right:
     else:
         st.info("Click on map or search to set start point")
     
-    if st.session_state.end_point:
+    if st.session_state.end_point and not reachability:
         st.markdown(f"""
         <div class="selection-box">
             <div class="selection-icon">🔴</div>
@@ -896,57 +1134,185 @@ with col_right:
             </div>
         </div>
         """, unsafe_allow_html=True)
-    else:
+    elif not reachability:
         st.info("Click on map or search to set end point")
     
-    if st.session_state.start_point and st.session_state.end_point and not st.session_state.route_map:
-        if st.button("🚀 Calculate Route", key="calculate_btn", type="primary"):
+    if reachability and st.session_state.start_point:
+        units = [unit for unit, (weight, _) in ISOCHRONE_UNITS.items() if weight in graph.weights]
+        isochrone_unit = st.radio("📏 Budget unit", units, horizontal=True, key="isochrone_unit")
+        budgets_text = st.text_input(
+            f"🎯 Budgets ({isochrone_unit})",
+            value="1, 2, 5" if isochrone_unit == "km" else "2, 5, 10",
+            key=f"isochrone_budgets_{isochrone_unit}",
+            help="Comma-separated; every band comes from one search bounded by the largest budget"
+        )
+        if st.button("🌐 Show Reachable Area", key="isochrone_btn", type="primary"):
+            try:
+                budgets = parse_budgets(budgets_text)
+                weight, scale = ISOCHRONE_UNITS[isochrone_unit]
+                start_node = snap_points([st.session_state.start_point], st.session_state.snap_to_road)[0]
+                start_time_isochrone = time.perf_counter()
+                collection = isochrones(graph, profile_endpoint(start_node, weight), [b * scale for b in budgets], weight)
+                for feature, color in zip(collection["features"], ISOCHRONE_COLORS[:len(budgets)][::-1]):
+                    feature["properties"]["label"] = f"{feature['properties']['budget'] / scale:g} {isochrone_unit}"
+                    feature["properties"]["color"] = color
+                st.session_state.isochrone = {
+                    "collection": collection,
+                    "time": time.perf_counter() - start_time_isochrone
+                }
+                st.rerun()
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+        
+        result = st.session_state.isochrone
+        if result:
+            bands = " · ".join(f"{f['properties']['label']}: {f['properties']['nodes']:,} nodes, {f['properties']['area_km2']:.2f} km²"
+                               for f in reversed(result["collection"]["features"]))
+            st.caption(f"🌐 {bands} · one bounded search in {result['time']*1000:.0f}ms")
+    
+    if st.session_state.start_point and st.session_state.end_point and not st.session_state.route_key and not reachability:
+        st.session_state.snap_to_road = st.checkbox(
+            "🛣️ Snap to nearest road",
+            value=st.session_state.snap_to_road,
+            help="Start from the closest point on a road instead of the closest intersection"
+        )
+        profiles = [weight for weight in ROUTE_PROFILES if weight in graph.weights]
+        st.session_state.route_profile = st.selectbox(
+            "🚗 Route profile",
+            profiles,
+            index=profiles.index(st.session_state.route_profile) if st.session_state.route_profile in profiles else 0,
+            format_func=ROUTE_PROFILES.get,
+            help="Every profile's edge costs are precomputed, so fastest-route queries cost the same as shortest-route ones"
+        )
+        st.session_state.search_mode = st.selectbox(
+            "🔀 Search mode",
+            list(SEARCH_MODES),
+            index=list(SEARCH_MODES).index(st.session_state.search_mode),
+            help="Bidirectional searches grow from both ends and meet in the middle"
+        )
+        st.session_state.astar_heuristic = st.selectbox(
+            "🧭 A* heuristic",
+            list(A_STAR_HEURISTICS),
+            index=list(A_STAR_HEURISTICS).index(st.session_state.astar_heuristic),
+            help=f"Equirectangular is a cheaper flat-earth bound; ALT bounds distances with the triangle inequality over {len(landmark_table.landmarks)} precomputed landmarks"
+        )
+        st.session_state.trace_memory = st.checkbox(
+            "🧠 Trace peak memory",
+            value=st.session_state.trace_memory,
+            help="Record each search's peak allocation with tracemalloc (makes the timings slower)"
+        )
+        recalculate, st.session_state.recalculate = st.session_state.recalculate, False
+        if st.button("🚀 Calculate Route", key="calculate_btn", type="primary") or recalculate:
             progress_placeholder = st.empty()
             try:
-                start_node = ox.nearest_nodes(G, st.session_state.start_point[1], st.session_state.start_point[0])
-                end_node = ox.nearest_nodes(G, st.session_state.end_point[1], st.session_state.end_point[0])
+                start_node, end_node = snap_points(
+                    [st.session_state.start_point, st.session_state.end_point],
+                    st.session_state.snap_to_road
+                )
+                
+                # Searches run in the chosen profile's units; start_node/end_node stay in metres for display
+                weight = st.session_state.route_profile
+                source, target = profile_endpoint(start_node, weight), profile_endpoint(end_node, weight)
+                
+                mode_name = st.session_state.search_mode
+                heuristic_name = st.session_state.astar_heuristic
+                trace_memory = st.session_state.trace_memory
+                cache_names = {
+                    "dijkstra": f"{mode_name} Dijkstra",
+                    "astar": f"{mode_name} A* ({heuristic_name})",
+                    "ch": "Contraction Hierarchies"
+                }
+                icons = {"dijkstra": "🔵", "astar": "🟢", "ch": "⚡"}
+                status = {algorithm: f"{icons[algorithm]} {ALGORITHM_LABELS[algorithm]}: running..." for algorithm in cache_names}
+                
+                # Serve cached results, and start every other search at once on the worker pool
+                results, pending, keys = {}, {}, {}
+                resume_dijkstra = False
+                for algorithm, cache_name in cache_names.items():
+                    key = keys[algorithm] = route_cache.key(source, target, weight, cache_name, trace_memory)
+                    cached = route_cache.result(key)
+                    if cached is not None:
+                        results[algorithm] = cached
+                        status[algorithm] = f"{icons[algorithm]} {ALGORITHM_LABELS[algorithm]}: cached ✓"
+                    elif algorithm == "dijkstra" and mode_name == "Standard":
+                        # Runs here once the others are submitted, continuing this start point's kept search tree
+                        resume_dijkstra = True
+                    else:
+                        future = search_pool.submit(algorithm, mode_name, heuristic_name, source, target, weight, trace_memory)
+                        pending[future] = (algorithm, key)
+                render_progress(progress_placeholder, status)
+                
+                if resume_dijkstra:
+                    tree = search_trees.tree(source, weight)
+                    resumed = len(tree) > 0
+                    (path, explored_count, explored_list), tree_stats = measure(
+                        tree.path_with_explored_nodes, target,
+                        algorithm=ALGORITHM_LABELS["dijkstra"], trace_memory=trace_memory
+                    )
+                    stats = {**tree_stats.as_dict(), "resumed": resumed}
+                    route_cache.put(keys["dijkstra"], path, explored_list, stats)
+                    results["dijkstra"] = (path, explored_count, explored_list, stats, False)
+                    status["dijkstra"] = (f"{icons['dijkstra']} {ALGORITHM_LABELS['dijkstra']}: "
+                                          f"{'resumed' if resumed else 'done'} in {stats['elapsed_ns']/1e6:.1f}ms "
+                                          f"({stats['nodes_settled']:,} new nodes) ✓")
+                    render_progress(progress_placeholder, status)
+                
+                for future in as_completed(pending):
+                    algorithm, key = pending[future]
+                    (path, explored_count, explored_list), stats = future.result()
+                    route_cache.put(key, path, explored_list, stats)
+                    results[algorithm] = (path, explored_count, explored_list, stats, False)
+                    status[algorithm] = (f"{icons[algorithm]} {ALGORITHM_LABELS[algorithm]}: done in "
+                                         f"{stats['elapsed_ns']/1e6:.1f}ms ({explored_count:,} nodes) ✓")
+                    render_progress(progress_placeholder, status)
                 
-                progress_placeholder.markdown('<div class="progress-container"><div class="progress-text">🔵 Running Dijkstra\'s Algorithm...</div></div>', unsafe_allow_html=True)
-                start_time_dijkstra = time.time()
-                dijkstra_path, dijkstra_explored_count, dijkstra_explored_list = dijkstra_path_with_explored_nodes(G, start_node, end_node, weight='length')
-                end_time_dijkstra = time.time()
-                st.session_state.calculation_time_dijkstra = end_time_dijkstra - start_time_dijkstra
+                dijkstra_path, dijkstra_explored_count, dijkstra_explored_list, dijkstra_stats, dijkstra_hit = results["dijkstra"]
+                st.session_state.calculation_time_dijkstra = dijkstra_stats["elapsed_ns"] / 1e9
                 st.session_state.nodes_explored_dijkstra = dijkstra_explored_count
-                st.session_state.dijkstra_explored_list = dijkstra_explored_list
+                st.session_state.dijkstra_explored = pack_nodes(dijkstra_explored_list)
                 
-                progress_placeholder.markdown('<div class="progress-container"><div class="progress-text">🟢 Running A* Algorithm...</div></div>', unsafe_allow_html=True)
-                start_time_astar = time.time()
-                astar_path, astar_explored_count, astar_explored_list = astar_path_with_explored_nodes(G, start_node, end_node, heuristic=haversine_distance, weight='length')
-                end_time_astar = time.time()
-                st.session_state.calculation_time_astar = end_time_astar - start_time_astar
+                astar_path, astar_explored_count, astar_explored_list, astar_stats, astar_hit = results["astar"]
+                st.session_state.calculation_time_astar = astar_stats["elapsed_ns"] / 1e9
                 st.session_state.nodes_explored_astar = astar_explored_count
-                st.session_state.astar_explored_list = astar_explored_list
+                st.session_state.astar_explored = pack_nodes(astar_explored_list)
                 
-                st.session_state.route_path = astar_path
+                st.session_state.route_path = np.asarray(astar_path, dtype=np.int32)
+                
+                ch_path, ch_explored_count, _, ch_search_stats, ch_hit = results["ch"]
+                st.session_state.telemetry = {
+                    "dijkstra": {**dijkstra_stats, "cached": dijkstra_hit},
+                    "astar": {**astar_stats, "cached": astar_hit},
+                    "contraction_hierarchies": {**ch_search_stats, "cached": ch_hit},
+                    "memory_traced": trace_memory,
+                    "route_cache": route_cache.stats(),
+                    "search_trees": search_trees.stats(),
+                    "session_memory": {"bytes": session_result_bytes(), "budget": SESSION_BUDGET_BYTES}
+                }
+                st.session_state.ch_stats = {
+                    "time": ch_search_stats["elapsed_ns"] / 1e9,
+                    "nodes": ch_explored_count,
+                    # Reported by the worker that holds the hierarchy (absent from results cached before)
+                    "shortcuts": ch_search_stats.get("shortcuts"),
+                    "preprocessing_seconds": ch_search_stats.get("preprocessing_seconds"),
+                    "same_path": abs(route_cost(ch_path, source, target, weight) - route_cost(dijkstra_path, source, target, weight)) < 1e-6
+                }
                 
                 # Calculate path length correctly including connections to start/end points
                 path_length = 0
                 
-                # Add distance from clicked start point to nearest node
-                start_node_coords = (G.nodes[start_node]['y'], G.nodes[start_node]['x'])
+                # Add distance from clicked start point to where it meets the road
+                start_node_coords = snap_anchor(start_node)
                 start_connection_dist = haversine_distance_coords(
                     st.session_state.start_point[0], st.session_state.start_point[1],
                     start_node_coords[0], start_node_coords[1]
                 )
                 path_length += start_connection_dist
                 
-                # Add main route distance
-                for i in range(len(astar_path)-1):
-                    edge_data = G[astar_path[i]][astar_path[i+1]]
-                    if isinstance(edge_data, dict):
-                        # MultiGraph - get first edge
-                        path_length += list(edge_data.values())[0].get('length', 0)
-                    else:
-                        # Simple graph
-                        path_length += edge_data.get('length', 0)
+                # Add main route distance, including partial edges from/to snapped mid-edge points
+                path_length += route_cost(astar_path, start_node, end_node)
                 
-                # Add distance from nearest node to clicked end point
-                end_node_coords = (G.nodes[end_node]['y'], G.nodes[end_node]['x'])
+                # Add distance from the road to clicked end point
+                end_node_coords = snap_anchor(end_node)
                 end_connection_dist = haversine_distance_coords(
                     end_node_coords[0], end_node_coords[1],
                     st.session_state.end_point[0], st.session_state.end_point[1]
@@ -954,11 +1320,17 @@ with col_right:
                 path_length += end_connection_dist
                 
                 st.session_state.path_length = f"{path_length/1000:.2f} km"
+                if "travel_time" in graph.weights:
+                    travel_time = route_cost(astar_path, profile_endpoint(start_node, "travel_time"),
+                                             profile_endpoint(end_node, "travel_time"), "travel_time")
+                    st.session_state.path_length += f" · {travel_time/60:.0f} min"
                 st.session_state.start_node = start_node
                 st.session_state.end_node = end_node
                 
-                progress_placeholder.markdown('<div class="progress-container"><div class="progress-text">🗺️ Rendering map...</div></div>', unsafe_allow_html=True)
-                rebuild_map()
+                # Identifies this result's map layers; the layers themselves are rebuilt on demand
+                st.session_state.route_key = hashlib.sha1("|".join(
+                    [repr(st.session_state.start_point), repr(st.session_state.end_point), keys["dijkstra"], keys["astar"]]
+                ).encode("utf-8")).hexdigest()
                 
                 progress_placeholder.empty()
                 st.rerun()
@@ -982,15 +1354,78 @@ with col_right:
         - More efficient for point-to-point routing
         """)
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    # --- Distance Matrix Panel ---
+    st.markdown('<div class="panel">', unsafe_allow_html=True)
+    with st.expander("🧮 Distance Matrix", expanded=False):
+        st.markdown('<div class="tooltip-help">💡 One <code>lat, lon</code> or <code>label, lat, lon</code> per line</div>', unsafe_allow_html=True)
+        depots_text = st.text_area("🏭 Depots", placeholder="Depot A, 19.0948, 74.7480", key="matrix_depots")
+        stops_text = st.text_area("📦 Stops", placeholder="19.0812, 74.7391", key="matrix_stops")
+        matrix_profiles = [weight for weight in ROUTE_PROFILES if weight in graph.weights]
+        matrix_weight = st.selectbox(
+            "🚗 Matrix profile",
+            matrix_profiles,
+            index=matrix_profiles.index(st.session_state.route_profile) if st.session_state.route_profile in matrix_profiles else 0,
+            format_func=ROUTE_PROFILES.get,
+            key="matrix_profile"
+        )
+        if st.button("🧮 Compute Matrix", key="matrix_btn"):
+            try:
+                depot_labels, depots = parse_points(depots_text)
+                stop_labels, stops = parse_points(stops_text)
+                if not depots or not stops:
+                    st.warning("Please enter at least one depot and one stop.")
+                else:
+                    with st.spinner(f"Computing {len(depots)}×{len(stops)} road distances..."):
+                        start_time_matrix = time.perf_counter()
+                        matrix = point_matrix(
+                            graph, spatial_index, depots, stops,
+                            to_road=st.session_state.snap_to_road,
+                            weight=matrix_weight,
+                            processes=None if len(depots) >= MATRIX_PARALLEL_ROWS else 1,
+                            pool=search_pool
+                        )
+                    st.session_state.distance_matrix = {
+                        "matrix": matrix,
+                        "weight": matrix_weight,
+                        "depots": depot_labels,
+                        "stops": stop_labels,
+                        "time": time.perf_counter() - start_time_matrix
+                    }
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+        
+        result = st.session_state.distance_matrix
+        if result:
+            unit, scale = MATRIX_UNITS.get(result["weight"], ("", 1))
+            st.caption(f"{ROUTE_PROFILES.get(result['weight'], result['weight'])} in {unit} · {result['matrix'].size:,} pairs in {result['time']*1000:.0f}ms · empty cells are unreachable")
+            st.dataframe(matrix_frame(result["matrix"] / scale, result["depots"], result["stops"]).round(2), use_container_width=True)
+            matrix_col1, matrix_col2 = st.columns(2)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            with matrix_col1:
+                st.download_button(
+                    label="📥 Download CSV",
+                    data=matrix_csv(result["matrix"], result["depots"], result["stops"]),
+                    file_name=f"distance_matrix_{stamp}.csv",
+                    mime="text/csv"
+                )
+            with matrix_col2:
+                st.download_button(
+                    label="📥 Download Parquet",
+                    data=matrix_parquet(result["matrix"], result["depots"], result["stops"]),
+                    file_name=f"distance_matrix_{stamp}.parquet",
+                    mime="application/octet-stream"
+                )
+    st.markdown('</div>', unsafe_allow_html=True)
 
 # ========== FULL WIDTH RESULTS PANEL ==========
-if st.session_state.route_map:
+if st.session_state.route_key and not reachability:
     # --- Visualization Controls Panel ---
     st.markdown('<div class="panel">', unsafe_allow_html=True)
     viz_col, button_col = st.columns([2, 1])
     with viz_col:
         st.markdown('<div class="section-header">🎛️ Visualization Controls</div>', unsafe_allow_html=True)
-        st.markdown('<div class="tooltip-help">💡 Toggle explored nodes visualization (slows map)</div>', unsafe_allow_html=True)
+        st.markdown('<div class="tooltip-help">💡 Toggle explored nodes heatmap (every settled node)</div>', unsafe_allow_html=True)
         
         col_toggle1, col_toggle2 = st.columns(2)
         with col_toggle1:
@@ -1001,21 +1436,44 @@ if st.session_state.route_map:
         if show_dijkstra_new != st.session_state.show_dijkstra_nodes or show_astar_new != st.session_state.show_astar_nodes:
             st.session_state.show_dijkstra_nodes = show_dijkstra_new
             st.session_state.show_astar_nodes = show_astar_new
-            rebuild_map()
             st.rerun()
+        
+        st.session_state.animate_route = st.checkbox(
+            "🎬 Animate search",
+            value=st.session_state.animate_route,
+            help="Replay a search frame by frame as it settles nodes"
+        )
     
     with button_col:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("🔄 Clear & Search Again", key="clear_btn"):
-            for k in ["start_point", "end_point", "route_map", "prev_click", 
+            for k in ["start_point", "end_point", "route_key", "prev_click", 
                       "nodes_explored_dijkstra", "nodes_explored_astar", "path_length",
-                      "dijkstra_explored_list", "astar_explored_list", "route_path"]:
+                      "dijkstra_explored", "astar_explored", "route_path", "ch_stats", "telemetry"]:
                 st.session_state[k] = None
             st.session_state.show_dijkstra_nodes = False
             st.session_state.show_astar_nodes = False
             st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # --- Search Playback Panel ---
+    if st.session_state.animate_route:
+        st.markdown('<div class="panel">', unsafe_allow_html=True)
+        st.markdown('<div class="section-header">🎬 Search Playback</div>', unsafe_allow_html=True)
+        play_col, algorithm_col = st.columns([1, 2])
+        with algorithm_col:
+            playback_algorithm = st.radio("Algorithm", ["Dijkstra", "A*"], horizontal=True, label_visibility="collapsed")
+        playback_placeholder = st.empty()
+        with play_col:
+            play = st.button("▶️ Play", key="play_btn")
+        if play:
+            explored = play_search(playback_placeholder, playback_algorithm)
+            st.caption(
+                f"{playback_algorithm} settled {explored:,} nodes in {st.session_state.animation_step} frames "
+                f"(unidirectional; heatmap = settled, 🟡 = frontier)"
+            )
+        st.markdown('</div>', unsafe_allow_html=True)
+    
     # --- Performance Comparison Panel ---
     st.markdown('<div class="panel">', unsafe_allow_html=True)
     st.markdown('<div class="section-header">📊 Algorithm Performance Comparison</div>', unsafe_allow_html=True)
@@ -1044,10 +1502,14 @@ if st.session_state.route_map:
             delta=f"{(time_saved/st.session_state.calculation_time_dijkstra*100):.0f}% faster" if (time_saved > 0 and st.session_state.calculation_time_dijkstra > 0) else "Similar"
         )
     
+    mode_prefix = "" if st.session_state.search_mode == "Standard" else f"{st.session_state.search_mode} "
+    telemetry = st.session_state.telemetry
+    dijkstra_cached = " (cached)" if telemetry["dijkstra"]["cached"] else " (resumed tree)" if telemetry["dijkstra"].get("resumed") else ""
+    astar_cached = " (cached)" if telemetry["astar"]["cached"] else ""
     col_algo1, col_algo2 = st.columns(2)
     
     with col_algo1:
-        st.markdown('<div class="comparison-badge badge-dijkstra">🔵 Dijkstra\'s Algorithm</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="comparison-badge badge-dijkstra">🔵 {mode_prefix}Dijkstra\'s Algorithm</div>', unsafe_allow_html=True)
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-value">{st.session_state.nodes_explored_dijkstra:,}</div>
@@ -1057,12 +1519,13 @@ if st.session_state.route_map:
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-value">{st.session_state.calculation_time_dijkstra*1000:.1f}ms</div>
-            <div class="stat-label">Computation Time</div>
+            <div class="stat-label">Computation Time{dijkstra_cached}</div>
         </div>
         """, unsafe_allow_html=True)
     
     with col_algo2:
-        st.markdown('<div class="comparison-badge badge-astar">🟢 A* Algorithm</div>', unsafe_allow_html=True)
+        astar_suffix = "" if st.session_state.astar_heuristic == "Haversine" else f" ({st.session_state.astar_heuristic})"
+        st.markdown(f'<div class="comparison-badge badge-astar">🟢 {mode_prefix}A* Algorithm{astar_suffix}</div>', unsafe_allow_html=True)
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-value">{st.session_state.nodes_explored_astar:,}</div>
@@ -1072,12 +1535,22 @@ if st.session_state.route_map:
         st.markdown(f"""
         <div class="stat-card">
             <div class="stat-value">{st.session_state.calculation_time_astar*1000:.1f}ms</div>
-            <div class="stat-label">Computation Time</div>
+            <div class="stat-label">Computation Time{astar_cached}</div>
         </div>
         """, unsafe_allow_html=True)
     
     st.markdown(f'<div class="efficiency-badge">A* explored {efficiency:.1f}% fewer nodes! 🎯</div>', unsafe_allow_html=True)
     
+    ch_stats = st.session_state.ch_stats
+    if ch_stats:
+        ch_speedup = st.session_state.calculation_time_dijkstra / ch_stats["time"] if ch_stats["time"] > 0 else 0
+        st.caption(
+            f"⚡ Contraction Hierarchies: {ch_stats['time']*1000:.2f}ms, {ch_stats['nodes']:,} nodes settled, "
+            f"{ch_speedup:.0f}× faster than Dijkstra {'(same distance ✓)' if ch_stats['same_path'] else '(distance differs ⚠️)'}"
+            + (f" · {ch_stats['shortcuts']:,} shortcuts, preprocessed in {ch_stats['preprocessing_seconds']:.0f}s"
+               if ch_stats.get("shortcuts") is not None else "")
+        )
+    
     st.markdown('<div class="section-header">📈 Interactive Performance Charts</div>', unsafe_allow_html=True)
     
     chart_col1, chart_col2 = st.columns(2)
@@ -1110,13 +1583,51 @@ if st.session_state.route_map:
         )
         st.plotly_chart(fig_time, use_container_width=True)
     
+    if telemetry:
+        counters = {
+            "Edges Relaxed": "edges_relaxed",
+            "Heap Pushes": "heap_pushes",
+            "Heap Pops": "heap_pops",
+            "Stale Pops": "stale_pops",
+            "Peak Queue": "peak_queue"
+        }
+        runs = [("dijkstra", "Dijkstra", '#4285F4'), ("astar", "A*", '#34A853'),
+                ("contraction_hierarchies", "CH", '#FBBC05')]
+        fig_breakdown = go.Figure(data=[
+            go.Bar(name=label, x=list(counters), y=[telemetry[key][field] for field in counters.values()], marker_color=color)
+            for key, label, color in runs
+        ])
+        fig_breakdown.update_layout(
+            title="Search Work Breakdown",
+            barmode="group",
+            height=300,
+            margin=dict(l=20, r=20, t=40, b=20),
+            showlegend=True,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_breakdown, use_container_width=True)
+        if telemetry["memory_traced"]:
+            st.caption(" · ".join(
+                f"{telemetry[key]['algorithm']}: {telemetry[key]['peak_bytes']/1024:.0f} KB peak" for key, _, _ in runs
+            ) + " (tracemalloc; timings include tracing overhead)")
+        cache_stats = telemetry["route_cache"]
+        st.caption(
+            f"🗃️ Route cache: {cache_stats['hit_rate']*100:.0f}% hit rate ({cache_stats['hits']:,} hits, "
+            f"{cache_stats['misses']:,} misses) · {cache_stats['entries']:,} routes, {cache_stats['bytes']/1e6:.1f} MB"
+        )
+        session_memory = telemetry["session_memory"]
+        st.caption(
+            f"💾 This session's result: {session_memory['bytes']/1024:.0f} KB of {session_memory['budget']/1024:.0f} KB budget "
+            f"({'within budget ✓' if session_memory['bytes'] <= session_memory['budget'] else 'over budget ⚠️'})"
+        )
+    
     st.markdown('<div class="section-header">💾 Export & Share</div>', unsafe_allow_html=True)
     
     export_col1, export_col2, export_col3 = st.columns(3)
     
     with export_col1:
-        if st.session_state.route_path:
-            gpx_data = create_gpx_file(st.session_state.route_path, G)
+        if st.session_state.route_path is not None:
+            gpx_data = create_gpx_file(route_latlngs())
             st.download_button(
                 label="📥 Download GPX",
                 data=gpx_data,
@@ -1131,11 +1642,18 @@ if st.session_state.route_map:
     with export_col3:
         stats_json = {
             "distance": st.session_state.path_length,
+            "route_profile": st.session_state.route_profile,
+            "search_mode": st.session_state.search_mode,
+            "astar_heuristic": st.session_state.astar_heuristic,
             "dijkstra_nodes": st.session_state.nodes_explored_dijkstra,
             "astar_nodes": st.session_state.nodes_explored_astar,
             "efficiency": f"{efficiency:.1f}%",
             "time_dijkstra": f"{st.session_state.calculation_time_dijkstra*1000:.1f}ms",
-            "time_astar": f"{st.session_state.calculation_time_astar*1000:.1f}ms"
+            "time_astar": f"{st.session_state.calculation_time_astar*1000:.1f}ms",
+            "contraction_hierarchies": st.session_state.ch_stats,
+            "telemetry": st.session_state.telemetry,
+            "graph_bytes": graph.nbytes,
+            "graph_mapped_bytes": graph.mapped_bytes
         }
         st.download_button(
             label="📊 Download Stats",
@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+from graph_engine import load_snapshot, graph_fingerprint
+from search import (
+    dijkstra_path_with_explored_nodes, astar_path_with_explored_nodes,
+    bidirectional_dijkstra_path_with_explored_nodes, bidirectional_astar_path_with_explored_nodes,
+    haversine_heuristic, equirectangular_heuristic, shortest_path_tree,
+)
+from telemetry import measure
+from landmarks import LandmarkTable
+from contraction import ContractionHierarchy, profile_path
+
+REFERENCE = "Dijkstra"
+PERCENTILES = (50, 90, 99)
+
+
+# ---------- ALGORITHMS ----------
+def algorithm_suite(graph, landmark_table=None, hierarchy=None, weight="length"):
+    """Name -> run(source, target) returning ((path, count, explored), SearchStats)"""
+    def kernel(fn, make_heuristic=None):
+        def run(source, target):
+            kwargs = {"heuristic": make_heuristic(source, target)} if make_heuristic else {}
+            return measure(fn, graph, source, target, weight=weight, **kwargs)
+        return run
+
+    haversine = lambda s, t: haversine_heuristic(graph, s, t, weight)
+    suite = {
+        REFERENCE: kernel(dijkstra_path_with_explored_nodes),
+        "A* (Haversine)": kernel(astar_path_with_explored_nodes, haversine),
+        "A* (Equirectangular)": kernel(astar_path_with_explored_nodes, lambda s, t: equirectangular_heuristic(graph, s, t, weight=weight)),
+        "Bidirectional Dijkstra": kernel(bidirectional_dijkstra_path_with_explored_nodes),
+        "Bidirectional A* (Haversine)": kernel(bidirectional_astar_path_with_explored_nodes, haversine),
+    }
+    if landmark_table is not None:
+        alt = lambda s, t: landmark_table.heuristic(s, t, graph, weight)
+        suite["A* (ALT)"] = kernel(astar_path_with_explored_nodes, alt)
+        suite["Bidirectional A* (ALT)"] = kernel(bidirectional_astar_path_with_explored_nodes, alt)
+    if hierarchy is not None:
+        if hierarchy.weight != weight:
+            raise ValueError(f"The Contraction Hierarchy was built for {hierarchy.weight!r}, not {weight!r}")
+        suite["Contraction Hierarchies"] = lambda s, t: measure(hierarchy.path_with_explored_nodes, s, t)
+    return suite
+
+
+# ---------- ORIGIN-DESTINATION PAIRS ----------
+def rank_pairs(graph, sources=20, random_pairs=100, seed=0, min_rank_exp=4, weight="length"):
+    """Seeded O-D pairs as (bin, source, target).
+
+    For each random source, the node settled 2^k-th by a full Dijkstra is the
+    target for bin "2^k", so every bin holds queries of comparable search
+    difficulty (Sanders & Schultes' Dijkstra rank). Uniform random pairs are
+    added under bin "random".
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.n_nodes
+    pairs = []
+    for _ in range(sources):
+        source = int(rng.integers(n))
+        order = shortest_path_tree(graph, source, weight)[2]
+        k = min_rank_exp
+        while 2 ** k < len(order):
+            pairs.append((f"2^{k}", source, int(order[2 ** k])))
+            k += 1
+    for _ in range(random_pairs):
+        source, target = (int(x) for x in rng.integers(n, size=2))
+        pairs.append(("random", source, target))
+    return pairs
+
+
+def run_pairs(graph, suite, pairs, weight="length"):
+    """Run every algorithm on every pair; returns one record per (pair, algorithm)"""
+    records = []
+    for bin_label, source, target in pairs:
+        try:
+            (reference_path, _, _), _ = suite[REFERENCE](source, target)
+        except nx.NetworkXNoPath:
+            continue
+        reference_cost = graph.path_length(reference_path, weight)
+        for name, run in suite.items():
+            (path, explored, _), stats = run(source, target)
+            cost = graph.path_length(path, weight)
+            records.append({
+                "bin": bin_label,
+                "source": source,
+                "target": target,
+                "algorithm": name,
+                "elapsed_ns": stats.elapsed_ns,
+                "nodes_explored": explored,
+                "edges_relaxed": stats.edges_relaxed,
+                "cost": cost,
+                "same_cost": abs(cost - reference_cost) <= 1e-6 * max(reference_cost, 1.0),
+                "same_path": path == reference_path,
+            })
+    return records
+
+
+# ---------- PARALLEL RUNNER ----------
+# Workers attach to the snapshot files by memory-mapping them, so every
+# process reads the same page-cache copy of the graph arrays instead of
+# unpickling its own graph; only the per-process list mirrors are private.
+_worker = {}
+
+
+def load_suite(graph_path, landmarks_path=None, ch_path=None, weight="length"):
+    """Load the graph and optional preprocessing, returning (graph, suite).
+
+    ``ch_path`` names the length-profile hierarchy; other profiles read their
+    own file next to it (see contraction.profile_path). Preprocessing files
+    built for a different graph or profile raise ValueError.
+    """
+    graph = load_snapshot(graph_path)
+    fingerprint = graph_fingerprint(graph)
+    landmark_table = hierarchy = None
+    if landmarks_path and os.path.exists(landmarks_path):
+        landmark_table = LandmarkTable.load(landmarks_path)
+        if landmark_table.graph_fingerprint != fingerprint:
+            raise ValueError(f"{landmarks_path} was not built for {graph_path}; rerun get_data.py")
+    ch_path = profile_path(ch_path, weight) if ch_path else None
+    if ch_path and os.path.exists(ch_path):
+        hierarchy = ContractionHierarchy.load(ch_path)
+        if hierarchy.graph_fingerprint != fingerprint:
+            raise ValueError(f"{ch_path} was not built for {graph_path}; rerun get_data.py")
+    return graph, algorithm_suite(graph, landmark_table, hierarchy, weight)
+
+
+def _init_worker(graph_path, landmarks_path, ch_path, weight):
+    graph, suite = load_suite(graph_path, landmarks_path, ch_path, weight)
+    graph.adjacency_lists(weight)
+    graph.reverse_adjacency_lists(weight)
+    _worker.update(graph=graph, suite=suite, weight=weight)
+
+
+def _worker_run(pairs):
+    return run_pairs(_worker["graph"], _worker["suite"], pairs, _worker["weight"])
+
+
+def run_pairs_parallel(paths, pairs, workers, chunk_size=None, weight="length"):
+    """run_pairs across a process pool; records come back in pair order.
+
+    ``paths`` is (graph, landmarks, ch). Pairs are cut into contiguous chunks
+    and results are concatenated in submission order, so the merged record
+    list is identical in order (not in timings) to a serial run.
+    """
+    chunk_size = chunk_size or max(1, len(pairs) // (workers * 8))
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(*paths, weight)) as pool:
+        return [record for records in pool.map(_worker_run, chunks) for record in records]
+
+
+def scaling_report(paths, pairs, worker_counts, weight="length"):
+    """Throughput (queries/sec) for each worker count over the same pairs.
+
+    Wall time includes pool start-up: attaching to the snapshot and building
+    each worker's adjacency mirrors.
+    """
+    rows = []
+    for workers in worker_counts:
+        started = time.perf_counter()
+        records = run_pairs_parallel(paths, pairs, workers, weight=weight)
+        wall = time.perf_counter() - started
+        rows.append({"workers": workers, "queries": len(records), "wall_s": wall,
+                     "queries_per_s": len(records) / wall})
+    base = rows[0]["queries_per_s"] / rows[0]["workers"]
+    for row in rows:
+        row["speedup"] = row["queries_per_s"] / rows[0]["queries_per_s"]
+        row["efficiency"] = row["queries_per_s"] / (base * row["workers"])
+    return rows
+
+
+# ---------- SUMMARY ----------
+def _bin_order(label):
+    return float("inf") if label == "random" else int(label.split("^")[1])
+
+
+def summarize(records):
+    """Per algorithm and bin: latency percentiles, nodes explored and path checks"""
+    reference_nodes = {(r["source"], r["target"]): r["nodes_explored"]
+                       for r in records if r["algorithm"] == REFERENCE}
+    groups = {}
+    for r in records:
+        groups.setdefault(r["algorithm"], {}).setdefault("all", []).append(r)
+        groups[r["algorithm"]].setdefault(r["bin"], []).append(r)
+
+    summary = {}
+    for algorithm, bins in groups.items():
+        summary[algorithm] = {}
+        for bin_label in sorted(bins, key=lambda b: -1 if b == "all" else _bin_order(b)):
+            rows = bins[bin_label]
+            latency_ms = np.array([r["elapsed_ns"] for r in rows]) / 1e6
+            nodes = np.array([r["nodes_explored"] for r in rows])
+            baseline = np.array([reference_nodes[(r["source"], r["target"])] for r in rows])
+            reduction = 1 - nodes / np.maximum(baseline, 1)
+            summary[algorithm][bin_label] = {
+                "queries": len(rows),
+                **{f"p{p}_ms": float(np.percentile(latency_ms, p)) for p in PERCENTILES},
+                "mean_nodes": float(nodes.mean()),
+                "median_node_reduction": float(np.median(reduction)),
+                "same_cost": int(sum(r["same_cost"] for r in rows)),
+                "same_path": int(sum(r["same_path"] for r in rows)),
+            }
+    return summary
+
+
+def markdown_report(summary, meta):
+    lines = [
+        f"# Routing benchmark ({meta['graph']})",
+        "",
+        f"{meta['nodes']:,} nodes, {meta['arcs']:,} arcs · seed {meta['seed']} · "
+        f"{meta['pairs']:,} O-D pairs ({meta['sources']} rank sources, {meta['random_pairs']} random) · "
+        f"weight {meta.get('weight', 'length')}",
+        "",
+        "## All queries",
+        "",
+        "| Algorithm | Queries | p50 (ms) | p90 (ms) | p99 (ms) | Mean nodes | Median node reduction | Same cost | Same path |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for algorithm, bins in summary.items():
+        row = bins["all"]
+        lines.append(
+            f"| {algorithm} | {row['queries']:,} | {row['p50_ms']:.2f} | {row['p90_ms']:.2f} | {row['p99_ms']:.2f} | "
+            f"{row['mean_nodes']:,.0f} | {row['median_node_reduction']*100:.1f}% | "
+            f"{row['same_cost']}/{row['queries']} | {row['same_path']}/{row['queries']} |"
+        )
+    bin_labels = [b for b in next(iter(summary.values())) if b != "all"]
+    lines += [
+        "",
+        "## Median node reduction vs Dijkstra by Dijkstra rank",
+        "",
+        "| Algorithm | " + " | ".join(bin_labels) + " |",
+        "|---|" + "---:|" * len(bin_labels),
+    ]
+    for algorithm, bins in summary.items():
+        cells = [f"{bins[b]['median_node_reduction']*100:.0f}%" if b in bins else "–" for b in bin_labels]
+        lines.append(f"| {algorithm} | " + " | ".join(cells) + " |")
+    lines += [
+        "",
+        "## p50 latency (ms) by Dijkstra rank",
+        "",
+        "| Algorithm | " + " | ".join(bin_labels) + " |",
+        "|---|" + "---:|" * len(bin_labels),
+    ]
+    for algorithm, bins in summary.items():
+        cells = [f"{bins[b]['p50_ms']:.2f}" if b in bins else "–" for b in bin_labels]
+        lines.append(f"| {algorithm} | " + " | ".join(cells) + " |")
+    if meta.get("scaling"):
+        lines += [
+            "",
+            "## Scaling",
+            "",
+            "| Workers | Queries | Wall (s) | Queries/s | Speedup | Efficiency |",
+            "|---:|---:|---:|---:|---:|---:|",
+        ]
+        for row in meta["scaling"]:
+            lines.append(f"| {row['workers']} | {row['queries']:,} | {row['wall_s']:.2f} | {row['queries_per_s']:,.0f} | "
+                         f"{row['speedup']:.2f}× | {row['efficiency']*100:.0f}% |")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the routing algorithms outside Streamlit")
+    parser.add_argument("--graph", default="ahmednagar.graph", help="graph snapshot written by get_data.py")
+    parser.add_argument("--landmarks", default="ahmednagar.landmarks", help="ALT tables (skipped if missing)")
+    parser.add_argument("--ch", default="ahmednagar.ch",
+                        help="Contraction Hierarchy; other weights read <name>.<weight>.ch (skipped if missing)")
+    parser.add_argument("--sources", type=int, default=20, help="random sources for the rank-binned pairs")
+    parser.add_argument("--random-pairs", type=int, default=100, help="extra uniform random O-D pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weight", default="length", help="cost profile: length, travel_time or prefer_highways")
+    parser.add_argument("--workers", type=int, default=1, help="process-pool size (1 runs in-process)")
+    parser.add_argument("--scaling", default="", help="comma-separated worker counts to measure throughput for, e.g. 1,2,4,8")
+    parser.add_argument("--json", default="benchmark.json", help="where to write the full results")
+    parser.add_argument("--markdown", default="benchmark.md", help="where to write the summary tables")
+    args = parser.parse_args(argv)
+
+    paths = (args.graph, args.landmarks, args.ch)
+    try:
+        graph, suite = load_suite(*paths, weight=args.weight)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"⏳ Generating O-D pairs on {graph.n_nodes:,} nodes (seed {args.seed})...", file=sys.stderr)
+    pairs = rank_pairs(graph, args.sources, args.random_pairs, args.seed, weight=args.weight)
+    print(f"⏳ Running {len(pairs):,} pairs × {len(suite)} algorithms on {args.workers} worker(s)...", file=sys.stderr)
+    if args.workers > 1:
+        records = run_pairs_parallel(paths, pairs, args.workers, weight=args.weight)
+    else:
+        records = run_pairs(graph, suite, pairs, args.weight)
+    summary = summarize(records)
+
+    meta = {"graph": args.graph, "nodes": graph.n_nodes, "arcs": graph.n_arcs, "seed": args.seed,
+            "pairs": len(pairs), "sources": args.sources, "random_pairs": args.random_pairs,
+            "algorithms": list(suite), "workers": args.workers, "weight": args.weight}
+    if args.scaling:
+        worker_counts = [int(count) for count in args.scaling.split(",")]
+        print(f"⏳ Measuring throughput for {worker_counts} workers...", file=sys.stderr)
+        meta["scaling"] = scaling_report(paths, pairs, worker_counts, args.weight)
+    with open(args.json, "w") as f:
+        json.dump({"meta": meta, "summary": summary, "records": records}, f, indent=2)
+    report = markdown_report(summary, meta)
+    with open(args.markdown, "w") as f:
+        f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
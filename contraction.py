@@ -0,0 +1,343 @@
+import os
+import time
+from heapq import heappush, heappop
+
+import networkx as nx
+import numpy as np
+
+from graph_engine import write_arrays, read_arrays, graph_fingerprint
+from search import dijkstra_path_with_explored_nodes, endpoint_departures, endpoint_arrivals, endpoint_direct
+
+
+# ---------- CONTRACTION HIERARCHIES ----------
+class ContractionHierarchy:
+    """Contraction Hierarchy over a CompiledGraph.
+
+    Nodes are contracted in ``rank`` order. ``up_*`` is a CSR of arcs leading
+    to higher-ranked nodes (searched forward from the source); ``down_*``
+    lists, for each node, the arcs *entering* it from higher-ranked nodes
+    (searched backward from the target). ``*_mid`` is the contracted middle
+    node of a shortcut, or -1 for an original road arc.
+    """
+
+    def __init__(self, rank, up_indptr, up_indices, up_cost, up_mid,
+                 down_indptr, down_indices, down_cost, down_mid, meta):
+        self.rank = rank
+        self.up = (up_indptr, up_indices, up_cost, up_mid)
+        self.down = (down_indptr, down_indices, down_cost, down_mid)
+        self.weight = meta["weight"]
+        self.preprocessing_seconds = meta["preprocessing_seconds"]
+        self.shortcuts = meta["shortcuts"]
+        # Fingerprint of the graph that was contracted (None in older files)
+        self.graph_fingerprint = meta.get("graph_fingerprint")
+        self._up_lists = tuple(a.tolist() for a in self.up)
+        self._down_lists = tuple(a.tolist() for a in self.down)
+        self._rank = rank.tolist()
+
+    @property
+    def n_arcs(self):
+        return len(self.up[1]) + len(self.down[1])
+
+    # --- query ---
+    def path_with_explored_nodes(self, source, target, stats=None):
+        """Bidirectional upward search; same (path, explored_count, explored_list) shape
+        as search.dijkstra_path_with_explored_nodes, with shortcuts unpacked."""
+        graph_lists = (self._up_lists, self._down_lists)
+        dist = ({}, {})
+        parent = ({}, {})
+        settled = (set(), set())
+        queues = ([], [])
+        seeds = (endpoint_departures(source), endpoint_arrivals(target).items())
+        for side in (0, 1):
+            for node, cost in seeds[side]:
+                if cost < dist[side].get(node, float("inf")):
+                    dist[side][node] = cost
+                    parent[side][node] = (-1, -1)
+                    heappush(queues[side], (cost, node))
+
+        best, meet = endpoint_direct(source, target), -1
+        explored_nodes_list = []
+        tracking = stats is not None
+        pops = stale = peak = discarded = relaxed = 0
+        side = 0
+        while queues[0] or queues[1]:
+            if not queues[side]:
+                side = 1 - side
+            if tracking:
+                pops += 1
+                peak = max(peak, len(queues[0]) + len(queues[1]))
+            d, u = heappop(queues[side])
+            if d >= best:
+                # Nothing left on this side can improve the meeting point.
+                discarded += len(queues[side])
+                queues[side].clear()
+                side = 1 - side
+                continue
+            if u in settled[side]:
+                stale += 1
+                continue
+            settled[side].add(u)
+            explored_nodes_list.append(u)
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+            here = dist[side]
+            # Stall-on-demand: if a higher node reaches u more cheaply through
+            # an arc of the opposite direction, u cannot be on a shortest
+            # up-down path, so its arcs need not be relaxed.
+            indptr, indices, costs, _ = graph_lists[1 - side]
+            if any(here.get(indices[k], float("inf")) + costs[k] < d for k in range(indptr[u], indptr[u + 1])):
+                side = 1 - side
+                continue
+            indptr, indices, costs, mids = graph_lists[side]
+            relaxed += indptr[u + 1] - indptr[u]
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + costs[k]
+                if nd < here.get(v, float("inf")):
+                    here[v] = nd
+                    parent[side][v] = (u, mids[k])
+                    heappush(queues[side], (nd, v))
+            side = 1 - side
+
+        if tracking:
+            stats.record(nodes_settled=len(explored_nodes_list), edges_relaxed=relaxed,
+                         heap_pushes=pops + discarded, heap_pops=pops, stale_pops=stale, peak_queue=peak)
+        if best == float("inf"):
+            raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+        if meet == -1:
+            return ([], len(explored_nodes_list), explored_nodes_list)
+
+        # Walk both search trees back to the endpoints, then unpack shortcuts.
+        forward = []
+        node = meet
+        while parent[0][node][0] != -1:
+            prev, mid = parent[0][node]
+            forward.append((prev, node, mid))
+            node = prev
+        forward.reverse()
+        backward = []
+        node = meet
+        while parent[1][node][0] != -1:
+            nxt, mid = parent[1][node]
+            backward.append((node, nxt, mid))
+            node = nxt
+        path = [forward[0][0] if forward else meet]
+        for a, b, mid in forward + backward:
+            path.extend(self._unpack(a, b, mid)[1:])
+        return (path, len(explored_nodes_list), explored_nodes_list)
+
+    def _unpack(self, a, b, mid):
+        """Expand the CH arc a -> b into original nodes [a, ..., b]"""
+        path = [a]
+        stack = [(a, b, mid)]
+        while stack:
+            x, y, m = stack.pop()
+            if m == -1:
+                path.append(y)
+            else:
+                stack.append((m, y, self._mid(m, y)))
+                stack.append((x, m, self._mid(x, m)))
+        return path
+
+    def _mid(self, a, b):
+        if self._rank[a] < self._rank[b]:
+            indptr, indices, _, mids = self._up_lists
+            start, end, key = indptr[a], indptr[a + 1], b
+        else:
+            indptr, indices, _, mids = self._down_lists
+            start, end, key = indptr[b], indptr[b + 1], a
+        for k in range(start, end):
+            if indices[k] == key:
+                return mids[k]
+        raise KeyError(f"No hierarchy arc {a} -> {b}")
+
+    # --- persistence ---
+    def save(self, path):
+        arrays = {"rank": self.rank}
+        for prefix, (indptr, indices, cost, mid) in (("up", self.up), ("down", self.down)):
+            arrays.update({f"{prefix}_indptr": indptr, f"{prefix}_indices": indices,
+                           f"{prefix}_cost": cost, f"{prefix}_mid": mid})
+        meta = {"weight": self.weight, "preprocessing_seconds": self.preprocessing_seconds,
+                "shortcuts": self.shortcuts, "graph_fingerprint": self.graph_fingerprint}
+        write_arrays(path, arrays, meta)
+
+    @classmethod
+    def load(cls, path):
+        arrays, meta = read_arrays(path)
+        return cls(meta=meta, **arrays)
+
+    # --- preprocessing ---
+    @classmethod
+    def build(cls, graph, weight="length", witness_settle_limit=60):
+        """Contract every node (edge-difference ordering with lazy updates)"""
+        started = time.perf_counter()
+        n = graph.n_nodes
+        indptr, indices, costs = graph.adjacency_lists(weight)
+        out = [{} for _ in range(n)]
+        inn = [{} for _ in range(n)]
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                out[u][indices[k]] = (costs[k], -1)
+                inn[indices[k]][u] = (costs[k], -1)
+
+        contracted = bytearray(n)
+        deleted_neighbours = [0] * n
+
+        def shortcuts_for(v):
+            """Shortcuts (u, w, cost) needed if v were contracted now"""
+            needed = []
+            targets = {w: c for w, (c, _) in out[v].items()}
+            for u, (cost_uv, _) in inn[v].items():
+                limit = cost_uv + max(targets.values(), default=0.0)
+                witness = _witness_search(out, u, v, limit, witness_settle_limit)
+                for w, cost_vw in targets.items():
+                    if w == u:
+                        continue
+                    via = cost_uv + cost_vw
+                    if witness.get(w, float("inf")) > via:
+                        needed.append((u, w, via))
+            return needed
+
+        depth = [0] * n
+
+        def priority(v):
+            """Edge difference + contracted neighbours + hierarchy depth"""
+            needed = shortcuts_for(v)
+            edge_difference = len(needed) - len(out[v]) - len(inn[v])
+            return edge_difference + deleted_neighbours[v] + depth[v], needed
+
+        queue = [(priority(v)[0], v) for v in range(n)]
+        queue.sort()
+        rank = np.zeros(n, dtype=np.int64)
+        up_arcs, down_arcs = [], []
+        level = 0
+        while queue:
+            _, v = heappop(queue)
+            if contracted[v]:
+                continue
+            # Lazy update: re-queue v if its priority went stale.
+            current, needed = priority(v)
+            if queue and current > queue[0][0]:
+                heappush(queue, (current, v))
+                continue
+
+            for u, w, via in needed:
+                if via < out[u].get(w, (float("inf"),))[0]:
+                    out[u][w] = (via, v)
+                    inn[w][u] = (via, v)
+            for w, (cost, mid) in out[v].items():
+                up_arcs.append((v, w, cost, mid))
+                del inn[w][v]
+                deleted_neighbours[w] += 1
+                depth[w] = max(depth[w], depth[v] + 1)
+            for u, (cost, mid) in inn[v].items():
+                down_arcs.append((v, u, cost, mid))
+                del out[u][v]
+                deleted_neighbours[u] += 1
+                depth[u] = max(depth[u], depth[v] + 1)
+            out[v], inn[v] = {}, {}
+            contracted[v] = 1
+            rank[v] = level
+            level += 1
+
+        shortcut_count = sum(1 for arc in up_arcs if arc[3] != -1) + sum(1 for arc in down_arcs if arc[3] != -1)
+        meta = {"weight": weight, "preprocessing_seconds": time.perf_counter() - started,
+                "shortcuts": shortcut_count, "graph_fingerprint": graph_fingerprint(graph)}
+        return cls(rank, *_to_csr(n, up_arcs), *_to_csr(n, down_arcs), meta=meta)
+
+
+def _witness_search(out, source, skip, limit, settle_limit):
+    """Local Dijkstra from source avoiding skip, bounded by cost and settled count"""
+    dist = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = 0
+    while queue and settled < settle_limit:
+        d, u = heappop(queue)
+        if d > dist.get(u, float("inf")):
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for v, (cost, _) in out[u].items():
+            if v == skip:
+                continue
+            nd = d + cost
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                heappush(queue, (nd, v))
+    return dist
+
+
+def _to_csr(n, arcs):
+    arcs.sort()
+    tails = np.array([a[0] for a in arcs], dtype=np.int64)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=n), out=indptr[1:])
+    return (indptr,
+            np.array([a[1] for a in arcs], dtype=np.int32),
+            np.array([a[2] for a in arcs], dtype=np.float64),
+            np.array([a[3] for a in arcs], dtype=np.int32))
+
+
+def profile_path(path, weight):
+    """Hierarchy file for a weight profile: ahmednagar.ch, ahmednagar.travel_time.ch, ..."""
+    if weight == "length":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{weight}{ext}"
+
+
+def load_or_build(graph, path, weight="length"):
+    """Load a persisted hierarchy, rebuilding and saving it if missing or contracted from another graph or weight"""
+    try:
+        ch = ContractionHierarchy.load(path)
+        if ch.graph_fingerprint == graph_fingerprint(graph) and ch.weight == weight:
+            return ch
+    except FileNotFoundError:
+        pass
+    ch = ContractionHierarchy.build(graph, weight)
+    ch.save(path)
+    return ch
+
+
+def compare_with_dijkstra(graph, ch, queries=100, seed=0):
+    """Time CH queries against search.dijkstra_path_with_explored_nodes on random pairs"""
+    rng = np.random.default_rng(seed)
+    dijkstra_seconds = ch_seconds = 0.0
+    mismatches = answered = 0
+    for _ in range(queries):
+        s, t = (int(x) for x in rng.integers(graph.n_nodes, size=2))
+        try:
+            started = time.perf_counter()
+            reference, _, _ = dijkstra_path_with_explored_nodes(graph, s, t, weight=ch.weight)
+            dijkstra_seconds += time.perf_counter() - started
+        except nx.NetworkXNoPath:
+            continue
+        started = time.perf_counter()
+        path, _, _ = ch.path_with_explored_nodes(s, t)
+        ch_seconds += time.perf_counter() - started
+        answered += 1
+        if abs(graph.path_length(path, ch.weight) - graph.path_length(reference, ch.weight)) > 1e-6:
+            mismatches += 1
+    return {
+        "queries": answered,
+        "dijkstra_ms": 1000 * dijkstra_seconds / max(answered, 1),
+        "ch_ms": 1000 * ch_seconds / max(answered, 1),
+        "speedup": dijkstra_seconds / ch_seconds if ch_seconds else float("nan"),
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    from graph_engine import load_snapshot
+
+    compiled = load_snapshot("ahmednagar.graph")
+    print("⏳ Contracting the road network...")
+    hierarchy = ContractionHierarchy.build(compiled)
+    hierarchy.save("ahmednagar.ch")
+    print(f"✓ Preprocessing time: {hierarchy.preprocessing_seconds:.1f} s")
+    print(f"✓ Shortcuts added: {hierarchy.shortcuts:,} ({hierarchy.n_arcs:,} hierarchy arcs)")
+    report = compare_with_dijkstra(compiled, hierarchy)
+    print(f"✓ Query time: {report['ch_ms']:.3f} ms vs Dijkstra {report['dijkstra_ms']:.1f} ms "
+          f"({report['speedup']:.0f}x faster, {report['mismatches']} mismatches over {report['queries']} queries)")
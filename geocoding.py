@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from place_index import normalize
+
+GEOCODE_CACHE_DIR = os.path.join("cache", "geocode")
+# Appended to every remote query so results stay inside the study area
+REGION_SUFFIX = ", Ahmednagar, Maharashtra, India"
+
+
+# ---------- BACKENDS ----------
+# A backend has a ``name`` (its cache namespace) and geocode(query) ->
+# (lat, lon, address) or None, and raises on transport errors (those are
+# never cached).
+
+class NominatimBackend:
+    """OpenStreetMap's public geocoder through one reused geopy client"""
+
+    name = "nominatim"
+
+    def __init__(self, user_agent="icadma_route_finder", suffix=REGION_SUFFIX, timeout=10):
+        from geopy.geocoders import Nominatim
+        self._client = Nominatim(user_agent=user_agent)
+        self.suffix = suffix
+        self.timeout = timeout
+
+    def geocode(self, query):
+        location = self._client.geocode(query + self.suffix, timeout=self.timeout)
+        if location is None:
+            return None
+        return (location.latitude, location.longitude, location.address)
+
+
+class PlaceIndexBackend:
+    """Answers from an offline place_index.PlaceIndex; no network"""
+
+    name = "places"
+
+    def __init__(self, index):
+        self.index = index
+
+    def geocode(self, query):
+        matches = self.index.search(query, limit=1)
+        if not matches:
+            return None
+        name, lat, lon, kind = matches[0]
+        return (lat, lon, f"{name} ({kind})")
+
+
+class StaticBackend:
+    """Fixed query -> (lat, lon, address) answers, for tests and offline deployments"""
+
+    name = "static"
+
+    def __init__(self, answers):
+        self.answers = {normalize(query): answer for query, answer in answers.items()}
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return self.answers.get(normalize(query))
+
+
+class FallbackBackend:
+    """Asks each backend in turn and returns the first answer, e.g. the offline index, then Nominatim"""
+
+    def __init__(self, *backends):
+        self.backends = backends
+        self.name = "+".join(backend.name for backend in backends)
+
+    def geocode(self, query):
+        for backend in self.backends:
+            result = backend.geocode(query)
+            if result is not None:
+                return result
+        return None
+
+
+# ---------- GEOCODING CACHE ----------
+class GeocodeCache:
+    """Process-wide, TTL-aware LRU in front of a geocoding backend.
+
+    Queries are keyed by their normalized text, so "Railway Station" and
+    "railway  station!" share one entry. Answers (including "not found",
+    kept for the shorter ``negative_ttl``) are also written under
+    ``directory``/<backend name> with the SHA-1 of the backend name and key as
+    file name, so answers from different backends never mix, and survive
+    restarts; each backend's directory keeps at most ``max_disk_entries``
+    files. Concurrent lookups of a key that is
+    already being fetched wait for that request instead of sending their own.
+    """
+
+    def __init__(self, backend, directory=GEOCODE_CACHE_DIR, max_entries=1024, ttl=7 * 24 * 3600,
+                 negative_ttl=3600, max_disk_entries=8192, clock=time.time):
+        self.backend = backend
+        self.directory = os.path.join(directory, backend.name)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.expired = self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file(self, key):
+        digest = hashlib.sha1(f"{self.backend.name}\n{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _fresh(self, entry):
+        result, stored_at = entry
+        ttl = self.ttl if result is not None else self.negative_ttl
+        return self._clock() - stored_at < ttl
+
+    # --- lookup ---
+    def geocode(self, query):
+        """(lat, lon, address) for a query, or None when nothing matches"""
+        key = normalize(query)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self.expired += 1
+                del self._entries[key]
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            # Another session is already fetching this query; share its answer
+            return pending.result()
+
+        try:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+            else:
+                entry = (self.backend.geocode(query), self._clock())
+                with self._lock:
+                    self.misses += 1
+                self._save(key, entry)
+            with self._lock:
+                self._insert(key, entry)
+            pending.set_result(entry[0])
+            return entry[0]
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _insert(self, key, entry):
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # --- persistence ---
+    def _save(self, key, entry):
+        result, stored_at = entry
+        tmp_path = f"{self._file(key)}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"backend": self.backend.name, "query": key, "result": result, "stored_at": stored_at}, f)
+            os.replace(tmp_path, self._file(key))
+            self._prune_disk()
+        except OSError:
+            pass  # Disk persistence is best effort; the memory tier still works.
+
+    def _load(self, key):
+        path = self._file(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        result = tuple(record["result"]) if record["result"] is not None else None
+        entry = (result, record["stored_at"])
+        if record.get("backend") != self.backend.name or record["query"] != key or not self._fresh(entry):
+            with self._lock:
+                self.expired += 1
+            return None
+        return entry
+
+    def _prune_disk(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # --- telemetry ---
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+            }
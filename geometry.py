@@ -0,0 +1,117 @@
+from math import cos, radians
+
+import numpy as np
+
+from spatial_index import EdgeSnap, EARTH_RADIUS_M
+
+# Web Mercator ground resolution at the equator, zoom 0 (metres per pixel)
+METRES_PER_PIXEL_Z0 = 156543.03392
+# Douglas-Peucker tolerance in screen pixels: below half a pixel the
+# simplified line is indistinguishable from the original.
+SIMPLIFY_PIXELS = 0.5
+
+
+# ---------- ROUTE GEOMETRY ----------
+def _local_xy(coords):
+    """Project (lat, lon) rows to metres around their first point"""
+    lat0 = radians(coords[0, 0])
+    x = np.radians(coords[:, 1] - coords[0, 1]) * EARTH_RADIUS_M * cos(lat0)
+    y = np.radians(coords[:, 0] - coords[0, 0]) * EARTH_RADIUS_M
+    return x, y
+
+
+def _portion(coords, start, end):
+    """Part of a polyline between two fractions of its length"""
+    if len(coords) < 2:
+        return coords
+    x, y = _local_xy(coords)
+    along = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    if along[-1] == 0:
+        return coords[[0, -1]]
+    at = np.array([start, end]) * along[-1]
+    cut = np.column_stack((np.interp(at, along, coords[:, 0]), np.interp(at, along, coords[:, 1])))
+    inside = coords[(along > at[0]) & (along < at[1])]
+    return np.vstack((cut[:1], inside, cut[1:]))
+
+
+def route_coords(graph, path, start=None, end=None):
+    """(lat, lon) vertices of a route along the stored road geometry.
+
+    ``start`` / ``end`` are the search endpoints; for EdgeSnap endpoints the
+    route begins and ends at the snapped position, following the partial
+    edge to or from the first/last node. An empty path means both snaps lie
+    on one road and the route is the stretch between them.
+    """
+    if not len(path):
+        # Both ends on one road and the search drove straight between them
+        edge = graph.arc_geometry(start.u, start.v)
+        fraction = start.along(end)
+        if fraction >= start.fraction:
+            return _portion(edge, start.fraction, fraction)
+        return _portion(edge, fraction, start.fraction)[::-1]
+    pieces = []
+    if isinstance(start, EdgeSnap):
+        edge = graph.arc_geometry(start.u, start.v)
+        if path[0] == start.v:
+            pieces.append(_portion(edge, start.fraction, 1.0))
+        else:
+            pieces.append(_portion(edge, 0.0, start.fraction)[::-1])
+    for u, v in zip(path[:-1], path[1:]):
+        pieces.append(graph.arc_geometry(u, v))
+    if isinstance(end, EdgeSnap):
+        edge = graph.arc_geometry(end.u, end.v)
+        if path[-1] == end.u:
+            pieces.append(_portion(edge, 0.0, end.fraction))
+        else:
+            pieces.append(_portion(edge, end.fraction, 1.0)[::-1])
+    if not pieces:
+        return np.array([[graph.lat[path[0]], graph.lon[path[0]]]])
+    # Consecutive pieces share their joining vertex; keep it once.
+    return np.vstack([pieces[0]] + [piece[1:] for piece in pieces[1:]])
+
+
+def zoom_tolerance(zoom, lat, pixels=SIMPLIFY_PIXELS):
+    """Simplification tolerance in metres for a Web Mercator zoom level"""
+    return pixels * METRES_PER_PIXEL_Z0 * cos(radians(lat)) / 2 ** zoom
+
+
+def simplify(coords, tolerance):
+    """Douglas-Peucker simplification of (lat, lon) rows with a tolerance in metres"""
+    if len(coords) < 3:
+        return coords
+    x, y = _local_xy(coords)
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        norm = np.hypot(dx, dy)
+        if norm > 0:
+            distance = np.abs(px * dy - py * dx) / norm
+        else:
+            distance = np.hypot(px, py)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return coords[keep]
+
+
+def encode_polyline(coords, precision=5):
+    """Google encoded-polyline string for (lat, lon) rows"""
+    scaled = np.round(np.asarray(coords) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    chunks = []
+    for value in deltas.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
@@ -1,4 +1,12 @@
 import osmnx as ox
+from graph_engine import compile_graph, save_snapshot
+from spatial_index import SpatialIndex
+from landmarks import LandmarkTable
+from contraction import ContractionHierarchy, profile_path
+from place_index import PlaceIndex
+
+# OSM tags whose named features go into the offline place search
+POI_TAGS = {"amenity": True, "railway": "station", "tourism": True, "shop": "mall", "leisure": "park"}
 
 # This query will get the *center point* of the city
 city_center_query = "Ahmednagar, Maharashtra, India"
@@ -75,14 +83,46 @@ try:
     print(f"\n💾 Saving to 'ahmednagar.graphml'...")
     ox.save_graphml(G, "ahmednagar.graphml")
     
+    # 6. Save the compiled, memory-mappable snapshot the app loads at startup
+    print(f"💾 Saving compiled snapshot to 'ahmednagar.graph'...")
+    compiled = compile_graph(G, with_geometry=True)
+    save_snapshot(compiled, "ahmednagar.graph")
+    print(f"💾 Saving spatial index to 'ahmednagar.sidx'...")
+    SpatialIndex.build(compiled).save("ahmednagar.sidx")
+    print(f"💾 Precomputing ALT landmark tables to 'ahmednagar.landmarks'...")
+    LandmarkTable.build(compiled, k=16, strategy="avoid").save("ahmednagar.landmarks")
+    print(f"✓ Weight profiles: {', '.join(compiled.weights)}")
+    for weight in compiled.weights:
+        ch_path = profile_path("ahmednagar.ch", weight)
+        print(f"💾 Contracting the network for {weight} to '{ch_path}' (this can take a few minutes)...")
+        hierarchy = ContractionHierarchy.build(compiled, weight)
+        hierarchy.save(ch_path)
+        print(f"✓ Contraction Hierarchy: {hierarchy.shortcuts:,} shortcuts in {hierarchy.preprocessing_seconds:.1f} s")
+    print(f"💾 Indexing street names and places to 'ahmednagar.places'...")
+    pois = []
+    try:
+        features = ox.features_from_point(center_point, tags=POI_TAGS, dist=distance_in_meters)
+        for _, row in features[features["name"].notna()].iterrows():
+            # The matched tag value, e.g. "hospital", "station", "park"
+            kind = next((str(row[tag]) for tag in POI_TAGS if tag in features.columns and isinstance(row[tag], str)), "place")
+            centroid = row.geometry.centroid
+            pois.append((row["name"], centroid.y, centroid.x, kind.replace("_", " ")))
+    except Exception as e:
+        print(f"   ⚠️ POI download failed ({e}); indexing street names only")
+    places = PlaceIndex.build(G, pois)
+    places.save("ahmednagar.places")
+    print(f"✓ Place index: {len(places):,} names ({len(pois):,} POIs)")
+    
     # Estimate file size
     import os
     file_size_mb = os.path.getsize("ahmednagar.graphml") / (1024 * 1024)
+    snapshot_size_mb = os.path.getsize("ahmednagar.graph") / (1024 * 1024)
     
     print("\n" + "="*50)
     print("✅ SUCCESS!")
     print("="*50)
     print(f"✓ File saved: ahmednagar.graphml ({file_size_mb:.2f} MB)")
+    print(f"✓ Snapshot saved: ahmednagar.graph ({snapshot_size_mb:.2f} MB, {compiled.n_arcs:,} arcs)")
     print(f"✓ Ready to use in your Streamlit app!")
     print(f"\n💡 This file size is optimal for web deployment:")
     if file_size_mb < 10:
@@ -93,7 +133,7 @@ try:
         print(f"   LARGE - Consider using GitHub Releases for hosting")
     
     print("\n🚀 Next steps:")
-    print("   1. Replace your old ahmednagar.graphml file")
+    print("   1. Replace your old ahmednagar.graphml and ahmednagar.graph files")
     print("   2. Restart your Streamlit app")
     print("   3. Test the flyover routing!")
 
@@ -0,0 +1,447 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from math import radians, cos, sin, asin, sqrt
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"PFGRAPH\0"
+SNAPSHOT_VERSION = 1
+_ALIGN = 64
+# Plain-list mirrors of the CSR arrays are the only per-process heap the graph
+# holds besides the id map: one (indptr, indices) pair per direction, shared by
+# every profile, plus one cost list per (direction, profile) that is searched.
+
+# ---------- WEIGHT PROFILES ----------
+# Free-flow speed (km/h) by OSM highway class when an edge has no usable maxspeed
+HIGHWAY_SPEEDS_KPH = {
+    "motorway": 90, "trunk": 70, "primary": 55, "secondary": 45, "tertiary": 35,
+    "unclassified": 30, "residential": 25, "living_street": 10, "service": 15, "road": 30,
+}
+DEFAULT_SPEED_KPH = 30
+# "prefer_highways" costs an edge its length times this factor; links take their parent's
+HIGHWAY_PENALTIES = {"motorway": 1.0, "trunk": 1.0, "primary": 1.0, "secondary": 1.2, "tertiary": 1.4}
+DEFAULT_PENALTY = 1.8
+
+
+# ---------- COMPILED GRAPH ----------
+class CompiledGraph:
+    """Read-only CSR view of the road network.
+
+    Nodes are renumbered 0..n-1 and ``node_ids[i]`` holds the OSM id of node i.
+    The arcs leaving node i are ``indices[indptr[i]:indptr[i+1]]`` with costs
+    ``length[indptr[i]:indptr[i+1]]`` (the shortest of any parallel edges).
+
+    Instances are immutable once built: the arrays are read-only and public
+    attributes cannot be reassigned, so one instance can be shared by every
+    session and thread in the process.
+    """
+
+    def __init__(self, node_ids, lat, lon, indptr, indices, length, num_edges=None,
+                 highway=None, highway_classes=(), geom_indptr=None, geom_coords=None,
+                 weights=None, heuristic_scales=None):
+        self.node_ids = _frozen(node_ids, np.int64)
+        self.lat = _frozen(lat, np.float64)
+        self.lon = _frozen(lon, np.float64)
+        self.indptr = _frozen(indptr, np.int64)
+        self.indices = _frozen(indices, np.int32)
+        self.length = _frozen(length, np.float64)
+        self.num_edges = int(num_edges) if num_edges is not None else len(self.indices)
+        # Optional per-arc attributes: highway class codes into highway_classes,
+        # and arc geometry as (lon, lat) rows geom_coords[geom_indptr[k]:geom_indptr[k+1]]
+        # (empty for arcs that are straight segments).
+        self.highway = _frozen(highway, np.uint8) if highway is not None else None
+        self.highway_classes = tuple(highway_classes)
+        self.geom_indptr = _frozen(geom_indptr, np.int64) if geom_indptr is not None else None
+        self.geom_coords = _frozen(geom_coords, np.float64) if geom_coords is not None else None
+        # Extra per-arc cost profiles (e.g. travel_time), parallel to ``length``,
+        # and per-profile factors that turn metres into an admissible bound.
+        self._weights = {"length": self.length}
+        for name, array in (weights or {}).items():
+            self._weights[name] = _frozen(array, np.float64)
+        self._heuristic_scales = {"length": 1.0, **(heuristic_scales or {})}
+        self._lat_rad = self._lon_rad = self._cos_lat = None
+        self._index = None
+        self._lists = {}
+        self._lock = threading.Lock()
+        self._sealed = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_sealed", False) and not name.startswith("_"):
+            raise AttributeError(f"CompiledGraph is read-only (cannot set {name!r})")
+        super().__setattr__(name, value)
+
+    @property
+    def n_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def n_arcs(self):
+        return len(self.indices)
+
+    @property
+    def weights(self):
+        """Names of the cost profiles every search can take as ``weight=``"""
+        return tuple(self._weights)
+
+    def weight_array(self, weight="length"):
+        """Per-arc costs of one profile, aligned with ``indices``"""
+        if weight not in self._weights:
+            raise ValueError(f"Unknown weight: {weight}")
+        return self._weights[weight]
+
+    def heuristic_scale(self, weight="length"):
+        """Factor s with cost >= s * metres on every arc, for straight-line and length bounds"""
+        if weight not in self._heuristic_scales:
+            raise ValueError(f"Unknown weight: {weight}")
+        return self._heuristic_scales[weight]
+
+    def index_of(self, node_id):
+        """Return the compiled index of an OSM node id"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = {n: i for i, n in enumerate(self.node_ids.tolist())}
+        return self._index[int(node_id)]
+
+    def radian_coords(self):
+        """Return read-only (lat, lon, cos(lat)) arrays in radians for heuristics"""
+        if self._cos_lat is None:
+            with self._lock:
+                if self._cos_lat is None:
+                    self._lat_rad = _frozen(np.radians(self.lat), np.float64)
+                    self._lon_rad = _frozen(np.radians(self.lon), np.float64)
+                    self._cos_lat = _frozen(np.cos(self._lat_rad), np.float64)
+        return self._lat_rad, self._lon_rad, self._cos_lat
+
+    def adjacency_lists(self, weight="length"):
+        """Return (indptr, indices, weights) as plain lists for the search loops"""
+        costs = self._mirror(("forward", weight), lambda: (self.weight_array(weight),))[0]
+        return self._mirror(("forward",), lambda: (self.indptr, self.indices)) + (costs,)
+
+    def reverse_adjacency_lists(self, weight="length"):
+        """Like adjacency_lists, but listing the arcs entering each node"""
+        costs = self._mirror(("reverse", weight), lambda: self.reverse_csr(weight)[2:])[0]
+        return self._mirror(("reverse",), lambda: self.reverse_csr()[:2]) + (costs,)
+
+    def reverse_csr(self, weight="length"):
+        """Return (indptr, indices, weights) arrays of the reversed graph"""
+        tails = np.repeat(np.arange(self.n_nodes, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.n_nodes), out=indptr[1:])
+        return indptr, tails[order], self.weight_array(weight)[order]
+
+    def _mirror(self, key, build):
+        # The keys are bounded by the profile count, so mirrors are never evicted and rebuilt
+        with self._lock:
+            lists = self._lists.get(key)
+            if lists is None:
+                lists = self._lists[key] = tuple(a.tolist() for a in build())
+        return lists
+
+    def _arrays(self):
+        seen = set()
+        for value in list(vars(self).values()) + list(self._weights.values()):
+            if isinstance(value, np.ndarray) and id(value) not in seen:
+                seen.add(id(value))
+                yield value
+
+    @property
+    def mapped_bytes(self):
+        """Bytes of array data backed by the snapshot file (shared between processes)"""
+        return sum(a.nbytes for a in self._arrays() if _is_file_backed(a))
+
+    @property
+    def heap_bytes(self):
+        """Approximate private bytes: in-memory arrays, list mirrors and the id map"""
+        total = sum(a.nbytes for a in self._arrays() if not _is_file_backed(a))
+        with self._lock:
+            for key, lists in self._lists.items():
+                total += sum(sys.getsizeof(l) for l in lists)
+                # Boxed floats in cost lists, boxed ints in the topology lists
+                total += (24 if len(key) == 2 else 28) * sum(len(l) for l in lists)
+            if self._index is not None:
+                total += sys.getsizeof(self._index) + 28 * len(self._index)
+        return total
+
+    @property
+    def nbytes(self):
+        """Total bytes held by this graph resource"""
+        return self.mapped_bytes + self.heap_bytes
+
+    def arc_index(self, u, v):
+        """Return the arc position of u -> v in the CSR arrays, or None"""
+        start, end = self.indptr[u], self.indptr[u + 1]
+        hits = np.flatnonzero(self.indices[start:end] == v)
+        return int(start + hits[0]) if len(hits) else None
+
+    def arc_cost(self, u, v, weight="length"):
+        """Return the cost of the arc u -> v, or None if there is none"""
+        k = self.arc_index(u, v)
+        return float(self._weights[weight][k]) if k is not None else None
+
+    def path_length(self, path, weight="length"):
+        """Sum the arc costs along a path of compiled node indices"""
+        return sum(self.arc_cost(u, v, weight) for u, v in zip(path[:-1], path[1:]))
+
+    def coords(self, path):
+        """Return [(lat, lon), ...] for a sequence of compiled node indices"""
+        path = np.asarray(path, dtype=np.int64)
+        return list(zip(self.lat[path].tolist(), self.lon[path].tolist()))
+
+    def arc_geometry(self, u, v):
+        """(lat, lon) vertices of the arc u -> v, from its stored geometry or the straight chord"""
+        k = self.arc_index(u, v)
+        if self.geom_indptr is not None and k is not None and self.geom_indptr[k + 1] > self.geom_indptr[k]:
+            rows = self.geom_coords[self.geom_indptr[k]:self.geom_indptr[k + 1]]
+            return np.column_stack((rows[:, 1], rows[:, 0]))
+        return np.array([[self.lat[u], self.lon[u]], [self.lat[v], self.lon[v]]])
+
+
+def _is_file_backed(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return False
+
+
+def _frozen(values, dtype):
+    array = np.ascontiguousarray(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * asin(sqrt(a)) * 6371 * 1000
+
+
+def compile_graph(G, weight="length", with_geometry=False):
+    """Compile an OSMnx MultiDiGraph into a CompiledGraph"""
+    node_list = list(G.nodes)
+    index = {n: i for i, n in enumerate(node_list)}
+    lat = np.array([G.nodes[n]["y"] for n in node_list], dtype=np.float64)
+    lon = np.array([G.nodes[n]["x"] for n in node_list], dtype=np.float64)
+
+    # Keep the cheapest of any parallel edges; a missing length falls back to
+    # the straight-line distance rather than a unit cost.
+    best, chosen = {}, {}
+    for u, v, data in G.edges(data=True):
+        if u == v:
+            continue
+        cost = data.get(weight)
+        if cost is None:
+            cost = _haversine_m(G.nodes[u]["y"], G.nodes[u]["x"], G.nodes[v]["y"], G.nodes[v]["x"])
+        key = (index[u], index[v])
+        if key not in best or cost < best[key]:
+            best[key] = float(cost)
+            chosen[key] = data
+
+    src = np.fromiter((k[0] for k in best), dtype=np.int64, count=len(best))
+    dst = np.fromiter((k[1] for k in best), dtype=np.int64, count=len(best))
+    cost = np.fromiter(best.values(), dtype=np.float64, count=len(best))
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(len(node_list) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(node_list)), out=indptr[1:])
+
+    arcs = [chosen[k] for k in best]
+    arcs = [arcs[i] for i in order.tolist()]
+    highway_classes = sorted({_highway_class(d) for d in arcs})
+    class_code = {h: i for i, h in enumerate(highway_classes)}
+    highway = np.array([class_code[_highway_class(d)] for d in arcs], dtype=np.uint8)
+
+    indices = dst[order]
+    length = cost[order]
+    weights = profile_weights(arcs, length)
+    scales = heuristic_scales(lat, lon, indptr, indices, {"length": length, **weights})
+
+    geom_indptr = geom_coords = None
+    if with_geometry:
+        geom_indptr = np.zeros(len(arcs) + 1, dtype=np.int64)
+        rows = []
+        for k, data in enumerate(arcs):
+            geometry = data.get("geometry")
+            points = list(geometry.coords) if geometry is not None else []
+            rows.extend(points)
+            geom_indptr[k + 1] = geom_indptr[k] + len(points)
+        geom_coords = np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+    return CompiledGraph(
+        node_ids=np.array(node_list, dtype=np.int64),
+        lat=lat,
+        lon=lon,
+        indptr=indptr,
+        indices=indices,
+        length=length,
+        num_edges=G.number_of_edges(),
+        highway=highway,
+        highway_classes=highway_classes,
+        geom_indptr=geom_indptr,
+        geom_coords=geom_coords,
+        weights=weights,
+        heuristic_scales=scales,
+    )
+
+
+def _highway_class(data):
+    highway = data.get("highway", "unclassified")
+    if isinstance(highway, list):
+        highway = highway[0]
+    return str(highway)
+
+
+def _maxspeed_kph(value):
+    """Speed in km/h from an OSM maxspeed tag ("50", "30 mph", or a list of them), or None"""
+    if isinstance(value, list):
+        speeds = [s for s in map(_maxspeed_kph, value) if s]
+        return sum(speeds) / len(speeds) if speeds else None
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(mph)?", str(value)) if value is not None else None
+    if match is None or float(match.group(1)) <= 0:
+        return None
+    return float(match.group(1)) * (1.609344 if match.group(2) else 1.0)
+
+
+def profile_weights(arcs, length):
+    """Extra cost profiles for arcs (edge data dicts) parallel to ``length``.
+
+    travel_time is free-flow seconds at the tagged maxspeed, else the
+    highway class default; prefer_highways is length scaled by road class.
+    """
+    classes = [_highway_class(d).removesuffix("_link") for d in arcs]
+    speed_kph = np.array([_maxspeed_kph(d.get("maxspeed")) or HIGHWAY_SPEEDS_KPH.get(c, DEFAULT_SPEED_KPH)
+                          for d, c in zip(arcs, classes)], dtype=np.float64)
+    penalty = np.array([HIGHWAY_PENALTIES.get(c, DEFAULT_PENALTY) for c in classes], dtype=np.float64)
+    return {"travel_time": length / (speed_kph / 3.6), "prefer_highways": length * penalty}
+
+
+def heuristic_scales(lat, lon, indptr, indices, weights):
+    """Per profile, the largest s with cost >= s * max(length, chord) on every arc.
+
+    Summed along any path this gives cost >= s * (straight-line distance)
+    and cost >= s * (road length), so scaling a metric heuristic or a
+    length-based landmark bound by s keeps A* exact for that profile.
+    """
+    tails = np.repeat(np.arange(len(lat)), np.diff(indptr))
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat[tails], lon[tails], lat[indices], lon[indices]))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    reach = np.maximum(weights["length"], 2 * 6371000.0 * np.arcsin(np.sqrt(a)))
+    positive = reach > 0
+    return {name: float(np.min(cost[positive] / reach[positive])) if positive.any() else 1.0
+            for name, cost in weights.items()}
+
+
+# ---------- BINARY SNAPSHOT ----------
+# Layout: 8-byte magic, uint32 version, uint32 header length, a JSON header
+# describing every array (dtype, shape, offset into the data section), then
+# the data section starting at the next 64-byte boundary. Every array is
+# 64-byte aligned so it can be memory-mapped in place.
+_SNAPSHOT_ARRAYS = ("node_ids", "lat", "lon", "indptr", "indices", "length",
+                    "highway", "geom_indptr", "geom_coords")
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_arrays(path, arrays, meta):
+    """Write named NumPy arrays plus a JSON-able meta dict in snapshot format"""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({"arrays": layout, "meta": meta}).encode("utf-8")
+    data_start = _aligned(16 + len(header))
+
+    # Unique per writer, so processes building the same file never share a temporary
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.array([SNAPSHOT_VERSION, len(header)], dtype="<u4").tobytes())
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_arrays(path):
+    """Memory-map every array in a snapshot file; returns (arrays, meta)"""
+    with open(path, "rb") as f:
+        if f.read(8) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        version, header_len = np.frombuffer(f.read(8), dtype="<u4").tolist()
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = _aligned(16 + header_len)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r",
+                                     offset=data_start + spec["offset"], shape=shape)
+    return arrays, header["meta"]
+
+
+def graph_fingerprint(graph):
+    """Short hash of the network so a rebuilt graph never reuses stale files"""
+    digest = hashlib.sha1()
+    for array in (graph.indptr, graph.indices, graph.length):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def save_snapshot(graph, path):
+    """Write a CompiledGraph to a versioned, memory-mappable snapshot file"""
+    arrays = {name: getattr(graph, name) for name in _SNAPSHOT_ARRAYS
+              if getattr(graph, name) is not None}
+    for name in graph.weights[1:]:
+        arrays[f"weight_{name}"] = graph.weight_array(name)
+    meta = {
+        "num_edges": graph.num_edges,
+        "highway_classes": list(graph.highway_classes),
+        "heuristic_scales": {name: graph.heuristic_scale(name) for name in graph.weights},
+    }
+    write_arrays(path, arrays, meta)
+
+
+def load_snapshot(path):
+    """Memory-map a snapshot written by save_snapshot into a CompiledGraph"""
+    arrays, meta = read_arrays(path)
+    weights = {name[len("weight_"):]: arrays.pop(name) for name in list(arrays) if name.startswith("weight_")}
+    return CompiledGraph(num_edges=meta["num_edges"], highway_classes=meta["highway_classes"],
+                         weights=weights, heuristic_scales=meta.get("heuristic_scales"), **arrays)
+
+
+_shared_graphs = {}
+_shared_lock = threading.Lock()
+
+
+def shared_graph(path):
+    """Return the single process-wide CompiledGraph memory-mapped from path"""
+    key = os.path.realpath(path)
+    with _shared_lock:
+        graph = _shared_graphs.get(key)
+        if graph is None:
+            graph = load_snapshot(path)
+            _shared_graphs[key] = graph
+        return graph
+
+
+def build_snapshot(graphml_path, snapshot_path):
+    """Compile a GraphML file (with edge geometry) and write its snapshot"""
+    import osmnx as ox
+
+    graph = compile_graph(ox.load_graphml(graphml_path), with_geometry=True)
+    save_snapshot(graph, snapshot_path)
+    return graph
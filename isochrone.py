@@ -0,0 +1,187 @@
+from math import cos, radians
+
+import numpy as np
+
+from geometry import simplify
+from search import shortest_path_tree
+from spatial_index import EdgeSnap, EARTH_RADIUS_M
+
+# Raster cell size; reachable roads are drawn into cells this wide
+ISOCHRONE_CELL_M = 100.0
+# Cells added around every reached road so nearby streets merge into one area
+ISOCHRONE_BUFFER_CELLS = 1
+
+
+# ---------- REACHABLE POINTS ----------
+def _reached_points(graph, dist, budget, weight, step):
+    """(lat, lon) samples along every road reachable within ``budget``.
+
+    An arc whose tail is reached contributes the part of it the remaining
+    budget covers, sampled about every ``step`` metres.
+    """
+    indptr = np.asarray(graph.indptr)
+    tails = np.repeat(np.arange(graph.n_nodes), np.diff(indptr))
+    heads = np.asarray(graph.indices)
+    reached = dist[tails] <= budget
+    tails, heads = tails[reached], heads[reached]
+    costs = graph.weight_array(weight)[reached]
+    lengths = np.asarray(graph.length)[reached]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covered = np.where(costs > 0, (budget - dist[tails]) / costs, 1.0)
+    covered = np.clip(covered, 0.0, 1.0)
+    samples = np.ceil(covered * lengths / step).astype(np.int64) + 1
+    arc = np.repeat(np.arange(len(tails)), samples)
+    first = np.repeat(np.cumsum(samples) - samples, samples)
+    t = (np.arange(len(arc)) - first) / np.maximum(samples[arc] - 1, 1) * covered[arc]
+    lat = graph.lat[tails[arc]] + (graph.lat[heads[arc]] - graph.lat[tails[arc]]) * t
+    lon = graph.lon[tails[arc]] + (graph.lon[heads[arc]] - graph.lon[tails[arc]]) * t
+    return lat, lon
+
+
+# ---------- RASTER CONTOUR ----------
+def _boundary_edges(mask):
+    """Unit cell edges between filled and empty cells, oriented with the filled side on the left.
+
+    Returns (x0, y0, x1, y1) integer vertex arrays; rows of ``mask`` run
+    south to north and columns west to east.
+    """
+    padded = np.pad(mask, 1)
+    filled = padded[1:-1, 1:-1]
+    edges = []
+    # (neighbour that must be empty, start vertex offset, end vertex offset)
+    for neighbour, (sx, sy), (ex, ey) in (
+        (padded[:-2, 1:-1], (0, 0), (1, 0)),   # south side, heading east
+        (padded[1:-1, 2:], (1, 0), (1, 1)),    # east side, heading north
+        (padded[2:, 1:-1], (1, 1), (0, 1)),    # north side, heading west
+        (padded[1:-1, :-2], (0, 1), (0, 0)),   # west side, heading south
+    ):
+        rows, cols = np.nonzero(filled & ~neighbour)
+        edges.append((cols + sx, rows + sy, cols + ex, rows + ey))
+    return tuple(np.concatenate(part) for part in zip(*edges))
+
+
+def _trace_rings(mask):
+    """Closed boundary rings of a cell mask as integer (x, y) vertex arrays.
+
+    Outer rings run counter-clockwise and holes clockwise. Where two filled
+    cells touch only at a corner the trace turns left, so each ring stays
+    simple.
+    """
+    x0, y0, x1, y1 = _boundary_edges(mask)
+    outgoing = {}
+    for i, start in enumerate(zip(x0.tolist(), y0.tolist())):
+        outgoing.setdefault(start, []).append(i)
+    used = np.zeros(len(x0), dtype=bool)
+    rings = []
+    for first in range(len(x0)):
+        if used[first]:
+            continue
+        ring, edge = [], first
+        while not used[edge]:
+            used[edge] = True
+            ring.append((int(x0[edge]), int(y0[edge])))
+            dx, dy = int(x1[edge] - x0[edge]), int(y1[edge] - y0[edge])
+            end = (int(x1[edge]), int(y1[edge]))
+            choices = [i for i in outgoing[end] if not used[i]]
+            if not choices:
+                break
+            # Prefer left, then straight, then right
+            preference = {(-dy, dx): 0, (dx, dy): 1, (dy, -dx): 2}
+            edge = min(choices, key=lambda i: preference.get((int(x1[i] - x0[i]), int(y1[i] - y0[i])), 3))
+        ring = np.array(ring + ring[:1], dtype=np.float64)
+        # Keep only the corners
+        turns = np.any(np.diff(ring[:-1], axis=0, prepend=ring[-2:-1]) != np.diff(ring, axis=0), axis=1)
+        corners = ring[:-1][turns]
+        rings.append(np.vstack((corners, corners[:1])))
+    return rings
+
+
+def _signed_area(ring):
+    return 0.5 * float(np.sum(ring[:-1, 0] * ring[1:, 1] - ring[1:, 0] * ring[:-1, 1]))
+
+
+def _contains(ring, x, y):
+    """Even-odd test of one point against a closed ring"""
+    xa, ya, xb, yb = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+    crosses = (ya > y) != (yb > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at = xa + (y - ya) * (xb - xa) / (yb - ya)
+    return bool(np.count_nonzero(crosses & (x < at)) % 2)
+
+
+def _polygons(rings):
+    """Group rings into polygons: each hole joins the smallest outer ring around it"""
+    areas = [_signed_area(ring) for ring in rings]
+    outers = [i for i, area in enumerate(areas) if area > 0]
+    polygons = {i: [rings[i]] for i in outers}
+    for i, area in enumerate(areas):
+        if area >= 0:
+            continue
+        # A point just inside the filled cells bordering the hole's first edge
+        (xa, ya), (xb, yb) = rings[i][0], rings[i][1]
+        x, y = (xa + xb) / 2 - (yb - ya) * 0.25, (ya + yb) / 2 + (xb - xa) * 0.25
+        around = [j for j in outers if _contains(rings[j], x, y)]
+        if around:
+            polygons[min(around, key=lambda j: areas[j])].append(rings[i])
+    return list(polygons.values())
+
+
+# ---------- ISOCHRONES ----------
+def isochrones(graph, source, budgets, weight="length", cell_m=ISOCHRONE_CELL_M,
+               buffer_cells=ISOCHRONE_BUFFER_CELLS):
+    """Reachable areas around ``source`` for several budgets as a GeoJSON FeatureCollection.
+
+    One Dijkstra bounded by the largest budget serves every band. Budgets are
+    in the weight profile's units (metres for "length", seconds for
+    "travel_time"). Reached roads are rasterized into ``cell_m`` cells,
+    buffered and traced into (Multi)Polygons, largest budget first; each
+    feature's properties hold its budget, node count and area in km².
+    """
+    budgets = sorted(float(b) for b in budgets)
+    dist = shortest_path_tree(graph, source, weight, budget=budgets[-1])[0]
+    if isinstance(source, EdgeSnap):
+        lat0, lon0 = source.lat, source.lon
+    else:
+        lat0, lon0 = float(graph.lat[source]), float(graph.lon[source])
+    metres_per_lon = radians(1) * EARTH_RADIUS_M * cos(radians(lat0))
+    metres_per_lat = radians(1) * EARTH_RADIUS_M
+
+    features = []
+    for budget in reversed(budgets):
+        lat, lon = _reached_points(graph, dist, budget, weight, cell_m / 2)
+        lat, lon = np.append(lat, lat0), np.append(lon, lon0)
+        col = np.floor((lon - lon0) * metres_per_lon / cell_m).astype(np.int64)
+        row = np.floor((lat - lat0) * metres_per_lat / cell_m).astype(np.int64)
+        col_origin, row_origin = col.min() - buffer_cells, row.min() - buffer_cells
+        mask = np.zeros((row.max() - row_origin + buffer_cells + 1, col.max() - col_origin + buffer_cells + 1), dtype=bool)
+        mask[row - row_origin, col - col_origin] = True
+        if buffer_cells:
+            grown = mask.copy()
+            height, width = mask.shape
+            for dy in range(-buffer_cells, buffer_cells + 1):
+                for dx in range(-buffer_cells, buffer_cells + 1):
+                    grown[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] |= \
+                        mask[max(-dy, 0):height + min(-dy, 0), max(-dx, 0):width + min(-dx, 0)]
+            mask = grown
+
+        polygons = []
+        for rings in _polygons(_trace_rings(mask)):
+            coords = []
+            for ring in rings:
+                latlon = np.column_stack((lat0 + (ring[:, 1] + row_origin) * cell_m / metres_per_lat,
+                                          lon0 + (ring[:, 0] + col_origin) * cell_m / metres_per_lon))
+                # Smooth the cell staircase; tiny rings keep their corners
+                smooth = simplify(latlon, cell_m / 2)
+                latlon = smooth if len(smooth) >= 4 else latlon
+                coords.append(np.round(latlon[:, ::-1], 6).tolist())
+            polygons.append(coords)
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons},
+            "properties": {
+                "budget": budget,
+                "nodes": int(np.count_nonzero(dist <= budget)),
+                "area_km2": round(float(mask.sum()) * cell_m ** 2 / 1e6, 2),
+            },
+        })
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,170 @@
+import numpy as np
+
+from graph_engine import write_arrays, read_arrays, graph_fingerprint
+from search import QueryHeuristic, shortest_path_tree
+
+
+# ---------- ALT LANDMARK TABLES ----------
+class LandmarkTable:
+    """Precomputed landmark distances for the ALT (A*, Landmarks, Triangle) heuristic.
+
+    ``dist_from[k, v]`` is the road distance from landmark k to node v and
+    ``dist_to[k, v]`` the distance from v back to landmark k. By the triangle
+    inequality, ``max_k max(dist_from[k, t] - dist_from[k, v],
+    dist_to[k, v] - dist_to[k, t])`` never overestimates the distance v -> t.
+    """
+
+    def __init__(self, landmarks, dist_from, dist_to, strategy="avoid", weight="length", graph_fingerprint=None):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.dist_from = np.asarray(dist_from, dtype=np.float64)
+        self.dist_to = np.asarray(dist_to, dtype=np.float64)
+        self.strategy = strategy
+        self.weight = weight
+        # Fingerprint of the graph the tables were computed on (None in older files)
+        self.graph_fingerprint = graph_fingerprint
+
+    @property
+    def nbytes(self):
+        return self.dist_from.nbytes + self.dist_to.nbytes
+
+    # --- bounds ---
+    def bounds_to(self, target):
+        """Lower bounds on the distance from every node to target (node or EdgeSnap)"""
+        if hasattr(target, "arrivals"):
+            return np.min([self._bounds_to_node(node) + cost
+                           for node, cost in target.arrivals.items()], axis=0)
+        return self._bounds_to_node(target)
+
+    def bounds_from(self, source):
+        """Lower bounds on the distance from source (node or EdgeSnap) to every node"""
+        if hasattr(source, "departures"):
+            return np.min([self._bounds_from_node(node) + cost
+                           for node, cost in source.departures], axis=0)
+        return self._bounds_from_node(source)
+
+    def _bounds_to_node(self, t):
+        with np.errstate(invalid="ignore"):
+            bound = np.maximum(self.dist_from[:, t:t + 1] - self.dist_from,
+                               self.dist_to - self.dist_to[:, t:t + 1]).max(axis=0)
+        return _finite_bound(bound)
+
+    def _bounds_from_node(self, s):
+        with np.errstate(invalid="ignore"):
+            bound = np.maximum(self.dist_from - self.dist_from[:, s:s + 1],
+                               self.dist_to[:, s:s + 1] - self.dist_to).max(axis=0)
+        return _finite_bound(bound)
+
+    def heuristic(self, source, target, graph=None, weight=None):
+        """Return the per-query ALT heuristic for the search kernels.
+
+        For a query in another profile than the table's (``weight`` on
+        ``graph``), the length-based bounds are scaled by that profile's
+        heuristic scale, which keeps them admissible.
+        """
+        table = QueryHeuristic(source, target, self.bounds_to, self.bounds_from)
+        if weight is None or weight == self.weight:
+            return table
+        if self.weight != "length":
+            raise ValueError(f"Landmarks for {self.weight!r} cannot bound {weight!r} queries")
+        return table.scaled(graph.heuristic_scale(weight))
+
+    # --- persistence ---
+    def save(self, path):
+        write_arrays(path, {"landmarks": self.landmarks, "dist_from": self.dist_from, "dist_to": self.dist_to},
+                     {"strategy": self.strategy, "weight": self.weight, "graph_fingerprint": self.graph_fingerprint})
+
+    @classmethod
+    def load(cls, path):
+        arrays, meta = read_arrays(path)
+        return cls(arrays["landmarks"], arrays["dist_from"], arrays["dist_to"],
+                   strategy=meta["strategy"], weight=meta["weight"], graph_fingerprint=meta.get("graph_fingerprint"))
+
+    # --- preprocessing ---
+    @classmethod
+    def build(cls, graph, k=16, strategy="avoid", weight="length", seed=0):
+        """Pick k landmarks ("farthest" or "avoid") and compute their distance tables"""
+        if strategy not in ("farthest", "avoid"):
+            raise ValueError(f"Unknown landmark strategy: {strategy}")
+        rng = np.random.default_rng(seed)
+        landmarks, dist_from, dist_to = [], [], []
+
+        def add(landmark):
+            landmarks.append(landmark)
+            dist_from.append(shortest_path_tree(graph, landmark, weight)[0])
+            dist_to.append(shortest_path_tree(graph, landmark, weight, reverse=True)[0])
+
+        start = int(rng.integers(graph.n_nodes))
+        for _ in range(min(k, graph.n_nodes)):
+            if strategy == "farthest" or not landmarks:
+                candidate = _farthest(graph, start, dist_from, dist_to, weight)
+            else:
+                table = cls(landmarks, dist_from, dist_to, strategy, weight)
+                candidate = _avoid(graph, table, int(rng.integers(graph.n_nodes)), weight)
+            if candidate in landmarks:
+                candidate = _farthest(graph, start, dist_from, dist_to, weight)
+            if candidate in landmarks:
+                break
+            add(candidate)
+        return cls(landmarks, dist_from, dist_to, strategy, weight, graph_fingerprint(graph))
+
+
+def _finite_bound(bound):
+    # Unreachable pairs give inf - inf; drop those terms rather than guess.
+    return np.maximum(np.nan_to_num(bound, nan=0.0, posinf=0.0, neginf=0.0), 0.0)
+
+
+def _farthest(graph, start, dist_from, dist_to, weight):
+    """Node maximising the round-trip distance to the closest chosen landmark"""
+    if dist_from:
+        round_trip = np.array(dist_from) + np.array(dist_to)
+        score = round_trip.min(axis=0)
+    else:
+        score = shortest_path_tree(graph, start, weight)[0]
+    score = np.where(np.isfinite(score), score, -1.0)
+    return int(np.argmax(score))
+
+
+def _avoid(graph, table, root, weight):
+    """Goldberg & Werneck's "avoid" rule: descend into the subtree of the
+    shortest-path tree from root whose nodes the current landmarks bound worst."""
+    dist, parent, order = shortest_path_tree(graph, root, weight)
+    bound = table.bounds_from(root)
+    weight_v = np.where(np.isfinite(dist), dist - bound, 0.0)
+    size = weight_v.copy()
+    covered = np.zeros(graph.n_nodes, dtype=bool)
+    covered[table.landmarks] = True
+    for v in order[::-1].tolist():
+        p = parent[v]
+        if p != -1:
+            covered[p] |= covered[v]
+            size[p] += size[v]
+    # Subtrees that already contain a landmark are well served.
+    size[covered] = 0.0
+
+    reached = order[parent[order] != -1]
+    children_order = np.argsort(parent[reached], kind="stable")
+    child_nodes = reached[children_order]
+    child_parents = parent[reached][children_order]
+    node = root
+    while True:
+        lo, hi = np.searchsorted(child_parents, [node, node + 1])
+        if lo == hi:
+            return int(node)
+        kids = child_nodes[lo:hi]
+        best = kids[np.argmax(size[kids])]
+        if size[best] <= 0:
+            return int(node)
+        node = int(best)
+
+
+def load_or_build(graph, path, k=16, strategy="avoid"):
+    """Load persisted landmark tables, rebuilding and saving them if missing or built for another graph"""
+    try:
+        table = LandmarkTable.load(path)
+        if table.graph_fingerprint == graph_fingerprint(graph):
+            return table
+    except FileNotFoundError:
+        pass
+    table = LandmarkTable.build(graph, k, strategy)
+    table.save(path)
+    return table
@@ -0,0 +1,129 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+
+import numpy as np
+
+from graph_engine import shared_graph
+from search import endpoint_departures, endpoint_arrivals, endpoint_direct
+
+
+# ---------- MANY-TO-MANY DISTANCE MATRIX ----------
+# Each source row is one Dijkstra from the source that stops as soon as every
+# node a target can be reached from is settled, so an N x M matrix costs N
+# one-to-many searches instead of N * M point-to-point ones.
+
+def matrix_row(graph, source, targets, weight="length"):
+    """Road cost from source to each target (inf where unreachable)"""
+    indptr, indices, costs = graph.adjacency_lists(weight)
+    arrivals = [endpoint_arrivals(target) for target in targets]
+    pending = {node for arrival in arrivals for node in arrival}
+    n = graph.n_nodes
+    dist = [float("inf")] * n
+    settled = bytearray(n)
+    queue = []
+    for node, cost in endpoint_departures(source):
+        if cost < dist[node]:
+            dist[node] = cost
+            heappush(queue, (cost, node))
+    while queue and pending:
+        d, u = heappop(queue)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        pending.discard(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + costs[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                heappush(queue, (nd, v))
+    return np.array([min([dist[node] + cost for node, cost in arrival.items()] + [endpoint_direct(source, target)])
+                     for arrival, target in zip(arrivals, targets)])
+
+
+_worker_graph = None
+
+
+def _init_worker(snapshot_path):
+    global _worker_graph
+    _worker_graph = shared_graph(snapshot_path)
+
+
+def _worker_rows(sources, targets, weight):
+    return [matrix_row(_worker_graph, source, targets, weight) for source in sources]
+
+
+def distance_matrix(graph, sources, targets, weight="length", processes=None, snapshot_path=None, pool=None):
+    """N x M NumPy matrix of road costs between endpoints (node indices or EdgeSnaps).
+
+    Source rows are split into contiguous chunks across worker processes:
+    those of ``pool`` (a long-lived SearchPool, whose workers already hold the
+    graph) when given, else a pool spawned for this call when there is a
+    ``snapshot_path`` and more than one process. Each worker memory-maps the
+    same snapshot, so the graph is shared rather than copied.
+    """
+    sources, targets = list(sources), list(targets)
+    result = np.full((len(sources), len(targets)), np.inf)
+    if not sources or not targets:
+        return result
+    processes = min(processes or (pool.workers if pool is not None else os.cpu_count()) or 1, len(sources))
+    if processes <= 1 or (pool is None and snapshot_path is None):
+        for i, source in enumerate(sources):
+            result[i] = matrix_row(graph, source, targets, weight)
+        return result
+
+    bounds = np.linspace(0, len(sources), processes + 1).astype(int)
+    chunks = [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    if pool is not None:
+        futures = [(lo, pool.submit_rows(sources[lo:hi], targets, weight)) for lo, hi in chunks]
+    else:
+        # Spawned, like SearchPool, so workers never inherit the caller's threads or locks
+        executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(snapshot_path,))
+        futures = [(lo, executor.submit(_worker_rows, sources[lo:hi], targets, weight)) for lo, hi in chunks]
+    try:
+        for lo, future in futures:
+            rows = future.result()
+            result[lo:lo + len(rows)] = rows
+    finally:
+        if pool is None:
+            executor.shutdown(cancel_futures=True)
+    return result
+
+
+def point_matrix(graph, spatial_index, source_points, target_points, to_road=True, weight="length",
+                 processes=None, snapshot_path=None, pool=None):
+    """Snap (lat, lon) sources and targets in one batch, then build their matrix in ``weight`` units"""
+    points = list(source_points) + list(target_points)
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    if to_road:
+        snapped = [snap.with_weight(graph, weight) for snap in spatial_index.nearest_edges(graph, lats, lons)]
+    else:
+        snapped = spatial_index.nearest_nodes(lats, lons)[0].tolist()
+    split = len(source_points)
+    return distance_matrix(graph, snapped[:split], snapped[split:], weight, processes, snapshot_path, pool)
+
+
+# ---------- EXPORT ----------
+def matrix_frame(matrix, source_labels=None, target_labels=None):
+    """Label the matrix as a pandas DataFrame (unreachable cells are left empty)"""
+    import pandas as pd
+
+    rows, cols = matrix.shape
+    return pd.DataFrame(np.where(np.isfinite(matrix), matrix, np.nan),
+                        index=source_labels or [f"S{i + 1}" for i in range(rows)],
+                        columns=target_labels or [f"T{j + 1}" for j in range(cols)])
+
+
+def matrix_csv(matrix, source_labels=None, target_labels=None):
+    return matrix_frame(matrix, source_labels, target_labels).to_csv(float_format="%.1f")
+
+
+def matrix_parquet(matrix, source_labels=None, target_labels=None):
+    buf = io.BytesIO()
+    matrix_frame(matrix, source_labels, target_labels).to_parquet(buf)
+    return buf.getvalue()
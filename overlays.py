@@ -0,0 +1,77 @@
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+# Longest side of the explored-node heatmap; the PNG payload is bounded by
+# this, however many nodes a search settles.
+OVERLAY_PIXELS = 768
+# Any pixel holding at least one node is drawn at this opacity or more.
+MIN_ALPHA = 90
+
+
+# ---------- EXPLORED-NODE HEATMAP ----------
+def _mercator_y(lat):
+    lat = np.radians(lat)
+    return np.log(np.tan(np.pi / 4 + lat / 2))
+
+
+def network_bounds(graph):
+    """[[south, west], [north, east]] of the graph's nodes"""
+    return [[float(graph.lat.min()), float(graph.lon.min())],
+            [float(graph.lat.max()), float(graph.lon.max())]]
+
+
+class DensityRaster:
+    """Explored-node counts binned in Web Mercator over the network's bounding box.
+
+    Nodes can be added in batches (e.g. from search.stream_search frames);
+    memory stays at one fixed-size grid however many nodes are added.
+    """
+
+    def __init__(self, graph, pixels=OVERLAY_PIXELS):
+        self.graph = graph
+        (south, west), (north, east) = self.bounds = network_bounds(graph)
+        self._y_range = (_mercator_y(south), _mercator_y(north))
+        self._x_range = (west, east)
+        y_span = self._y_range[1] - self._y_range[0]
+        x_span = np.radians(east - west)
+        width = pixels if x_span >= y_span else max(1, int(pixels * x_span / y_span))
+        height = pixels if y_span >= x_span else max(1, int(pixels * y_span / x_span))
+        self.counts = np.zeros((height, width))
+
+    def add(self, nodes):
+        nodes = np.asarray(nodes, dtype=np.int64)
+        if len(nodes):
+            counts, _, _ = np.histogram2d(_mercator_y(self.graph.lat[nodes]), self.graph.lon[nodes],
+                                          bins=self.counts.shape, range=(self._y_range, self._x_range))
+            self.counts += counts
+
+    def image(self, color):
+        """The counts as a transparent PNG data URL, log-scaled alpha in ``color``"""
+        counts = self.counts[::-1]  # image rows run north to south
+        alpha = np.zeros(counts.shape, dtype=np.uint8)
+        if counts.max() > 0:
+            scaled = np.log1p(counts) / np.log1p(counts.max())
+            alpha = np.where(counts > 0, MIN_ALPHA + (255 - MIN_ALPHA) * scaled, 0).astype(np.uint8)
+
+        rgb = [int(color.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4)]
+        rgba = np.empty(counts.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = rgb
+        rgba[..., 3] = alpha
+        buf = io.BytesIO()
+        Image.fromarray(rgba, "RGBA").save(buf, format="PNG", optimize=True)
+        return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def density_overlay(graph, nodes, color, pixels=OVERLAY_PIXELS):
+    """Rasterize every explored node into one transparent PNG heatmap.
+
+    Nodes are binned in Web Mercator over the network's bounding box, so the
+    image lines up with the tiles when Leaflet stretches it between the
+    returned bounds. Returns (PNG data URL, bounds).
+    """
+    raster = DensityRaster(graph, pixels)
+    raster.add(nodes)
+    return raster.image(color), raster.bounds
@@ -0,0 +1,201 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from graph_engine import write_arrays, read_arrays
+
+# Prefix-block entries inspected per completion; keeps one-letter queries cheap
+PREFIX_SCAN = 256
+# Minimum share of the query's trigrams a name must contain for a fuzzy match
+FUZZY_MIN_SCORE = 0.5
+
+
+# ---------- NORMALIZATION ----------
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def _trigrams(key):
+    """Trigram codes of a normalized key, padded so word edges count"""
+    padded = f"  {key} "
+    return {(ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+            for i in range(len(padded) - 2)}
+
+
+def _street_names(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+# ---------- PLACE INDEX ----------
+class PlaceIndex:
+    """Offline street-name and POI lookup returning coordinates.
+
+    Completion uses a trie flattened into a sorted array: every word-start
+    suffix of every normalized name ("station", "railway station", ...) is a
+    key, so the keys sharing a prefix form one contiguous block found by
+    binary search. Misspellings fall back to a trigram inverted index scored
+    by how many of the query's trigrams a name contains, so a typo in one
+    word still finds a longer name. Results are (name, lat, lon, kind) tuples.
+    """
+
+    def __init__(self, names, lat, lon, kinds, kind_names, suffix_entry, suffix_offset,
+                 gram_codes, gram_indptr, gram_entries, gram_counts):
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        self.kinds = kinds
+        self.kind_names = kind_names
+        self._suffix_entry = suffix_entry
+        self._suffix_offset = suffix_offset
+        self._gram_codes = gram_codes
+        self._gram_indptr = gram_indptr
+        self._gram_entries = gram_entries
+        self._gram_counts = gram_counts
+        self._normalized = [normalize(name) for name in names]
+        self._keys = [self._normalized[e][o:] for e, o in zip(suffix_entry.tolist(), suffix_offset.tolist())]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _place(self, entry):
+        return (self.names[entry], float(self.lat[entry]), float(self.lon[entry]),
+                self.kind_names[self.kinds[entry]])
+
+    # --- lookup ---
+    def complete(self, query, limit=8):
+        """Entries with a word starting with ``query``; whole-name prefixes and shorter names first"""
+        key = normalize(query)
+        if not key:
+            return []
+        start = bisect_left(self._keys, key)
+        ranked = {}
+        for i in range(start, min(start + PREFIX_SCAN, len(self._keys))):
+            if not self._keys[i].startswith(key):
+                break
+            entry = int(self._suffix_entry[i])
+            rank = (self._suffix_offset[i] > 0, len(self._normalized[entry]))
+            if entry not in ranked or rank < ranked[entry]:
+                ranked[entry] = rank
+        return [self._place(e) for e in sorted(ranked, key=ranked.get)[:limit]]
+
+    def fuzzy(self, query, limit=8, min_score=FUZZY_MIN_SCORE):
+        """Entries containing the most of ``query``'s trigrams (tolerates typos); closer lengths first on ties"""
+        grams = np.fromiter(_trigrams(normalize(query)), dtype=np.int64)
+        if not len(grams) or not len(self._gram_codes):
+            return []
+        slots = np.searchsorted(self._gram_codes, grams)
+        slots = slots[(slots < len(self._gram_codes)) & (self._gram_codes[np.minimum(slots, len(self._gram_codes) - 1)] == grams)]
+        if not len(slots):
+            return []
+        hits = np.concatenate([self._gram_entries[self._gram_indptr[s]:self._gram_indptr[s + 1]] for s in slots])
+        entries, shared = np.unique(hits, return_counts=True)
+        coverage = shared / len(grams)
+        similarity = shared / (len(grams) + self._gram_counts[entries] - shared)
+        order = np.lexsort((-similarity, -coverage))[:limit]
+        return [self._place(int(entries[i])) for i in order if coverage[i] >= min_score]
+
+    def search(self, query, limit=8):
+        """Prefix completions, topped up with fuzzy matches"""
+        results = self.complete(query, limit)
+        if len(results) < limit:
+            seen = {r[0] for r in results}
+            results += [r for r in self.fuzzy(query, limit) if r[0] not in seen][:limit - len(results)]
+        return results
+
+    # --- persistence ---
+    def save(self, path):
+        encoded = [name.encode("utf-8") for name in self.names]
+        name_indptr = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=name_indptr[1:])
+        write_arrays(path, {
+            "name_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8), "name_indptr": name_indptr,
+            "lat": self.lat, "lon": self.lon, "kinds": self.kinds,
+            "suffix_entry": self._suffix_entry, "suffix_offset": self._suffix_offset,
+            "gram_codes": self._gram_codes, "gram_indptr": self._gram_indptr,
+            "gram_entries": self._gram_entries, "gram_counts": self._gram_counts,
+        }, {"kinds": list(self.kind_names)})
+
+    @classmethod
+    def load(cls, path):
+        arrays, meta = read_arrays(path)
+        blob, indptr = bytes(arrays["name_bytes"]), arrays["name_indptr"].tolist()
+        names = [blob[indptr[i]:indptr[i + 1]].decode("utf-8") for i in range(len(indptr) - 1)]
+        return cls(names, arrays["lat"], arrays["lon"], arrays["kinds"], meta["kinds"],
+                   arrays["suffix_entry"], arrays["suffix_offset"], arrays["gram_codes"],
+                   arrays["gram_indptr"], arrays["gram_entries"], arrays["gram_counts"])
+
+    # --- preprocessing ---
+    @classmethod
+    def from_places(cls, places):
+        """Index (name, lat, lon, kind) tuples; names equal after normalization keep the first"""
+        names, lat, lon, kinds, kind_codes, seen = [], [], [], [], {}, set()
+        for name, place_lat, place_lon, kind in places:
+            key = normalize(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            names.append(str(name))
+            lat.append(place_lat)
+            lon.append(place_lon)
+            kinds.append(kind_codes.setdefault(kind, len(kind_codes)))
+
+        suffixes = []
+        postings = {}
+        gram_counts = []
+        for entry, name in enumerate(names):
+            key = normalize(name)
+            suffixes += [(key[m.start():], entry, m.start()) for m in re.finditer(r"\S+", key)]
+            grams = _trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        suffixes.sort()
+        codes = sorted(postings)
+        gram_indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum([len(postings[c]) for c in codes], out=gram_indptr[1:])
+        return cls(names, np.array(lat, dtype=np.float64), np.array(lon, dtype=np.float64),
+                   np.array(kinds, dtype=np.int32), list(kind_codes),
+                   np.array([e for _, e, _ in suffixes], dtype=np.int32),
+                   np.array([o for _, _, o in suffixes], dtype=np.int32),
+                   np.array(codes, dtype=np.int64), gram_indptr,
+                   np.array([e for c in codes for e in postings[c]], dtype=np.int32),
+                   np.array(gram_counts, dtype=np.int32))
+
+    @classmethod
+    def build(cls, G, pois=()):
+        """Index the street names (and ``ref`` numbers) of an osmnx graph plus extra POIs.
+
+        Each street is placed at its node nearest the centroid of all its
+        nodes, so the coordinates lie on the road. ``pois`` are (name, lat,
+        lon, kind) tuples, e.g. from osmnx.features_from_point.
+        """
+        streets = {}
+        for u, v, data in G.edges(data=True):
+            for kind, attr in (("street", "name"), ("road", "ref")):
+                for name in _street_names(data.get(attr)):
+                    streets.setdefault((name, kind), set()).update((u, v))
+        places = list(pois)
+        for node, data in G.nodes(data=True):
+            if data.get("name"):
+                places.append((data["name"], data["y"], data["x"], "place"))
+        for (name, kind), nodes in sorted(streets.items()):
+            ys = np.array([G.nodes[n]["y"] for n in nodes])
+            xs = np.array([G.nodes[n]["x"] for n in nodes])
+            mid = int(np.argmin((ys - ys.mean()) ** 2 + ((xs - xs.mean()) * np.cos(np.radians(ys.mean()))) ** 2))
+            places.append((name, float(ys[mid]), float(xs[mid]), kind))
+        return cls.from_places(places)
+
+
+def load(path):
+    """The persisted index, or None when get_data.py has not built it"""
+    try:
+        return PlaceIndex.load(path)
+    except FileNotFoundError:
+        return None
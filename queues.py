@@ -0,0 +1,212 @@
+import time
+from heapq import heappush, heappop
+
+import networkx as nx
+import numpy as np
+
+
+# ---------- PRIORITY QUEUES ----------
+# Every queue supports push(key, node) -- insert, or lower the key of a node
+# already queued -- and pop() -> (key, node) in non-decreasing key order.
+# Lazy queues may hand back superseded (stale) entries; searches skip nodes
+# they have already settled. Each queue counts its pushes and pops.
+
+class BinaryHeap:
+    """heapq with lazy deletion: every improvement pushes a new entry"""
+
+    def __init__(self, n=None):
+        self._heap = []
+        self.pushes = 0
+        self.pops = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, key, node):
+        self.pushes += 1
+        heappush(self._heap, (key, node))
+
+    def pop(self):
+        self.pops += 1
+        return heappop(self._heap)
+
+
+class IndexedDaryHeap:
+    """d-ary heap with a position index, so improvements are a decrease-key
+    and the queue never holds more than one entry per node"""
+
+    def __init__(self, n, d=4):
+        self.d = d
+        self._nodes = []
+        self._keys = []
+        self._pos = [-1] * n
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def push(self, key, node):
+        self.pushes += 1
+        i = self._pos[node]
+        if i == -1:
+            i = len(self._nodes)
+            self._nodes.append(node)
+            self._keys.append(key)
+            self._pos[node] = i
+        elif key < self._keys[i]:
+            self.decreases += 1
+            self._keys[i] = key
+        else:
+            return
+        self._sift_up(i)
+
+    def pop(self):
+        self.pops += 1
+        nodes, keys, pos = self._nodes, self._keys, self._pos
+        top_key, top = keys[0], nodes[0]
+        pos[top] = -1
+        last_node, last_key = nodes.pop(), keys.pop()
+        if nodes:
+            nodes[0], keys[0] = last_node, last_key
+            pos[last_node] = 0
+            self._sift_down(0)
+        return top_key, top
+
+    def _sift_up(self, i):
+        nodes, keys, pos, d = self._nodes, self._keys, self._pos, self.d
+        node, key = nodes[i], keys[i]
+        while i > 0:
+            parent = (i - 1) // d
+            if keys[parent] <= key:
+                break
+            nodes[i], keys[i] = nodes[parent], keys[parent]
+            pos[nodes[i]] = i
+            i = parent
+        nodes[i], keys[i] = node, key
+        pos[node] = i
+
+    def _sift_down(self, i):
+        nodes, keys, pos, d = self._nodes, self._keys, self._pos, self.d
+        size = len(nodes)
+        node, key = nodes[i], keys[i]
+        while True:
+            first = d * i + 1
+            if first >= size:
+                break
+            last = min(first + d, size)
+            child = min(range(first, last), key=keys.__getitem__)
+            if keys[child] >= key:
+                break
+            nodes[i], keys[i] = nodes[child], keys[child]
+            pos[nodes[i]] = i
+            i = child
+        nodes[i], keys[i] = node, key
+        pos[node] = i
+
+
+class RadixHeap:
+    """Monotone radix heap over integer-quantized keys (lazy deletion).
+
+    Keys are floored to multiples of ``quantum`` metres and bucketed by the
+    highest bit in which they differ from the last popped key, so a push is
+    O(1) and each entry is redistributed at most ~log2(range) times. Keys must
+    never drop below the last popped key, which holds for Dijkstra and for A*
+    with a consistent heuristic. Entries in the same quantum may pop in any
+    order, so distances can be off by at most one quantum (1 cm by default).
+    """
+
+    def __init__(self, n=None, quantum=0.01):
+        self.quantum = quantum
+        self._buckets = [[] for _ in range(65)]
+        self._last = 0
+        self._size = 0
+        self.pushes = 0
+        self.pops = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, key, node):
+        self.pushes += 1
+        q = max(int(key / self.quantum), self._last)
+        self._buckets[(q ^ self._last).bit_length()].append((q, key, node))
+        self._size += 1
+
+    def pop(self):
+        self.pops += 1
+        buckets = self._buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            entries = buckets[i]
+            buckets[i] = []
+            self._last = last = min(entry[0] for entry in entries)
+            for entry in entries:
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+        _, key, node = buckets[0].pop()
+        self._size -= 1
+        return key, node
+
+
+QUEUES = {
+    "binary": BinaryHeap,
+    "dary": IndexedDaryHeap,
+    "radix": RadixHeap,
+}
+
+
+def make_queue(queue, n):
+    """Build a queue from a QUEUES name or a factory taking the node count"""
+    if isinstance(queue, str):
+        if queue not in QUEUES:
+            raise ValueError(f"Unknown queue: {queue} (choose from {', '.join(QUEUES)})")
+        return QUEUES[queue](n)
+    return queue(n)
+
+
+# ---------- BENCHMARK ----------
+def benchmark_queues(graph, queries=200, seed=0, weight="length"):
+    """Run the same random Dijkstra queries with every queue; returns one row per queue"""
+    from search import dijkstra_path_with_explored_nodes
+
+    rng = np.random.default_rng(seed)
+    pairs = [tuple(int(x) for x in rng.integers(graph.n_nodes, size=2)) for _ in range(queries)]
+    graph.adjacency_lists(weight)
+    rows = []
+    for name, factory in QUEUES.items():
+        made = []
+
+        def counted(n, factory=factory):
+            made.append(factory(n))
+            return made[-1]
+
+        started = time.perf_counter()
+        for s, t in pairs:
+            try:
+                dijkstra_path_with_explored_nodes(graph, s, t, weight=weight, queue=counted)
+            except nx.NetworkXNoPath:
+                pass
+        elapsed = time.perf_counter() - started
+        rows.append({
+            "queue": name,
+            "queries": len(pairs),
+            "pushes": sum(q.pushes for q in made),
+            "pops": sum(q.pops for q in made),
+            "wall_ms": 1000 * elapsed,
+            "ms_per_query": 1000 * elapsed / len(pairs),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    from graph_engine import load_snapshot
+
+    compiled = load_snapshot("ahmednagar.graph")
+    print(f"⏳ Benchmarking priority queues on {compiled.n_nodes:,} nodes...")
+    print(f"{'queue':<8} {'pushes':>12} {'pops':>12} {'wall (ms)':>12} {'ms/query':>10}")
+    for row in benchmark_queues(compiled):
+        print(f"{row['queue']:<8} {row['pushes']:>12,} {row['pops']:>12,} "
+              f"{row['wall_ms']:>12.1f} {row['ms_per_query']:>10.2f}")
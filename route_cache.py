@@ -0,0 +1,188 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from graph_engine import write_arrays, read_arrays, graph_fingerprint
+
+ROUTE_CACHE_DIR = os.path.join("cache", "routes")
+# Fixed per-entry overhead (dict slots, meta) added to the array bytes.
+_ENTRY_OVERHEAD = 256
+
+
+# ---------- COMPACT NODE SEQUENCES ----------
+def pack_nodes(nodes):
+    """Encode node indices as zlib-compressed int32 deltas (a uint8 array).
+
+    Settle-order explored lists are spatially coherent, so the deltas are
+    small and compress to a fraction of the raw int32 size.
+    """
+    deltas = np.diff(np.asarray(nodes, dtype=np.int32), prepend=np.int32(0))
+    return np.frombuffer(zlib.compress(deltas.tobytes(), 1), dtype=np.uint8)
+
+
+def unpack_nodes(packed):
+    """Inverse of pack_nodes, as an int32 array"""
+    deltas = np.frombuffer(zlib.decompress(packed.tobytes()), dtype=np.int32)
+    return np.cumsum(deltas, dtype=np.int32)
+
+
+# ---------- ROUTE RESULT CACHE ----------
+class CachedRoute:
+    """One cached search result: path, explored count/list and its telemetry"""
+
+    def __init__(self, path, explored_count, explored, telemetry):
+        self.path = path
+        self.explored_count = explored_count
+        self._explored = explored
+        self.telemetry = telemetry
+
+    @property
+    def nbytes(self):
+        return self.path.nbytes + (self._explored.nbytes if self._explored is not None else 0) + _ENTRY_OVERHEAD
+
+    def explored_list(self):
+        """Decompress the settle-order explored list (empty if it was not stored)"""
+        if self._explored is None:
+            return []
+        return unpack_nodes(self._explored).tolist()
+
+
+class RouteCache:
+    """Process-wide LRU of search results shared by every session.
+
+    Entries are keyed by the snapped endpoints, weight profile, algorithm and
+    whether peak memory was traced (so a traced request never gets telemetry
+    without memory numbers), and bounded in memory by both entry count and
+    bytes. Every entry is also written to ``directory`` under the SHA-1 of
+    its key (the same content-addressed layout as osmnx's ``cache/``), so
+    results survive restarts; the directory keeps at most
+    ``max_disk_entries`` files.
+    """
+
+    def __init__(self, graph, directory=ROUTE_CACHE_DIR, max_entries=512,
+                 max_bytes=64 * 1024 * 1024, max_disk_entries=4096, store_explored=True):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self.store_explored = store_explored
+        self._graph_tag = graph_fingerprint(graph)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, target, weight, algorithm, trace_memory=False):
+        """Content key for one query; endpoints may be node indices or EdgeSnaps"""
+        parts = [self._graph_tag, _endpoint_key(source), _endpoint_key(target), weight, algorithm]
+        if trace_memory:
+            parts.append("traced")
+        text = "|".join(parts)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.directory, f"{key}.route")
+
+    # --- lookup ---
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._insert(key, entry)
+        return entry
+
+    def put(self, key, path, explored_list, telemetry=None):
+        explored = None
+        if self.store_explored and len(explored_list):
+            explored = pack_nodes(explored_list)
+        entry = CachedRoute(np.asarray(path, dtype=np.int32), len(explored_list), explored, telemetry or {})
+        with self._lock:
+            self._insert(key, entry)
+        self._save(key, entry)
+        return entry
+
+    def result(self, key):
+        """(path, explored_count, explored_list, telemetry, True) for a cached key, else None"""
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return entry.path.tolist(), entry.explored_count, entry.explored_list(), entry.telemetry, True
+
+    def _insert(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    # --- persistence ---
+    def _save(self, key, entry):
+        arrays = {"path": entry.path}
+        if entry._explored is not None:
+            arrays["explored"] = entry._explored
+        try:
+            write_arrays(self._file(key), arrays, {"explored_count": entry.explored_count,
+                                                   "telemetry": entry.telemetry})
+            self._prune_disk()
+        except OSError:
+            pass  # Disk persistence is best effort; the memory tier still works.
+
+    def _load(self, key):
+        path = self._file(key)
+        try:
+            arrays, meta = read_arrays(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        explored = np.array(arrays["explored"]) if "explored" in arrays else None
+        return CachedRoute(np.array(arrays["path"]), meta["explored_count"], explored, meta["telemetry"])
+
+    def _prune_disk(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".route")]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # --- telemetry ---
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+
+def _endpoint_key(endpoint):
+    if hasattr(endpoint, "departures"):
+        return f"e{int(endpoint.arc)}:{float(endpoint.fraction)!r}"
+    return f"n{int(endpoint)}"
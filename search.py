@@ -0,0 +1,689 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from heapq import heappush, heappop
+
+import networkx as nx
+import numpy as np
+
+from queues import make_queue
+
+
+# ---------- SEARCH KERNELS ON THE COMPILED GRAPH ----------
+# All kernels take compiled node indices (see graph_engine.CompiledGraph) and
+# return (path, explored_count, explored_list) with the path as indices.
+# A source or target may also be a virtual mid-edge endpoint (an
+# spatial_index.EdgeSnap); the path then runs between the snapped edge's nodes.
+
+def _check_endpoints(graph, source, target):
+    n = graph.n_nodes
+    for endpoint in (source, target):
+        if hasattr(endpoint, "departures"):
+            continue
+        if not 0 <= endpoint < n:
+            raise nx.NodeNotFound("Source or target not in graph.")
+
+
+def endpoint_departures(source):
+    return source.departures if hasattr(source, "departures") else [(source, 0.0)]
+
+
+def endpoint_arrivals(target):
+    return target.arrivals if hasattr(target, "arrivals") else {target: 0.0}
+
+
+def endpoint_direct(source, target):
+    """Cost of the road between two EdgeSnaps on the same arc (no node visited), else inf.
+
+    Kernels start with this as their best candidate; when it wins, the
+    returned path is empty.
+    """
+    if hasattr(source, "direct_cost") and hasattr(target, "direct_cost"):
+        return source.direct_cost(target)
+    return float("inf")
+
+
+def _record(stats, scans, pushes, pops, stale, peak):
+    """Fill a telemetry.SearchStats once a search has finished.
+
+    ``scans`` pairs each adjacency indptr with the nodes settled over it.
+    """
+    stats.record(nodes_settled=sum(len(nodes) for _, nodes in scans),
+                 edges_relaxed=sum(indptr[u + 1] - indptr[u] for indptr, nodes in scans for u in nodes),
+                 heap_pushes=pushes, heap_pops=pops, stale_pops=stale, peak_queue=peak)
+
+
+def _unwind(parent, node):
+    if node == -1:
+        return []  # the direct same-arc route won
+    path = [node]
+    while parent[node] != -1:
+        node = parent[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def dijkstra_path_with_explored_nodes(graph, source, target, weight="length", queue=None, stats=None):
+    if queue is not None:
+        return _queue_search(graph, source, target, None, weight, queue, stats)
+    _check_endpoints(graph, source, target)
+    indptr, indices, costs = graph.adjacency_lists(weight)
+    n = graph.n_nodes
+    dist = [float("inf")] * n
+    parent = [-1] * n
+    settled = bytearray(n)
+    queue = []
+    for node, cost in endpoint_departures(source):
+        if cost < dist[node]:
+            dist[node] = cost
+            heappush(queue, (cost, node))
+    arrivals = endpoint_arrivals(target)
+    best, best_node = endpoint_direct(source, target), -1
+    explored_nodes_list = []
+    tracking = stats is not None
+    pops = stale = peak = 0
+    while queue:
+        if tracking:
+            pops += 1
+            peak = max(peak, len(queue))
+        d, u = heappop(queue)
+        if settled[u]:
+            stale += 1
+            continue
+        if u in arrivals and d + arrivals[u] < best:
+            best, best_node = d + arrivals[u], u
+        if d >= best:
+            break
+        settled[u] = 1
+        explored_nodes_list.append(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if settled[v]:
+                continue
+            nd = d + costs[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                heappush(queue, (nd, v))
+    if tracking:
+        _record(stats, [(indptr, explored_nodes_list)], pops + len(queue), pops, stale, peak)
+    if best == float("inf"):
+        raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+    return (_unwind(parent, best_node), len(explored_nodes_list), explored_nodes_list)
+
+
+# ---------- PER-QUERY HEURISTIC TABLES ----------
+EARTH_RADIUS_M = 6371000.0
+# The equirectangular approximation uses the target's latitude for the
+# longitude scale; across the 30 km study area that misestimates by well
+# under 1%, so scaling by 0.99 keeps it a lower bound.
+EQUIRECTANGULAR_SAFETY = 0.99
+
+
+class QueryHeuristic:
+    """Lower bounds for one query, held as vectors over all nodes.
+
+    ``bounds_to(target)`` and ``bounds_from(source)`` each return a NumPy array
+    of lower bounds and are only evaluated when first needed. Calling the
+    object as heuristic(u, v) keeps the plain-callable interface; the kernels
+    index the vectors directly instead.
+    """
+
+    def __init__(self, source, target, bounds_to, bounds_from):
+        self.source = source
+        self.target = target
+        self._bounds_to = bounds_to
+        self._bounds_from = bounds_from
+        self._vectors = {}
+        self._lists = {}
+
+    def _vector(self, key):
+        if key not in self._vectors:
+            self._vectors[key] = (self._bounds_to(self.target) if key == "to"
+                                  else self._bounds_from(self.source))
+        return self._vectors[key]
+
+    def _list(self, key):
+        if key not in self._lists:
+            self._lists[key] = self._vector(key).tolist()
+        return self._lists[key]
+
+    def to_target(self):
+        """Lower bound from every node to the target, as a list"""
+        return self._list("to")
+
+    def from_source(self):
+        """Lower bound from the source to every node, as a list"""
+        return self._list("from")
+
+    def potential(self):
+        """Averaged bidirectional potential (h_target - h_source) / 2, as a list"""
+        return (0.5 * (self._vector("to") - self._vector("from"))).tolist()
+
+    def scaled(self, factor):
+        """The same bounds multiplied by ``factor`` (e.g. a profile's heuristic scale)"""
+        if factor == 1.0:
+            return self
+        return QueryHeuristic(self.source, self.target, lambda target: factor * self._bounds_to(target),
+                              lambda source: factor * self._bounds_from(source))
+
+    def __call__(self, u, v):
+        # Node ids compare by value: equal ids from tolist() or int() need not be one object
+        if v == self.target and not hasattr(u, "departures"):
+            return self.to_target()[u]
+        if u == self.source:
+            return self.from_source()[v]
+        raise ValueError("Query heuristics only answer queries to the target or from the source")
+
+
+def _endpoint_radians(graph, endpoint):
+    if hasattr(endpoint, "departures"):
+        return np.radians(endpoint.lat), np.radians(endpoint.lon)
+    lat, lon, _ = graph.radian_coords()
+    return lat[endpoint], lon[endpoint]
+
+
+def haversine_bounds(graph, endpoint):
+    """Great-circle distance (m) from every node to a node or snapped point"""
+    lat, lon, cos_lat = graph.radian_coords()
+    lat_e, lon_e = _endpoint_radians(graph, endpoint)
+    a = np.sin((lat - lat_e) / 2) ** 2 + cos_lat * np.cos(lat_e) * np.sin((lon - lon_e) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def equirectangular_bounds(graph, endpoint, safety=EQUIRECTANGULAR_SAFETY):
+    """Cheaper flat-earth distance (m), scaled down so it stays admissible"""
+    lat, lon, _ = graph.radian_coords()
+    lat_e, lon_e = _endpoint_radians(graph, endpoint)
+    dx = (lon - lon_e) * np.cos(lat_e)
+    dy = lat - lat_e
+    return safety * EARTH_RADIUS_M * np.sqrt(dx * dx + dy * dy)
+
+
+def haversine_heuristic(graph, source, target, weight="length"):
+    """Great-circle lower bound, in ``weight`` units via the profile's heuristic scale"""
+    scale = graph.heuristic_scale(weight)
+    bounds = lambda endpoint: scale * haversine_bounds(graph, endpoint)
+    return QueryHeuristic(source, target, bounds, bounds)
+
+
+def equirectangular_heuristic(graph, source, target, safety=EQUIRECTANGULAR_SAFETY, weight="length"):
+    scale = graph.heuristic_scale(weight) * safety
+    bounds = lambda endpoint: equirectangular_bounds(graph, endpoint, scale)
+    return QueryHeuristic(source, target, bounds, bounds)
+
+
+# ---------- A* ----------
+def astar_path_with_explored_nodes(graph, source, target, heuristic=None, weight="length", queue=None, stats=None):
+    if queue is not None:
+        return _queue_search(graph, source, target, heuristic, weight, queue, stats)
+    _check_endpoints(graph, source, target)
+    if heuristic is None:
+        heuristic = lambda u, v: 0
+    table = heuristic.to_target() if isinstance(heuristic, QueryHeuristic) else None
+    indptr, indices, costs = graph.adjacency_lists(weight)
+    n = graph.n_nodes
+    g_score = [float("inf")] * n
+    parent = [-1] * n
+    settled = bytearray(n)
+    queue = []
+    for node, cost in endpoint_departures(source):
+        if cost < g_score[node]:
+            g_score[node] = cost
+            h = table[node] if table is not None else heuristic(node, target)
+            heappush(queue, (cost + h, cost, node))
+    arrivals = endpoint_arrivals(target)
+    best, best_node = endpoint_direct(source, target), -1
+    explored_nodes_list = []
+    tracking = stats is not None
+    pops = stale = peak = 0
+    while queue:
+        if tracking:
+            pops += 1
+            peak = max(peak, len(queue))
+        f, g, u = heappop(queue)
+        if settled[u]:
+            stale += 1
+            continue
+        if u in arrivals and g + arrivals[u] < best:
+            best, best_node = g + arrivals[u], u
+        if f >= best:
+            break
+        settled[u] = 1
+        explored_nodes_list.append(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if settled[v]:
+                continue
+            ng = g + costs[k]
+            if ng < g_score[v]:
+                g_score[v] = ng
+                parent[v] = u
+                h = table[v] if table is not None else heuristic(v, target)
+                heappush(queue, (ng + h, ng, v))
+    if tracking:
+        _record(stats, [(indptr, explored_nodes_list)], pops + len(queue), pops, stale, peak)
+    if best == float("inf"):
+        raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+    return (_unwind(parent, best_node), len(explored_nodes_list), explored_nodes_list)
+
+
+# ---------- PLUGGABLE-QUEUE SEARCH ----------
+def _queue_search(graph, source, target, heuristic, weight, queue, stats=None):
+    """Dijkstra/A* driving a queues.py priority queue instead of inline heapq.
+
+    ``queue`` is a queues.QUEUES name or a factory taking the node count.
+    The inline kernels above stay the default; this path exists to compare
+    queue implementations on identical searches.
+    """
+    _check_endpoints(graph, source, target)
+    if heuristic is None:
+        table = None
+        heuristic = lambda u, v: 0
+    else:
+        table = heuristic.to_target() if isinstance(heuristic, QueryHeuristic) else None
+    indptr, indices, costs = graph.adjacency_lists(weight)
+    n = graph.n_nodes
+    g_score = [float("inf")] * n
+    parent = [-1] * n
+    settled = bytearray(n)
+    pq = make_queue(queue, n)
+    for node, cost in endpoint_departures(source):
+        if cost < g_score[node]:
+            g_score[node] = cost
+            pq.push(cost + (table[node] if table is not None else heuristic(node, target)), node)
+    arrivals = endpoint_arrivals(target)
+    best, best_node = endpoint_direct(source, target), -1
+    explored_nodes_list = []
+    tracking = stats is not None
+    stale = peak = 0
+    while pq:
+        if tracking:
+            peak = max(peak, len(pq))
+        f, u = pq.pop()
+        if settled[u]:
+            stale += 1
+            continue
+        g = g_score[u]
+        if u in arrivals and g + arrivals[u] < best:
+            best, best_node = g + arrivals[u], u
+        if f >= best:
+            break
+        settled[u] = 1
+        explored_nodes_list.append(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if settled[v]:
+                continue
+            ng = g + costs[k]
+            if ng < g_score[v]:
+                g_score[v] = ng
+                parent[v] = u
+                pq.push(ng + (table[v] if table is not None else heuristic(v, target)), v)
+    if tracking:
+        _record(stats, [(indptr, explored_nodes_list)], pq.pushes, pq.pops, stale, peak)
+    if best == float("inf"):
+        raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+    return (_unwind(parent, best_node), len(explored_nodes_list), explored_nodes_list)
+
+
+# ---------- BIDIRECTIONAL SEARCH ----------
+def _bidirectional_search(graph, source, target, potential, weight, stats=None):
+    """Bidirectional Dijkstra over reduced costs.
+
+    ``potential[v]`` is the forward potential; the backward search uses its
+    negation, so both searches see the same non-negative reduced arc costs
+    and the usual stopping rule (top_forward + top_backward >= best) is exact.
+    """
+    _check_endpoints(graph, source, target)
+    adjacency = (graph.adjacency_lists(weight), graph.reverse_adjacency_lists(weight))
+    n = graph.n_nodes
+    inf = float("inf")
+    dist = ([inf] * n, [inf] * n)
+    parent = ([-1] * n, [-1] * n)
+    settled = (bytearray(n), bytearray(n))
+    queues = ([], [])
+    sign = (1, -1)
+
+    seeds = (endpoint_departures(source), endpoint_arrivals(target).items())
+    for side in (0, 1):
+        for node, cost in seeds[side]:
+            if cost < dist[side][node]:
+                dist[side][node] = cost
+                heappush(queues[side], (cost + sign[side] * potential[node], node))
+    best, meet = endpoint_direct(source, target), -1
+    for node, _ in seeds[0]:
+        if dist[0][node] + dist[1][node] < best:
+            best, meet = dist[0][node] + dist[1][node], node
+
+    explored_nodes_list = []
+    tracking = stats is not None
+    pops = stale = peak = 0
+    while queues[0] and queues[1]:
+        if queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        if tracking:
+            pops += 1
+            peak = max(peak, len(queues[0]) + len(queues[1]))
+        _, u = heappop(queues[side])
+        done = settled[side]
+        if done[u]:
+            stale += 1
+            continue
+        done[u] = 1
+        explored_nodes_list.append(u)
+        indptr, indices, costs = adjacency[side]
+        here, there = dist[side], dist[1 - side]
+        dist_u = here[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if done[v]:
+                continue
+            nd = dist_u + costs[k]
+            if nd < here[v]:
+                here[v] = nd
+                parent[side][v] = u
+                heappush(queues[side], (nd + sign[side] * potential[v], v))
+                if nd + there[v] < best:
+                    best, meet = nd + there[v], v
+
+    if tracking:
+        scans = [(adjacency[side][0], np.flatnonzero(np.frombuffer(settled[side], dtype=np.uint8)).tolist())
+                 for side in (0, 1)]
+        _record(stats, scans, pops + len(queues[0]) + len(queues[1]), pops, stale, peak)
+    if best == inf:
+        raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+    path = _unwind(parent[0], meet)
+    node = parent[1][meet] if meet != -1 else -1
+    while node != -1:
+        path.append(node)
+        node = parent[1][node]
+    return (path, len(explored_nodes_list), explored_nodes_list)
+
+
+class _LazyPotential(dict):
+    """potential[v] for a plain heuristic callable, computed on first use"""
+
+    def __init__(self, heuristic, source, target):
+        super().__init__()
+        self.heuristic, self.source, self.target = heuristic, source, target
+
+    def __missing__(self, v):
+        p = self[v] = 0.5 * (self.heuristic(v, self.target) - self.heuristic(self.source, v))
+        return p
+
+
+def bidirectional_dijkstra_path_with_explored_nodes(graph, source, target, weight="length", stats=None):
+    return _bidirectional_search(graph, source, target, [0.0] * graph.n_nodes, weight, stats)
+
+
+def bidirectional_astar_path_with_explored_nodes(graph, source, target, heuristic=None, weight="length", stats=None):
+    if heuristic is None:
+        return bidirectional_dijkstra_path_with_explored_nodes(graph, source, target, weight, stats)
+    # Average of the forward and backward estimates: consistent for both
+    # directions whenever the heuristic itself is consistent.
+    if isinstance(heuristic, QueryHeuristic):
+        potential = heuristic.potential()
+    else:
+        potential = _LazyPotential(heuristic, source, target)
+    return _bidirectional_search(graph, source, target, potential, weight, stats)
+
+
+# ---------- STREAMING SEARCH ----------
+# Settlements between two yielded frames
+STREAM_EVERY = 250
+
+
+class SearchFrame:
+    """One snapshot of a running search.
+
+    ``settled`` holds only the nodes settled since the previous frame, so a
+    consumer that accumulates them (rather than the generator) decides what
+    to keep. ``frontier`` is the current open set. The last frame has
+    ``done`` set and carries the path.
+    """
+
+    def __init__(self, settled, frontier, explored_count, path=None, done=False):
+        self.settled = settled
+        self.frontier = frontier
+        self.explored_count = explored_count
+        self.path = path
+        self.done = done
+
+
+def stream_search(graph, source, target, heuristic=None, weight="length", every=STREAM_EVERY):
+    """A* (Dijkstra when ``heuristic`` is None) as a generator of SearchFrames.
+
+    The search is suspended between frames and resumes on the next
+    ``next()``; it never keeps the full explored list.
+    """
+    _check_endpoints(graph, source, target)
+    if heuristic is None:
+        table = None
+        heuristic = lambda u, v: 0
+    else:
+        table = heuristic.to_target() if isinstance(heuristic, QueryHeuristic) else None
+    indptr, indices, costs = graph.adjacency_lists(weight)
+    n = graph.n_nodes
+    g_score = [float("inf")] * n
+    parent = [-1] * n
+    settled = bytearray(n)
+    queue = []
+    for node, cost in endpoint_departures(source):
+        if cost < g_score[node]:
+            g_score[node] = cost
+            h = table[node] if table is not None else heuristic(node, target)
+            heappush(queue, (cost + h, cost, node))
+    arrivals = endpoint_arrivals(target)
+    best, best_node = endpoint_direct(source, target), -1
+    batch = []
+    explored_count = 0
+    while queue:
+        f, g, u = heappop(queue)
+        if settled[u]:
+            continue
+        if u in arrivals and g + arrivals[u] < best:
+            best, best_node = g + arrivals[u], u
+        if f >= best:
+            break
+        settled[u] = 1
+        batch.append(u)
+        explored_count += 1
+        if len(batch) == every:
+            frontier = list(dict.fromkeys(v for _, _, v in queue if not settled[v]))
+            yield SearchFrame(batch, frontier, explored_count)
+            batch = []
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if settled[v]:
+                continue
+            ng = g + costs[k]
+            if ng < g_score[v]:
+                g_score[v] = ng
+                parent[v] = u
+                h = table[v] if table is not None else heuristic(v, target)
+                heappush(queue, (ng + h, ng, v))
+    if best == float("inf"):
+        raise nx.NetworkXNoPath(f"No path from {source} to {target}.")
+    yield SearchFrame(batch, [], explored_count, _unwind(parent, best_node), done=True)
+
+
+def stream_dijkstra(graph, source, target, weight="length", every=STREAM_EVERY):
+    return stream_search(graph, source, target, None, weight, every)
+
+
+def stream_astar(graph, source, target, heuristic=None, weight="length", every=STREAM_EVERY):
+    return stream_search(graph, source, target, heuristic, weight, every)
+
+
+# ---------- RESUMABLE SEARCH ----------
+# Search trees kept per (source, weight) by SearchTreeCache
+MAX_SEARCH_TREES = 8
+
+
+class SearchTree:
+    """A forward Dijkstra from one source that is kept between queries.
+
+    Settled distances, predecessors and the open heap survive each query, so
+    a later target that is already settled is answered by unwinding its
+    parents, and any other target continues from the saved frontier. Results
+    match dijkstra_path_with_explored_nodes: ``explored_list`` holds the
+    nodes a fresh search would settle (those closer than the target), while
+    the stats only count the work done by this call.
+    """
+
+    def __init__(self, graph, source, weight="length"):
+        _check_endpoints(graph, source, 0)
+        self.graph = graph
+        self.source = source
+        self.weight = weight
+        n = graph.n_nodes
+        self.dist = [float("inf")] * n
+        self.parent = [-1] * n
+        self.settled = bytearray(n)
+        self.order = []
+        self._order_dist = []
+        self._queue = []
+        self._lock = threading.Lock()
+        self.queries = 0
+        for node, cost in endpoint_departures(source):
+            if cost < self.dist[node]:
+                self.dist[node] = cost
+                heappush(self._queue, (cost, node))
+
+    def __len__(self):
+        return len(self.order)
+
+    def path_with_explored_nodes(self, target, stats=None):
+        _check_endpoints(self.graph, self.source, target)
+        with self._lock:
+            self.queries += 1
+            return self._resume(target, stats)
+
+    def _resume(self, target, stats):
+        indptr, indices, costs = self.graph.adjacency_lists(self.weight)
+        dist, parent, settled, queue = self.dist, self.parent, self.settled, self._queue
+        arrivals = endpoint_arrivals(target)
+        best, best_node = endpoint_direct(self.source, target), -1
+        for node, cost in arrivals.items():
+            if settled[node] and dist[node] + cost < best:
+                best, best_node = dist[node] + cost, node
+        resumed_from = len(self.order)
+        tracking = stats is not None
+        pops = stale = peak = pushes = 0
+        # Settle everything closer than the best arrival; the heap top is the
+        # smallest tentative distance, so stop as soon as it reaches ``best``.
+        while queue and queue[0][0] < best:
+            if tracking:
+                pops += 1
+                peak = max(peak, len(queue))
+            d, u = heappop(queue)
+            if settled[u]:
+                stale += 1
+                continue
+            settled[u] = 1
+            self.order.append(u)
+            self._order_dist.append(d)
+            if u in arrivals and d + arrivals[u] < best:
+                best, best_node = d + arrivals[u], u
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                if settled[v]:
+                    continue
+                nd = d + costs[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    heappush(queue, (nd, v))
+                    pushes += 1
+        if tracking:
+            _record(stats, [(indptr, self.order[resumed_from:])], pushes, pops, stale, peak)
+        if best == float("inf"):
+            raise nx.NetworkXNoPath(f"No path from {self.source} to {target}.")
+        explored_nodes_list = self.order[:bisect_left(self._order_dist, best)]
+        return (_unwind(parent, best_node), len(explored_nodes_list), explored_nodes_list)
+
+
+class SearchTreeCache:
+    """LRU of SearchTrees keyed by source and weight profile"""
+
+    def __init__(self, graph, max_trees=MAX_SEARCH_TREES):
+        self.graph = graph
+        self.max_trees = max_trees
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _key(source, weight):
+        if hasattr(source, "departures"):
+            return ("edge", int(source.arc), float(source.fraction), weight)
+        return ("node", int(source), weight)
+
+    def tree(self, source, weight="length"):
+        """The kept tree for ``source``, or a new empty one"""
+        key = self._key(source, weight)
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None:
+                self._trees.move_to_end(key)
+                self.hits += 1
+                return tree
+            self.misses += 1
+            tree = self._trees[key] = SearchTree(self.graph, source, weight)
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+            return tree
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "trees": len(self._trees),
+                    "settled": sum(len(tree) for tree in self._trees.values())}
+
+
+# ---------- ONE-TO-ALL SEARCH ----------
+def shortest_path_tree(graph, source, weight="length", reverse=False, budget=None):
+    """Full Dijkstra from source; returns (dist, parent, order) NumPy arrays.
+
+    ``dist`` is inf for unreachable nodes, ``parent`` is -1 at the root and
+    for unreachable nodes, and ``order`` lists reached nodes in settle order.
+    With ``reverse=True`` the search follows arcs backwards, giving the
+    distance from every node *to* source. With a ``budget`` the search stops
+    there, and nodes beyond it count as unreachable. ``source`` may be an
+    EdgeSnap.
+    """
+    indptr, indices, costs = graph.reverse_adjacency_lists(weight) if reverse else graph.adjacency_lists(weight)
+    n = graph.n_nodes
+    dist = [float("inf")] * n
+    parent = [-1] * n
+    settled = bytearray(n)
+    queue = []
+    seeds = endpoint_arrivals(source).items() if reverse else endpoint_departures(source)
+    for node, cost in seeds:
+        if cost < dist[node]:
+            dist[node] = cost
+            heappush(queue, (cost, node))
+    order = []
+    while queue:
+        d, u = heappop(queue)
+        if settled[u]:
+            continue
+        if budget is not None and d > budget:
+            break
+        settled[u] = 1
+        order.append(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + costs[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                heappush(queue, (nd, v))
+    dist, parent = np.array(dist), np.array(parent, dtype=np.int64)
+    if budget is not None:
+        # Nodes left on the frontier only have tentative distances
+        beyond = dist > budget
+        dist[beyond], parent[beyond] = np.inf, -1
+    return dist, parent, np.array(order, dtype=np.int64)
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from graph_engine import shared_graph
+from search import (
+    dijkstra_path_with_explored_nodes, astar_path_with_explored_nodes,
+    bidirectional_dijkstra_path_with_explored_nodes, bidirectional_astar_path_with_explored_nodes,
+    haversine_heuristic, equirectangular_heuristic,
+)
+from telemetry import measure
+from matrix import matrix_row
+import landmarks
+import contraction
+
+# Search mode -> (Dijkstra variant, A* variant) run by the comparison
+SEARCH_MODES = {
+    "Standard": (dijkstra_path_with_explored_nodes, astar_path_with_explored_nodes),
+    "Bidirectional": (bidirectional_dijkstra_path_with_explored_nodes, bidirectional_astar_path_with_explored_nodes),
+}
+# A* heuristic -> builder of a per-query lower-bound table (graph, landmark table, source, target, weight)
+A_STAR_HEURISTICS = {
+    "Haversine": lambda graph, table, source, target, weight: haversine_heuristic(graph, source, target, weight),
+    "Equirectangular (fast)": lambda graph, table, source, target, weight: equirectangular_heuristic(graph, source, target, weight=weight),
+    "ALT Landmarks": lambda graph, table, source, target, weight: table.heuristic(source, target, graph, weight),
+}
+ALGORITHM_LABELS = {"dijkstra": "Dijkstra", "astar": "A*", "ch": "Contraction Hierarchies"}
+
+
+# ---------- WORKER STATE ----------
+# Each worker memory-maps the shared snapshot once in its initializer and
+# loads the landmark tables and hierarchy on first use, so tasks carry only
+# the endpoints and the names of what to run.
+_worker = {}
+
+
+def _init_worker(snapshot_path, landmarks_path, contraction_path):
+    graph = shared_graph(snapshot_path)
+    graph.adjacency_lists()
+    graph.reverse_adjacency_lists()
+    _worker.update(graph=graph, landmarks_path=landmarks_path, contraction_path=contraction_path)
+
+
+def _landmark_table():
+    if "landmarks" not in _worker:
+        _worker["landmarks"] = landmarks.load_or_build(_worker["graph"], _worker["landmarks_path"])
+    return _worker["landmarks"]
+
+
+def _hierarchy(weight):
+    key = f"hierarchy:{weight}"
+    if key not in _worker:
+        path = contraction.profile_path(_worker["contraction_path"], weight)
+        _worker[key] = contraction.load_or_build(_worker["graph"], path, weight)
+    return _worker[key]
+
+
+def run_search(algorithm, mode, heuristic, source, target, weight="length", trace_memory=False):
+    """Run one algorithm ("dijkstra", "astar" or "ch") in this worker.
+
+    Returns ((path, explored_count, explored_list), telemetry dict); for
+    "ch" the dict also holds the hierarchy's shortcut count and
+    preprocessing time.
+    """
+    graph = _worker["graph"]
+    label = ALGORITHM_LABELS[algorithm]
+    if algorithm == "ch":
+        # A missing hierarchy is contracted here, off the web server's threads
+        hierarchy = _hierarchy(weight)
+        result, stats = measure(hierarchy.path_with_explored_nodes, source, target,
+                                algorithm=label, trace_memory=trace_memory)
+        return result, {**stats.as_dict(), "shortcuts": hierarchy.shortcuts,
+                        "preprocessing_seconds": hierarchy.preprocessing_seconds}
+    run_dijkstra, run_astar = SEARCH_MODES[mode]
+    if algorithm == "dijkstra":
+        result, stats = measure(run_dijkstra, graph, source, target, weight=weight,
+                                algorithm=label, trace_memory=trace_memory)
+    else:
+        table = _landmark_table() if heuristic == "ALT Landmarks" else None
+        result, stats = measure(run_astar, graph, source, target, weight=weight,
+                                heuristic=A_STAR_HEURISTICS[heuristic](graph, table, source, target, weight),
+                                algorithm=label, trace_memory=trace_memory)
+    return result, stats.as_dict()
+
+
+def run_matrix_rows(sources, targets, weight="length"):
+    """Distance-matrix rows for a chunk of sources, computed in this worker"""
+    return [matrix_row(_worker["graph"], source, targets, weight) for source in sources]
+
+
+# ---------- POOL ----------
+class SearchPool:
+    """Long-lived worker processes that run the compared searches side by side.
+
+    They also compute distance-matrix rows (see matrix.distance_matrix), so
+    the matrix panel never starts processes of its own.
+
+    Workers are started once (spawned, so they never inherit the web
+    server's threads) and keep the graph attached between tasks. Each run is
+    timed inside its own worker; with fewer cores than workers the runs
+    would compete for CPU, so the pool is capped at the core count.
+    """
+
+    def __init__(self, snapshot_path, landmarks_path, contraction_path, workers=3):
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(snapshot_path, landmarks_path, contraction_path),
+        )
+
+    def submit(self, algorithm, mode, heuristic, source, target, weight="length", trace_memory=False):
+        return self._pool.submit(run_search, algorithm, mode, heuristic, source, target, weight, trace_memory)
+
+    def submit_rows(self, sources, targets, weight="length"):
+        return self._pool.submit(run_matrix_rows, sources, targets, weight)
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,328 @@
+from math import radians, cos
+
+import numpy as np
+
+from graph_engine import write_arrays, read_arrays, graph_fingerprint
+
+EARTH_RADIUS_M = 6371000.0
+
+
+# ---------- EDGE SNAP (VIRTUAL MID-EDGE NODE) ----------
+class EdgeSnap:
+    """A point projected onto the arc u -> v, used as a virtual search endpoint.
+
+    ``fraction`` is how far along the arc (by length) the point lies. As a
+    source it departs to v (and to u when the reverse arc exists); as a target
+    it is reached from u (and from v over the reverse arc). Partial-edge costs
+    are in the ``weight`` profile's units. Two snaps on the same road can also
+    be joined directly, without passing either end node (see direct_cost).
+    """
+
+    def __init__(self, graph, arc, u, v, fraction, lat, lon, distance, weight="length"):
+        self.arc = arc
+        self.u = u
+        self.v = v
+        self.fraction = fraction
+        self.lat = lat
+        self.lon = lon
+        self.distance = distance
+        self.weight = weight
+        costs = graph.weight_array(weight)
+        length = self.cost = float(costs[arc])
+        self.departures = [(v, (1 - fraction) * length)]
+        self.arrivals = {u: fraction * length}
+        reverse = self.reverse_arc = graph.arc_index(v, u)
+        self.reverse_cost = None
+        if reverse is not None:
+            reverse_length = self.reverse_cost = float(costs[reverse])
+            self.departures.append((u, fraction * reverse_length))
+            self.arrivals[v] = (1 - fraction) * reverse_length
+
+    def with_weight(self, graph, weight):
+        """The same snapped point with partial-edge costs in another profile"""
+        if weight == self.weight:
+            return self
+        return EdgeSnap(graph, self.arc, self.u, self.v, self.fraction, self.lat, self.lon, self.distance, weight)
+
+    def departure_cost(self, node):
+        """Cost from the snapped point to the given end node"""
+        return dict(self.departures)[node]
+
+    def arrival_cost(self, node):
+        """Cost from the given end node to the snapped point"""
+        return self.arrivals[node]
+
+    def along(self, other):
+        """Where ``other`` lies as a fraction of this snap's arc, or None when on another road"""
+        if other.arc == self.arc:
+            return other.fraction
+        if self.reverse_arc is not None and other.arc == self.reverse_arc:
+            return 1 - other.fraction
+        return None
+
+    def direct_cost(self, other):
+        """Cost of driving from this point straight to ``other`` along the road they share.
+
+        Forward along the arc when ``other`` lies downstream, back over the
+        reverse arc when it lies upstream and the road is two-way; inf when
+        the points are on different roads or only reachable the long way round.
+        """
+        fraction = self.along(other)
+        if fraction is None:
+            return float("inf")
+        if fraction >= self.fraction:
+            return (fraction - self.fraction) * self.cost
+        if self.reverse_cost is not None:
+            return (self.fraction - fraction) * self.reverse_cost
+        return float("inf")
+
+
+# ---------- UNIFORM GRID INDEX ----------
+class SpatialIndex:
+    """Uniform grid over node positions and arc segments in projected metres.
+
+    Points are projected equirectangularly around the network's centre, which
+    is accurate to well under a metre across the 30 km study area. Each grid
+    cell lists the nodes inside it and the segments whose bounding box touches
+    it, both stored CSR-style (``*_cell_ptr`` / ``*_cell_items``).
+    """
+
+    def __init__(self, meta, node_x, node_y, node_cell_ptr, node_cell_items,
+                 seg_ax, seg_ay, seg_bx, seg_by, seg_arc, seg_start, arc_geom_len,
+                 seg_cell_ptr, seg_cell_items):
+        self.origin_lat = meta["origin_lat"]
+        self.origin_lon = meta["origin_lon"]
+        self.cell_size = meta["cell_size"]
+        self.x0 = meta["x0"]
+        self.y0 = meta["y0"]
+        self.nx = meta["nx"]
+        self.ny = meta["ny"]
+        # Fingerprint of the graph the index was built for (None in older files)
+        self.graph_fingerprint = meta.get("graph_fingerprint")
+        self._cos0 = cos(radians(self.origin_lat))
+        self.node_x, self.node_y = node_x, node_y
+        self.node_cell_ptr, self.node_cell_items = node_cell_ptr, node_cell_items
+        self.seg_ax, self.seg_ay, self.seg_bx, self.seg_by = seg_ax, seg_ay, seg_bx, seg_by
+        self.seg_arc, self.seg_start, self.arc_geom_len = seg_arc, seg_start, arc_geom_len
+        self.seg_cell_ptr, self.seg_cell_items = seg_cell_ptr, seg_cell_items
+
+    # --- projection ---
+    def project(self, lat, lon):
+        """Project lat/lon (scalars or arrays) to metres around the origin"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        x = np.radians(lon - self.origin_lon) * EARTH_RADIUS_M * self._cos0
+        y = np.radians(lat - self.origin_lat) * EARTH_RADIUS_M
+        return x, y
+
+    def unproject(self, x, y):
+        """Inverse of project; returns (lat, lon)"""
+        lat = self.origin_lat + np.degrees(np.asarray(y) / EARTH_RADIUS_M)
+        lon = self.origin_lon + np.degrees(np.asarray(x) / (EARTH_RADIUS_M * self._cos0))
+        return lat, lon
+
+    def _cells(self, x, y):
+        cx = np.floor((x - self.x0) / self.cell_size).astype(np.int64)
+        cy = np.floor((y - self.y0) / self.cell_size).astype(np.int64)
+        inside = (cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny)
+        return cx, cy, inside
+
+    def _gather(self, cx, cy, cell_ptr, cell_items):
+        """Return (owner, item) pairs for every item in each point's 3x3 cells"""
+        points = np.arange(len(cx))
+        owners, items = [], []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                gx, gy = cx + dx, cy + dy
+                ok = (gx >= 0) & (gx < self.nx) & (gy >= 0) & (gy < self.ny)
+                cells = gy[ok] * self.nx + gx[ok]
+                start = cell_ptr[cells]
+                counts = cell_ptr[cells + 1] - start
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                owners.append(np.repeat(points[ok], counts))
+                items.append(cell_items[np.repeat(start, counts) + offsets])
+        if not owners:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(owners), np.concatenate(items)
+
+    # --- nodes ---
+    def nearest_nodes(self, lats, lons):
+        """Vectorized snapping: compiled node index and distance (m) for each point"""
+        x, y = self.project(np.atleast_1d(lats), np.atleast_1d(lons))
+        cx, cy, inside = self._cells(x, y)
+        owner, item = self._gather(cx, cy, self.node_cell_ptr, self.node_cell_items)
+        dist = np.hypot(self.node_x[item] - x[owner], self.node_y[item] - y[owner])
+        nodes, best = _best_per_owner(len(x), owner, item, dist)
+
+        # The 3x3 block is only exact when the winner is within one cell size
+        # of the point; anything else falls back to a full scan.
+        for i in np.flatnonzero(~inside | (best > self.cell_size)):
+            d = np.hypot(self.node_x - x[i], self.node_y - y[i])
+            nodes[i] = int(np.argmin(d))
+            best[i] = d[nodes[i]]
+        return nodes, best
+
+    def nearest_node(self, lat, lon):
+        """Return the compiled index of the node closest to (lat, lon)"""
+        nodes, _ = self.nearest_nodes(lat, lon)
+        return int(nodes[0])
+
+    # --- edges ---
+    def nearest_edges(self, graph, lats, lons):
+        """Vectorized edge snapping: an EdgeSnap for each point"""
+        x, y = self.project(np.atleast_1d(lats), np.atleast_1d(lons))
+        cx, cy, inside = self._cells(x, y)
+        owner, item = self._gather(cx, cy, self.seg_cell_ptr, self.seg_cell_items)
+        dist, _, _, _ = self._segment_distance(item, x[owner], y[owner])
+        segments, best = _best_per_owner(len(x), owner, item, dist)
+        for i in np.flatnonzero(~inside | (best > self.cell_size)):
+            all_segments = np.arange(len(self.seg_arc))
+            d, _, _, _ = self._segment_distance(all_segments, x[i], y[i])
+            segments[i] = int(np.argmin(d))
+
+        _, t, qx, qy = self._segment_distance(segments, x, y)
+        qlat, qlon = self.unproject(qx, qy)
+        snaps = []
+        for i, seg in enumerate(segments.tolist()):
+            arc = int(self.seg_arc[seg])
+            seg_len = np.hypot(self.seg_bx[seg] - self.seg_ax[seg], self.seg_by[seg] - self.seg_ay[seg])
+            along = self.seg_start[seg] + t[i] * seg_len
+            geom_len = self.arc_geom_len[arc]
+            fraction = float(along / geom_len) if geom_len > 0 else 0.0
+            u = int(np.searchsorted(graph.indptr, arc, side="right") - 1)
+            v = int(graph.indices[arc])
+            distance = float(np.hypot(qx[i] - x[i], qy[i] - y[i]))
+            snaps.append(EdgeSnap(graph, arc, u, v, min(max(fraction, 0.0), 1.0),
+                                  float(qlat[i]), float(qlon[i]), distance))
+        return snaps
+
+    def nearest_edge(self, graph, lat, lon):
+        """Project (lat, lon) onto the closest road segment"""
+        return self.nearest_edges(graph, lat, lon)[0]
+
+    def _segment_distance(self, segments, px, py):
+        ax, ay = self.seg_ax[segments], self.seg_ay[segments]
+        abx, aby = self.seg_bx[segments] - ax, self.seg_by[segments] - ay
+        norm = abx * abx + aby * aby
+        t = ((px - ax) * abx + (py - ay) * aby) / np.where(norm > 0, norm, 1.0)
+        t = np.clip(t, 0.0, 1.0)
+        qx, qy = ax + t * abx, ay + t * aby
+        return np.hypot(px - qx, py - qy), t, qx, qy
+
+    # --- persistence ---
+    _ARRAYS = ("node_x", "node_y", "node_cell_ptr", "node_cell_items",
+               "seg_ax", "seg_ay", "seg_bx", "seg_by", "seg_arc", "seg_start",
+               "arc_geom_len", "seg_cell_ptr", "seg_cell_items")
+
+    def save(self, path):
+        meta = {"origin_lat": self.origin_lat, "origin_lon": self.origin_lon,
+                "cell_size": self.cell_size, "x0": self.x0, "y0": self.y0,
+                "nx": self.nx, "ny": self.ny, "graph_fingerprint": self.graph_fingerprint}
+        write_arrays(path, {name: getattr(self, name) for name in self._ARRAYS}, meta)
+
+    @classmethod
+    def load(cls, path):
+        arrays, meta = read_arrays(path)
+        return cls(meta, **arrays)
+
+    @classmethod
+    def build(cls, graph, cell_size=250.0):
+        """Build the grid for a CompiledGraph (uses arc geometry when present)"""
+        origin_lat = float((graph.lat.min() + graph.lat.max()) / 2)
+        origin_lon = float((graph.lon.min() + graph.lon.max()) / 2)
+        cos0 = cos(radians(origin_lat))
+
+        def project(lat, lon):
+            return (np.radians(np.asarray(lon) - origin_lon) * EARTH_RADIUS_M * cos0,
+                    np.radians(np.asarray(lat) - origin_lat) * EARTH_RADIUS_M)
+
+        node_x, node_y = project(graph.lat, graph.lon)
+
+        # Segments: the stored geometry of each arc, or its straight chord.
+        tails = np.repeat(np.arange(graph.n_nodes), np.diff(graph.indptr))
+        xs, ys, seg_arc = [], [], []
+        for arc in range(graph.n_arcs):
+            if graph.geom_indptr is not None and graph.geom_indptr[arc + 1] > graph.geom_indptr[arc]:
+                rows = graph.geom_coords[graph.geom_indptr[arc]:graph.geom_indptr[arc + 1]]
+                px, py = project(rows[:, 1], rows[:, 0])
+            else:
+                u, v = tails[arc], graph.indices[arc]
+                px, py = node_x[[u, v]], node_y[[u, v]]
+            xs.append(px)
+            ys.append(py)
+            seg_arc.append(np.full(len(px) - 1, arc, dtype=np.int32))
+        seg_ax = np.concatenate([p[:-1] for p in xs])
+        seg_bx = np.concatenate([p[1:] for p in xs])
+        seg_ay = np.concatenate([p[:-1] for p in ys])
+        seg_by = np.concatenate([p[1:] for p in ys])
+        seg_arc = np.concatenate(seg_arc)
+        seg_len = np.hypot(seg_bx - seg_ax, seg_by - seg_ay)
+        arc_geom_len = np.bincount(seg_arc, weights=seg_len, minlength=graph.n_arcs)
+        # Distance from the start of the arc to the start of each segment.
+        cumulative = np.cumsum(seg_len) - seg_len
+        first = np.r_[0, np.flatnonzero(np.diff(seg_arc)) + 1]
+        seg_start = cumulative - np.repeat(cumulative[first], np.diff(np.r_[first, len(seg_arc)]))
+
+        x0 = float(min(node_x.min(), seg_ax.min(), seg_bx.min())) - cell_size
+        y0 = float(min(node_y.min(), seg_ay.min(), seg_by.min())) - cell_size
+        nx_cells = int((max(node_x.max(), seg_ax.max(), seg_bx.max()) - x0) // cell_size) + 2
+        ny_cells = int((max(node_y.max(), seg_ay.max(), seg_by.max()) - y0) // cell_size) + 2
+
+        def cell_of(x, y):
+            return ((x - x0) // cell_size).astype(np.int64), ((y - y0) // cell_size).astype(np.int64)
+
+        ncx, ncy = cell_of(node_x, node_y)
+        node_cell_ptr, node_cell_items = _bucket(ncy * nx_cells + ncx, np.arange(graph.n_nodes),
+                                                 nx_cells * ny_cells)
+
+        # Register each segment in every cell its bounding box covers.
+        gx0, gy0 = cell_of(np.minimum(seg_ax, seg_bx), np.minimum(seg_ay, seg_by))
+        gx1, gy1 = cell_of(np.maximum(seg_ax, seg_bx), np.maximum(seg_ay, seg_by))
+        wx, wy = gx1 - gx0 + 1, gy1 - gy0 + 1
+        counts = wx * wy
+        seg_ids = np.repeat(np.arange(len(seg_arc)), counts)
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (gy0[seg_ids] + local // wx[seg_ids]) * nx_cells + gx0[seg_ids] + local % wx[seg_ids]
+        seg_cell_ptr, seg_cell_items = _bucket(cells, seg_ids, nx_cells * ny_cells)
+
+        meta = {"origin_lat": origin_lat, "origin_lon": origin_lon, "cell_size": float(cell_size),
+                "x0": x0, "y0": y0, "nx": nx_cells, "ny": ny_cells,
+                "graph_fingerprint": graph_fingerprint(graph)}
+        return cls(meta, node_x, node_y, node_cell_ptr, node_cell_items.astype(np.int32),
+                   seg_ax, seg_ay, seg_bx, seg_by, seg_arc, seg_start, arc_geom_len,
+                   seg_cell_ptr, seg_cell_items.astype(np.int32))
+
+
+def _bucket(cells, items, n_cells):
+    order = np.argsort(cells, kind="stable")
+    cell_ptr = np.zeros(n_cells + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cells, minlength=n_cells), out=cell_ptr[1:])
+    return cell_ptr, items[order]
+
+
+def _best_per_owner(n, owner, item, dist):
+    best_item = np.full(n, -1, dtype=np.int64)
+    best_dist = np.full(n, np.inf)
+    if len(owner):
+        order = np.lexsort((dist, owner))
+        sorted_owner = owner[order]
+        first = order[np.r_[True, sorted_owner[1:] != sorted_owner[:-1]]]
+        best_item[owner[first]] = item[first]
+        best_dist[owner[first]] = dist[first]
+    return best_item, best_dist
+
+
+def load_or_build(graph, path, cell_size=250.0):
+    """Load the persisted index at path, rebuilding and saving it if missing or built for another graph"""
+    try:
+        index = SpatialIndex.load(path)
+        if index.graph_fingerprint == graph_fingerprint(graph):
+            return index
+    except FileNotFoundError:
+        pass
+    index = SpatialIndex.build(graph, cell_size)
+    index.save(path)
+    return index
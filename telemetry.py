@@ -0,0 +1,57 @@
+import time
+import tracemalloc
+
+
+# ---------- SEARCH TELEMETRY ----------
+class SearchStats:
+    """Counters for one search, filled in by a kernel given ``stats=``.
+
+    Kernels only count while a SearchStats is attached, so the default
+    (stats=None) path pays a single flag test per heap pop.
+    """
+
+    COUNTERS = ("nodes_settled", "edges_relaxed", "heap_pushes", "heap_pops",
+                "stale_pops", "peak_queue", "elapsed_ns", "peak_bytes")
+
+    def __init__(self, algorithm=""):
+        self.algorithm = algorithm
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+
+    def record(self, **counters):
+        for name, value in counters.items():
+            setattr(self, name, int(value))
+
+    @property
+    def elapsed_ms(self):
+        return self.elapsed_ns / 1e6
+
+    def as_dict(self):
+        return {"algorithm": self.algorithm, **{name: getattr(self, name) for name in self.COUNTERS}}
+
+
+def measure(kernel, *args, algorithm=None, trace_memory=False, **kwargs):
+    """Run a search kernel with telemetry on; returns (result, SearchStats).
+
+    Wall time comes from perf_counter_ns. With ``trace_memory`` the peak
+    Python allocation during the search is taken from tracemalloc, which
+    itself slows allocation-heavy code, so timings from such runs are
+    pessimistic.
+    """
+    stats = SearchStats(algorithm or kernel.__name__)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    started = time.perf_counter_ns()
+    try:
+        result = kernel(*args, stats=stats, **kwargs)
+    finally:
+        stats.elapsed_ns = time.perf_counter_ns() - started
+        if trace_memory:
+            stats.peak_bytes = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            if started_tracing:
+                tracemalloc.stop()
+    return result, stats
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from geocoding import GeocodeCache, StaticBackend, FallbackBackend
+
+STATION = (19.0812, 74.7556, "Ahmednagar Railway Station")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyBackend(StaticBackend):
+    """Raises on the first call, then answers like StaticBackend"""
+
+    name = "flaky"
+
+    def geocode(self, query):
+        if self.calls == 0:
+            self.calls += 1
+            raise TimeoutError("geocoder unreachable")
+        return super().geocode(query)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_cache(tmp_path, backend, clock, **kwargs):
+    return GeocodeCache(backend, directory=str(tmp_path), ttl=100, negative_ttl=10, clock=clock, **kwargs)
+
+
+def test_normalized_queries_share_an_entry(tmp_path, clock):
+    backend = StaticBackend({"railway station": STATION})
+    cache = make_cache(tmp_path, backend, clock)
+    assert cache.geocode("Railway Station") == STATION
+    assert cache.geocode("railway  station!") == STATION
+    assert backend.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_found_and_missed_answers_expire_separately(tmp_path, clock):
+    backend = StaticBackend({"railway station": STATION})
+    cache = make_cache(tmp_path, backend, clock)
+    cache.geocode("railway station")
+    assert cache.geocode("nowhere") is None
+    assert backend.calls == 2
+
+    clock.now += 11  # past negative_ttl, within ttl
+    cache.geocode("railway station")
+    cache.geocode("nowhere")
+    assert backend.calls == 3
+
+    clock.now += 100  # past ttl
+    cache.geocode("railway station")
+    assert backend.calls == 4
+    assert cache.stats()["expired"] >= 2
+
+
+def test_errors_are_not_cached(tmp_path, clock):
+    backend = FlakyBackend({"railway station": STATION})
+    cache = make_cache(tmp_path, backend, clock)
+    with pytest.raises(TimeoutError):
+        cache.geocode("railway station")
+    assert cache.stats()["entries"] == 0
+    assert not list(tmp_path.rglob("*.json"))
+    assert cache.geocode("railway station") == STATION
+
+
+def test_concurrent_lookups_share_one_request(tmp_path, clock):
+    release = threading.Event()
+
+    class SlowBackend(StaticBackend):
+        def geocode(self, query):
+            release.wait(5)
+            return super().geocode(query)
+
+    backend = SlowBackend({"railway station": STATION})
+    cache = make_cache(tmp_path, backend, clock)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.geocode("Railway Station"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [STATION] * 4
+    assert backend.calls == 1
+
+
+def test_answers_survive_a_restart(tmp_path, clock):
+    make_cache(tmp_path, StaticBackend({"railway station": STATION}), clock).geocode("railway station")
+    backend = StaticBackend({})
+    reopened = make_cache(tmp_path, backend, clock)
+    assert reopened.geocode("Railway Station") == STATION
+    assert backend.calls == 0
+
+    clock.now += 101
+    assert make_cache(tmp_path, backend, clock).geocode("railway station") is None
+    assert backend.calls == 1
+
+
+def test_backends_do_not_share_disk_entries(tmp_path, clock):
+    make_cache(tmp_path, StaticBackend({"railway station": STATION}), clock).geocode("railway station")
+
+    class OtherBackend(StaticBackend):
+        name = "other"
+
+    other = OtherBackend({})
+    assert make_cache(tmp_path, other, clock).geocode("railway station") is None
+    assert other.calls == 1
+
+
+def test_fallback_asks_backends_in_order():
+    offline = StaticBackend({"railway station": STATION})
+    remote = StaticBackend({"civil hospital": (19.0901, 74.7402, "Civil Hospital")})
+    backend = FallbackBackend(offline, remote)
+    assert backend.geocode("railway station") == STATION
+    assert remote.calls == 0
+    assert backend.geocode("civil hospital")[2] == "Civil Hospital"
+    assert backend.geocode("nowhere") is None
+    assert (offline.calls, remote.calls) == (3, 2)
@@ -0,0 +1,74 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_engine import compile_graph
+from isochrone import isochrones
+from search import shortest_path_tree
+from spatial_index import EdgeSnap
+
+SIDE = 40
+BUDGETS = [400.0, 900.0, 1800.0]
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A two-way street grid (about 105 m blocks) with random lengths"""
+    rng = np.random.default_rng(11)
+    G = nx.MultiDiGraph()
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        G.add_node(node, y=19.0 + row * 0.00095, x=74.7 + col * 0.001)
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        for other in ([node + 1] if col + 1 < SIDE else []) + ([node + SIDE] if row + 1 < SIDE else []):
+            length = float(rng.uniform(105.0, 160.0))
+            G.add_edge(node, other, length=length, highway="residential")
+            G.add_edge(other, node, length=length, highway="residential")
+    return compile_graph(G)
+
+
+def inside(multipolygon, lon, lat):
+    """Even-odd test of one point against GeoJSON MultiPolygon coordinates"""
+    crossings = 0
+    for polygon in multipolygon:
+        for ring in polygon:
+            ring = np.asarray(ring)
+            xa, ya, xb, yb = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+            crosses = (ya > lat) != (yb > lat)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                at = xa + (lat - ya) * (xb - xa) / (yb - ya)
+            crossings += np.count_nonzero(crosses & (lon < at))
+    return crossings % 2 == 1
+
+
+@pytest.fixture(scope="module", params=["node", "snap"])
+def source(request, graph):
+    centre = (SIDE // 2) * SIDE + SIDE // 2
+    if request.param == "node":
+        return centre
+    arc = graph.arc_index(centre, centre + 1)
+    lat = float(graph.lat[centre])
+    lon = float(graph.lon[centre] + graph.lon[centre + 1]) / 2
+    return EdgeSnap(graph, arc, centre, centre + 1, 0.5, lat, lon, 0.0)
+
+
+def test_band_areas_grow_with_the_budget(graph, source):
+    features = isochrones(graph, source, BUDGETS)["features"]
+    assert [f["properties"]["budget"] for f in features] == sorted(BUDGETS, reverse=True)
+    areas = [f["properties"]["area_km2"] for f in reversed(features)]
+    assert all(a < b for a, b in zip(areas, areas[1:]))
+
+
+def test_bands_cover_the_budget_bounded_tree(graph, source):
+    features = {f["properties"]["budget"]: f for f in isochrones(graph, source, BUDGETS)["features"]}
+    for budget in BUDGETS:
+        dist = shortest_path_tree(graph, source, budget=budget)[0]
+        reached = np.flatnonzero(np.isfinite(dist))
+        feature = features[budget]
+        assert feature["properties"]["nodes"] == len(reached)
+        polygons = feature["geometry"]["coordinates"]
+        assert all(inside(polygons, graph.lon[node], graph.lat[node]) for node in reached)
+        # Nodes far beyond the budget stay outside
+        far = np.flatnonzero(~np.isfinite(shortest_path_tree(graph, source, budget=2 * budget)[0]))
+        assert len(far) and not any(inside(polygons, graph.lon[node], graph.lat[node]) for node in far)
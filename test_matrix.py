@@ -0,0 +1,77 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_engine import compile_graph, save_snapshot
+from matrix import matrix_row, distance_matrix
+from search import dijkstra_path_with_explored_nodes, endpoint_direct
+from spatial_index import EdgeSnap
+
+SIDE = 6
+INF = float("inf")
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A two-way grid with random lengths, a one-way spur off it and a separate island"""
+    rng = np.random.default_rng(5)
+    G = nx.MultiDiGraph()
+    for node in range(SIDE * SIDE + 3):
+        row, col = divmod(node, SIDE)
+        G.add_node(node, y=19.0 + row * 0.001, x=74.7 + col * 0.001)
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        for other in ([node + 1] if col + 1 < SIDE else []) + ([node + SIDE] if row + 1 < SIDE else []):
+            length = float(rng.uniform(80.0, 200.0))
+            G.add_edge(node, other, length=length, highway="residential")
+            G.add_edge(other, node, length=length, highway="residential")
+    spur, island = SIDE * SIDE, SIDE * SIDE + 1
+    G.add_edge(0, spur, length=50.0, highway="service")
+    G.add_edge(island, island + 1, length=70.0, highway="residential")
+    G.add_edge(island + 1, island, length=70.0, highway="residential")
+    return compile_graph(G)
+
+
+def endpoints(graph):
+    spur = SIDE * SIDE
+    snap_arc = graph.arc_index(7, 8)
+    snaps = [EdgeSnap(graph, snap_arc, 7, 8, fraction, 19.001, 74.7015, 0.0) for fraction in (0.3, 0.7)]
+    return [0, 14, SIDE * SIDE - 1, spur, spur + 1, *snaps]
+
+
+def pairwise_cost(graph, source, target, weight):
+    try:
+        path = dijkstra_path_with_explored_nodes(graph, source, target, weight=weight)[0]
+    except nx.NetworkXNoPath:
+        return INF
+    if not path:
+        return endpoint_direct(source, target)
+    cost = graph.path_length(path, weight)
+    if isinstance(source, EdgeSnap):
+        cost += source.departure_cost(path[0])
+    if isinstance(target, EdgeSnap):
+        cost += target.arrival_cost(path[-1])
+    return cost
+
+
+@pytest.mark.parametrize("weight", ["length", "travel_time"])
+def test_matrix_rows_match_pairwise_dijkstra(graph, weight):
+    points = [p.with_weight(graph, weight) if isinstance(p, EdgeSnap) else p for p in endpoints(graph)]
+    expected = np.array([[pairwise_cost(graph, s, t, weight) if s is not t else 0.0 for t in points] for s in points])
+    assert np.isinf(expected).any() and np.isfinite(expected).any()
+    for i, source in enumerate(points):
+        np.testing.assert_allclose(matrix_row(graph, source, points, weight), expected[i])
+    np.testing.assert_allclose(distance_matrix(graph, points, points, weight, processes=1), expected)
+
+
+def test_parallel_rows_match_serial(graph, tmp_path):
+    path = str(tmp_path / "grid.graph")
+    save_snapshot(graph, path)
+    points = endpoints(graph)
+    serial = distance_matrix(graph, points, points, processes=1)
+    np.testing.assert_array_equal(distance_matrix(graph, points, points, processes=2, snapshot_path=path), serial)
+
+
+def test_empty_sides_give_an_empty_matrix(graph):
+    assert distance_matrix(graph, [], [0, 1]).shape == (0, 2)
+    assert distance_matrix(graph, [0, 1], []).shape == (2, 0)
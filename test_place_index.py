@@ -0,0 +1,48 @@
+import pytest
+
+from place_index import PlaceIndex
+
+PLACES = [
+    ("Civil Hospital", 19.0901, 74.7402, "hospital"),
+    ("Maliwada Bus Stand", 19.0955, 74.7389, "bus station"),
+    ("Ahmednagar Railway Station", 19.0812, 74.7556, "station"),
+    ("Station Road", 19.0850, 74.7500, "street"),
+    ("Delhi Gate", 19.0968, 74.7364, "place"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PlaceIndex.from_places(PLACES)
+
+
+def names(results):
+    return [r[0] for r in results]
+
+
+def test_completion_matches_any_word_start(index):
+    assert names(index.complete("stat")) == ["Station Road", "Ahmednagar Railway Station"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("hospitl", "Civil Hospital"),
+    ("bus stnd", "Maliwada Bus Stand"),
+    ("dehli gate", "Delhi Gate"),
+])
+def test_typo_in_one_word_finds_longer_name(index, query, expected):
+    assert index.complete(query) == []
+    assert names(index.search(query))[0] == expected
+
+
+def test_fuzzy_ignores_unrelated_names(index):
+    assert index.fuzzy("xyzzy") == []
+
+
+def test_many_kinds_survive_a_round_trip(tmp_path):
+    places = [(f"Place {i}", 19.0 + i * 1e-4, 74.7, f"kind {i}") for i in range(300)]
+    built = PlaceIndex.from_places(places)
+    path = tmp_path / "places.idx"
+    built.save(str(path))
+    loaded = PlaceIndex.load(str(path))
+    assert len(loaded) == 300
+    assert loaded.search("Place 299")[0] == ("Place 299", pytest.approx(19.0299), pytest.approx(74.7), "kind 299")
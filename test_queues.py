@@ -0,0 +1,94 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_engine import compile_graph
+from queues import QUEUES, RadixHeap
+from search import dijkstra_path_with_explored_nodes
+
+SIDE = 25
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A two-way grid with random street lengths and a few one-way streets"""
+    rng = np.random.default_rng(7)
+    G = nx.MultiDiGraph()
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        G.add_node(node, y=19.0 + row * 0.001, x=74.7 + col * 0.001)
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        for other in ([node + 1] if col + 1 < SIDE else []) + ([node + SIDE] if row + 1 < SIDE else []):
+            length = float(rng.uniform(105.0, 300.0))
+            highway = str(rng.choice(["primary", "secondary", "residential"]))
+            G.add_edge(node, other, length=length, highway=highway)
+            if rng.random() > 0.1:
+                G.add_edge(other, node, length=length, highway=highway)
+    return compile_graph(G)
+
+
+def drain(queue, rng, steps=2000):
+    """Interleave pushes and pops the way Dijkstra does (no key below the last pop), then empty the queue.
+
+    Yields (popped key, smallest key queued at the time of the pop).
+    """
+    queued, node, last = [], 0, 0.0
+    for step in range(steps):
+        for _ in range(int(rng.integers(0, 4)) if step < steps // 2 else 0):
+            # Some exact ties and sub-quantum gaps, mostly larger steps
+            key = last + float(rng.choice([0.0, 0.004, rng.exponential(50.0)]))
+            queue.push(key, node)
+            queued.append(key)
+            node += 1
+        if queued:
+            key, _ = queue.pop()
+            smallest = min(queued)
+            queued.remove(key)
+            last = key
+            yield key, smallest
+    assert not queued and len(queue) == 0
+
+
+@pytest.mark.parametrize("name", ["binary", "dary"])
+def test_exact_queues_pop_the_smallest_key(name):
+    queue = QUEUES[name](100_000)
+    for key, smallest in drain(queue, np.random.default_rng(1)):
+        assert key == smallest
+
+
+def test_radix_heap_pops_within_one_quantum_of_the_smallest_key():
+    queue = RadixHeap(quantum=0.01)
+    popped = []
+    for key, smallest in drain(queue, np.random.default_rng(2)):
+        assert int(key / queue.quantum) == int(smallest / queue.quantum)
+        popped.append(key)
+    # Keys only reorder inside a quantum
+    assert all(b >= a - queue.quantum for a, b in zip(popped, popped[1:]))
+
+
+def test_dary_heap_decrease_key_keeps_one_entry():
+    queue = QUEUES["dary"](4)
+    queue.push(5.0, 2)
+    queue.push(3.0, 2)
+    queue.push(4.0, 2)
+    assert len(queue) == 1
+    assert queue.pop() == (3.0, 2)
+    assert queue.decreases == 1
+
+
+@pytest.mark.parametrize("weight", ["length", "travel_time"])
+@pytest.mark.parametrize("queue", list(QUEUES))
+def test_dijkstra_costs_match_the_default_kernel(graph, queue, weight):
+    rng = np.random.default_rng(3)
+    for s, t in rng.integers(graph.n_nodes, size=(40, 2)).tolist():
+        try:
+            expected = graph.path_length(dijkstra_path_with_explored_nodes(graph, s, t, weight=weight)[0], weight)
+        except nx.NetworkXNoPath:
+            with pytest.raises(nx.NetworkXNoPath):
+                dijkstra_path_with_explored_nodes(graph, s, t, weight=weight, queue=queue)
+            continue
+        path = dijkstra_path_with_explored_nodes(graph, s, t, weight=weight, queue=queue)[0]
+        assert path[0] == s and path[-1] == t
+        tolerance = RadixHeap().quantum if queue == "radix" else 1e-9
+        assert graph.path_length(path, weight) == pytest.approx(expected, abs=tolerance)
@@ -0,0 +1,94 @@
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph_engine import compile_graph
+from route_cache import RouteCache, pack_nodes, unpack_nodes
+from spatial_index import EdgeSnap
+
+
+def line_graph(length=100.0):
+    G = nx.MultiDiGraph()
+    for node in range(4):
+        G.add_node(node, y=19.0 + node * 0.001, x=74.7)
+    for u in range(3):
+        G.add_edge(u, u + 1, length=length, highway="residential")
+        G.add_edge(u + 1, u, length=length, highway="residential")
+    return compile_graph(G)
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return line_graph()
+
+
+@pytest.mark.parametrize("nodes", [[], [7], [5, 3, 900_000, 0, 12, 12], np.random.default_rng(0).integers(0, 2**31 - 1, 5000)])
+def test_pack_nodes_round_trip(nodes):
+    unpacked = unpack_nodes(pack_nodes(nodes))
+    assert unpacked.dtype == np.int32
+    assert unpacked.tolist() == list(np.asarray(nodes, dtype=np.int32).tolist())
+
+
+def test_key_changes_with_every_query_field(graph, tmp_path):
+    cache = RouteCache(graph, directory=str(tmp_path))
+    base = cache.key(0, 3, "length", "dijkstra")
+    assert base == cache.key(0, 3, "length", "dijkstra", trace_memory=False)
+    variants = [
+        cache.key(1, 3, "length", "dijkstra"),
+        cache.key(0, 2, "length", "dijkstra"),
+        cache.key(0, 3, "travel_time", "dijkstra"),
+        cache.key(0, 3, "length", "astar"),
+        cache.key(0, 3, "length", "dijkstra", trace_memory=True),
+        RouteCache(line_graph(120.0), directory=str(tmp_path)).key(0, 3, "length", "dijkstra"),
+    ]
+    assert len({base, *variants}) == len(variants) + 1
+
+
+def test_key_tells_snapped_points_apart(graph, tmp_path):
+    cache = RouteCache(graph, directory=str(tmp_path))
+    arc = graph.arc_index(0, 1)
+    snaps = [EdgeSnap(graph, arc, 0, 1, fraction, 19.0, 74.7, 0.0) for fraction in (0.25, 0.5)]
+    assert cache.key(snaps[0], 3, "length", "dijkstra") != cache.key(snaps[1], 3, "length", "dijkstra")
+    assert cache.key(snaps[0], 3, "length", "dijkstra") != cache.key(0, 3, "length", "dijkstra")
+
+
+def test_lru_evicts_by_entry_count(graph, tmp_path):
+    cache = RouteCache(graph, directory=str(tmp_path), max_entries=2)
+    keys = [cache.key(0, t, "length", "dijkstra") for t in (1, 2, 3)]
+    cache.put(keys[0], [0, 1], [0, 1])
+    cache.put(keys[1], [0, 1, 2], [0, 1, 2])
+    assert cache.get(keys[0]) is not None  # keys[1] is now least recently used
+    cache.put(keys[2], [0, 1, 2, 3], [0, 1, 2, 3])
+    assert list(cache._entries) == [keys[0], keys[2]]
+    assert cache.stats()["evictions"] == 1
+    # Evicted entries are still on disk
+    assert cache.result(keys[1])[:3] == ([0, 1, 2], 3, [0, 1, 2])
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_lru_evicts_by_bytes(graph, tmp_path):
+    cache = RouteCache(graph, directory=str(tmp_path), max_bytes=1000, store_explored=False)
+    keys = [cache.key(0, t, "length", algorithm) for t in (1, 2, 3) for algorithm in ("dijkstra", "astar")]
+    for key in keys:
+        cache.put(key, list(range(10)), list(range(10)))
+        assert cache.stats()["bytes"] <= 1000
+    assert list(cache._entries) == keys[-3:]
+    assert cache.stats()["bytes"] == sum(entry.nbytes for entry in cache._entries.values())
+    assert cache.result(keys[-1])[2] == []  # explored lists were not stored
+
+
+def test_disk_keeps_the_newest_files(graph, tmp_path):
+    cache = RouteCache(graph, directory=str(tmp_path), max_disk_entries=3)
+    keys = [cache.key(0, t, "length", algorithm) for t in (1, 2) for algorithm in ("dijkstra", "astar")]
+    for age, key in zip((400, 300, 200), keys[:3]):
+        cache.put(key, [0, 1], [0, 1])
+        stamp = os.path.getmtime(cache._file(key)) - age
+        os.utime(cache._file(key), (stamp, stamp))
+    cache.put(keys[3], [0, 1], [0, 1])
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{key}.route" for key in keys[1:])
+
+    reopened = RouteCache(graph, directory=str(tmp_path))
+    assert reopened.get(keys[0]) is None
+    assert reopened.result(keys[3])[0] == [0, 1]
@@ -0,0 +1,40 @@
+import networkx as nx
+import pytest
+
+from graph_engine import compile_graph
+from search import haversine_heuristic
+
+SIDE = 40
+
+
+@pytest.fixture(scope="module")
+def grid():
+    """A SIDE x SIDE two-way street grid, so node ids run past the small-int cache"""
+    G = nx.MultiDiGraph()
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        G.add_node(node, y=19.0 + row * 0.001, x=74.7 + col * 0.001)
+    for node in range(SIDE * SIDE):
+        row, col = divmod(node, SIDE)
+        for other in ([node + 1] if col + 1 < SIDE else []) + ([node + SIDE] if row + 1 < SIDE else []):
+            G.add_edge(node, other, length=105.0, highway="residential")
+            G.add_edge(other, node, length=105.0, highway="residential")
+    return compile_graph(G)
+
+
+def test_heuristic_matches_endpoints_by_value(grid):
+    h = haversine_heuristic(grid, int("1000"), int("1500"))
+    assert h(10, int("1500")) == h.to_target()[10]
+    assert h(1000, int("700")) == h.from_source()[700]
+    with pytest.raises(ValueError):
+        h(10, 20)
+
+
+def test_list_mirrors_are_built_once_per_profile(grid):
+    weights = [weight for weight in grid.weights]
+    first = {w: (grid.adjacency_lists(w), grid.reverse_adjacency_lists(w)) for w in weights}
+    for w in reversed(weights):
+        forward, reverse = grid.adjacency_lists(w), grid.reverse_adjacency_lists(w)
+        assert all(a is b for a, b in zip(forward + reverse, first[w][0] + first[w][1]))
+    # Topology lists are shared by every profile
+    assert all(first[w][0][1] is first[weights[0]][0][1] for w in weights)
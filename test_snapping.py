@@ -0,0 +1,85 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from contraction import ContractionHierarchy
+from geometry import route_coords
+from graph_engine import compile_graph
+from matrix import matrix_row
+from search import (dijkstra_path_with_explored_nodes, astar_path_with_explored_nodes,
+                    bidirectional_dijkstra_path_with_explored_nodes, bidirectional_astar_path_with_explored_nodes,
+                    haversine_heuristic, stream_dijkstra, SearchTree, endpoint_direct)
+from spatial_index import EdgeSnap
+
+ROAD_M = 120.0
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A square block: 0 <-> 1 two-way, then the one-way loop 1 -> 2 -> 3 -> 0"""
+    G = nx.MultiDiGraph()
+    for node, (lat, lon) in enumerate([(19.0, 74.700), (19.0, 74.701), (19.001, 74.701), (19.001, 74.700)]):
+        G.add_node(node, y=lat, x=lon)
+    for u, v in [(0, 1), (1, 0), (1, 2), (2, 3), (3, 0)]:
+        G.add_edge(u, v, length=ROAD_M, highway="residential")
+    return compile_graph(G)
+
+
+def snap(graph, u, v, fraction):
+    arc = graph.arc_index(u, v)
+    lat = graph.lat[u] + (graph.lat[v] - graph.lat[u]) * fraction
+    lon = graph.lon[u] + (graph.lon[v] - graph.lon[u]) * fraction
+    return EdgeSnap(graph, arc, u, v, fraction, float(lat), float(lon), 0.0)
+
+
+def kernels(graph):
+    hierarchy = ContractionHierarchy.build(graph)
+    return {
+        "dijkstra": lambda s, t: dijkstra_path_with_explored_nodes(graph, s, t),
+        "dijkstra (dary queue)": lambda s, t: dijkstra_path_with_explored_nodes(graph, s, t, queue="dary"),
+        "astar": lambda s, t: astar_path_with_explored_nodes(graph, s, t, heuristic=haversine_heuristic(graph, s, t)),
+        "bidirectional dijkstra": lambda s, t: bidirectional_dijkstra_path_with_explored_nodes(graph, s, t),
+        "bidirectional astar": lambda s, t: bidirectional_astar_path_with_explored_nodes(
+            graph, s, t, heuristic=haversine_heuristic(graph, s, t)),
+        "stream": lambda s, t: (list(stream_dijkstra(graph, s, t))[-1].path, 0, []),
+        "search tree": lambda s, t: SearchTree(graph, s).path_with_explored_nodes(t),
+        "contraction hierarchy": lambda s, t: hierarchy.path_with_explored_nodes(s, t),
+    }
+
+
+def route_cost(graph, path, start, end):
+    if not path:
+        return endpoint_direct(start, end)
+    return start.departure_cost(path[0]) + graph.path_length(path) + end.arrival_cost(path[-1])
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    ((0, 1, 0.2), (0, 1, 0.8), 0.6 * ROAD_M),   # downstream on one arc
+    ((0, 1, 0.8), (0, 1, 0.2), 0.6 * ROAD_M),   # upstream, back over the reverse arc
+    ((0, 1, 0.2), (1, 0, 0.3), 0.5 * ROAD_M),   # end snapped onto the reverse arc
+])
+def test_same_arc_route_is_direct(graph, start, end, expected):
+    s, t = snap(graph, *start), snap(graph, *end)
+    for name, kernel in kernels(graph).items():
+        path = kernel(s, t)[0]
+        assert path == [], name
+        assert route_cost(graph, path, s, t) == pytest.approx(expected), name
+    assert matrix_row(graph, s, [t])[0] == pytest.approx(expected)
+
+
+def test_one_way_upstream_goes_round_the_block(graph):
+    s, t = snap(graph, 2, 3, 0.8), snap(graph, 2, 3, 0.2)
+    assert endpoint_direct(s, t) == float("inf")
+    for name, kernel in kernels(graph).items():
+        path = kernel(s, t)[0]
+        assert path == [3, 0, 1, 2], name
+        assert route_cost(graph, path, s, t) == pytest.approx(3.4 * ROAD_M), name
+    assert matrix_row(graph, s, [t])[0] == pytest.approx(3.4 * ROAD_M)
+
+
+def test_same_arc_geometry_is_the_stretch_between_snaps(graph):
+    s, t = snap(graph, 0, 1, 0.8), snap(graph, 0, 1, 0.2)
+    coords = route_coords(graph, [], s, t)
+    np.testing.assert_allclose(coords[0], (s.lat, s.lon))
+    np.testing.assert_allclose(coords[-1], (t.lat, t.lon))
+    assert len(coords) == 2